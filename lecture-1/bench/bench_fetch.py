@@ -0,0 +1,86 @@
+"""fetcher.py（並行・レート制限）と、これまでの1ページずつの取得を比べるベンチマーク
+
+ローカルのサーバー（bench/standin.py）に repository.db のリポジトリを94ページで置いて、
+全ページを取得する時間を測る:
+
+    python bench/bench_fetch.py --rate 10 --latency 0.3 --fail-rate 0.05
+
+これまでの方法は「1ページ取得してから 1/rate 秒待つ」（gitrep.ipynb の time.sleep(2) は rate=0.5）
+なので ページ数 ×（通信時間 + 1/rate）かかる。fetcher は ページ数 / rate に近づく。
+サーバーは rate を超えたリクエストに 429 を返すので、レートを守れているかも分かる。
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from fetcher import Fetcher, page_url  # noqa: E402
+from standin import StandInServer, load_rows  # noqa: E402
+
+
+def legacy(base_url, pages, wait):
+    """gitrep.ipynb と同じ取得（1ページずつ。503 だけ1回リトライし、それ以外の失敗で止まる）"""
+    session = requests.Session()
+    fetched = 0
+    for page in pages:
+        url = page_url("google", page, base_url)
+        res = session.get(url, timeout=15)
+        if res.status_code == 503:
+            time.sleep(wait)
+            res = session.get(url, timeout=15)
+        if res.status_code != 200:
+            print(f"  これまでの方法: ページ {page} で {res.status_code} が返り、止まりました")
+            break
+        fetched += 1
+        time.sleep(wait)
+    session.close()
+    return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=10.0, help="1秒あたりのリクエスト数の上限")
+    parser.add_argument("--latency", type=float, default=0.3, help="サーバーの応答時間（秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="503 を返す割合")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    rows = load_rows()
+    pages = range(1, -(-len(rows) // 30) + 1)
+    print(f"{len(pages)}ページ、応答 {args.latency}s、503 {args.fail_rate:.0%}、上限 {args.rate}回/秒")
+    print(f"  レート上限での最短時間: {len(pages) / args.rate:.1f}s")
+
+    if not args.skip_legacy:
+        with StandInServer(rows, latency=args.latency, fail_rate=args.fail_rate, rate=args.rate) as server:
+            start = time.perf_counter()
+            fetched = legacy(server.base_url, pages, 1 / args.rate)
+            print(f"  これまでの方法: {time.perf_counter() - start:.1f}s（{fetched}ページ取得）")
+
+    with StandInServer(rows, latency=args.latency, fail_rate=args.fail_rate, rate=args.rate) as server:
+        fetcher = Fetcher(
+            base_url=server.base_url, max_workers=args.workers, rate=args.rate, burst=1, backoff=0.2
+        )
+        start = time.perf_counter()
+        order = []
+        failed = 0
+        with fetcher:
+            for result in fetcher.fetch_pages(pages):
+                order.append(result.page)
+                failed += not result.ok
+        elapsed = time.perf_counter() - start
+        out_of_order = sum(a > b for a, b in zip(order, order[1:]))
+        print(
+            f"  fetcher: {elapsed:.1f}s（{len(order) - failed}ページ取得、失敗 {failed}、"
+            f"リクエスト {server.requests}、429/503 {server.rejected}、同時 最大{server.max_active}、"
+            f"順番が入れ替わった回数 {out_of_order}）"
+        )
+
+
+if __name__ == "__main__":
+    main()
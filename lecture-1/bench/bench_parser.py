@@ -0,0 +1,148 @@
+"""repo_parser.py と gitrep.ipynb のパース（BeautifulSoup + html.parser）を比べるベンチマーク
+
+リポジトリ一覧ページをパースして、1秒あたりのページ数を測る。ページは --pages-dir の *.html
+（保存したページ）を使い、指定しなければ repository.db から bench/standin.py と同じ HTML を作る:
+
+    python bench/bench_parser.py
+    python bench/bench_parser.py --pages-dir path/to/saved/pages   # 本物のページを保存した場合
+    python bench/bench_parser.py --save path/to/pages              # 作ったページを保存する
+
+両方の結果（名前・言語・スター数）が一致するかも確かめ、違うものを表示する。
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from repo_parser import UNKNOWN_LANGUAGE, RepoListParser  # noqa: E402
+from standin import load_rows, render_page  # noqa: E402
+
+
+def legacy(content):
+    """gitrep.ipynb のページごとの処理（表示の print を除いてそのまま）"""
+    repositories = []
+    soup = BeautifulSoup(content, 'html.parser')
+    repo_items = soup.find_all('li', class_='ListItem-module__listItem--k4eMk')
+    if not repo_items:
+        repo_items = soup.find_all('li', {'data-testid': lambda x: x and 'repository' in str(x).lower()})
+    if not repo_items:
+        repo_items = soup.find_all('li')
+        repo_items = [item for item in repo_items if item.find('a', href=lambda x: x and '/google/' in str(x))]
+    for item in repo_items:
+        title_h4 = item.find('h4', class_='Title-module__heading--s7YnL')
+        if title_h4:
+            repo_link = title_h4.find('a', class_='Title-module__anchor--GmXUE')
+            if repo_link:
+                repo_name = repo_link.get_text().strip()
+            else:
+                continue
+        else:
+            repo_link = item.find('a', href=lambda x: x and x.startswith('/google/'))
+            if repo_link:
+                repo_name = repo_link.get_text().strip()
+            else:
+                continue
+        language = "不明"
+        language_span = item.find('span', class_='ReposListItem-module__Text_4--mkG7R')
+        if language_span:
+            language = language_span.get_text().strip()
+        else:
+            language_span = item.find('span', {'itemprop': 'programmingLanguage'})
+            if language_span:
+                language = language_span.get_text().strip()
+            else:
+                lang_circle = item.find('div', class_=lambda x: x and 'LanguageCircle' in str(x))
+                if lang_circle and lang_circle.parent:
+                    next_span = lang_circle.find_next_sibling('span')
+                    if next_span:
+                        language = next_span.get_text().strip()
+        star_count = "0"
+        star_link = item.find('a', {'aria-label': lambda x: x and 'star' in str(x).lower()})
+        if star_link:
+            aria_label = star_link.get('aria-label', '')
+            star_count = aria_label.split()[0].replace(',', '')
+        else:
+            star_link = item.find('a', href=lambda x: x and 'stargazers' in str(x))
+            if star_link:
+                star_text = star_link.get_text().strip()
+                star_count = star_text.replace(',', '')
+            else:
+                star_svg = item.find('svg', class_='octicon-star')
+                if star_svg and star_svg.parent:
+                    star_text = star_svg.parent.get_text().strip()
+                    match = re.search(r'[\d,]+', star_text)
+                    if match:
+                        star_count = match.group().replace(',', '')
+        repositories.append((repo_name, language, star_count))
+    return repositories
+
+
+def load_pages(pages_dir=None, save=None):
+    """保存したページ（pages_dir の *.html）か、repository.db から作ったページ"""
+    if pages_dir is not None:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+            with open(path, "rb") as f:
+                pages.append(f.read())
+        return pages
+    rows = load_rows()
+    pages = [render_page(rows, page) for page in range(1, -(-len(rows) // 30) + 1)]
+    if save is not None:
+        os.makedirs(save, exist_ok=True)
+        for page, content in enumerate(pages, 1):
+            with open(os.path.join(save, f"google-{page:03d}.html"), "wb") as f:
+                f.write(content)
+    return pages
+
+
+def measure(func, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for content in pages:
+            func(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages-dir", default=None, help="保存したページ（*.html）のフォルダ")
+    parser.add_argument("--save", default=None, help="repository.db から作ったページを保存するフォルダ")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir, args.save)
+    size = sum(len(p) for p in pages)
+    print(f"{len(pages)}ページ（平均 {size / len(pages) / 1024:.0f}KB）")
+
+    # 結果が同じか確かめる（言語が無いものは "不明"、スター数はカンマを除いた表示で比べる）
+    repo_parser = RepoListParser("google")
+    new = [
+        (r.name, r.language or UNKNOWN_LANGUAGE, r.stars_text.replace(",", ""))
+        for content in pages for r in repo_parser.parse(content)
+    ]
+    old = [row for content in pages for row in legacy(content)]
+    print(f"  リポジトリ {len(new)}件、使った候補: {repo_parser.describe()}")
+    differences = [(a, b) for a, b in zip(new, old) if a != b]
+    if len(new) != len(old):
+        print(f"  件数が違う: repo_parser {len(new)}件、これまで {len(old)}件")
+    print(f"  結果が違うリポジトリ: {len(differences)}件")
+    for a, b in differences[:10]:
+        print(f"    repo_parser {a} / これまで {b}")
+
+    old_time = measure(legacy, pages, args.repeat)
+    new_time = measure(RepoListParser("google").parse, pages, args.repeat)
+    print(f"  BeautifulSoup（これまで）: {len(pages) / old_time:8.1f}ページ/秒")
+    print(f"  repo_parser（lxml）     : {len(pages) / new_time:8.1f}ページ/秒（{old_time / new_time:.1f}倍）")
+
+
+if __name__ == "__main__":
+    main()
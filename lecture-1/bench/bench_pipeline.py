@@ -0,0 +1,92 @@
+"""pipeline.py（取得・パース・保存を同時に流す）と、全部溜めてから保存する方法を比べるベンチマーク
+
+ローカルのサーバー（bench/standin.py）に repository.db のリポジトリを scale 倍に増やして置き、
+組織全体をクロールして repository.db と同じ形のデータベース（一時ファイル）に保存する。
+時間と、tracemalloc で測ったメモリの最大値を表示する:
+
+    python bench/bench_pipeline.py --scales 1 5 20
+
+これまでの方法（gitrep.ipynb と同じく repositories リストに溜めてから最後に書き込む）は
+メモリが組織の大きさに比例して増えるが、パイプラインはほぼ一定になる。
+パースはどちらも repo_parser を使い、違いが溜め方だけになるようにしている。
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from fetcher import Fetcher  # noqa: E402
+from pipeline import CrawlPipeline, RepositoryStore  # noqa: E402
+from repo_parser import UNKNOWN_LANGUAGE, RepoListParser  # noqa: E402
+from standin import StandInServer, load_rows  # noqa: E402
+
+
+def accumulate(fetcher, path):
+    """全ページの結果をリストに溜めてから、最後にまとめて書き込む（これまでの方法）"""
+    parser = RepoListParser(fetcher.org)
+    results = sorted(fetcher.fetch_pages(range(1, fetcher.max_pages + 1)), key=lambda r: r.page)
+    repositories = []
+    for result in results:
+        repositories.extend(parser.parse(result.body))
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS rep (name TEXT, language TEXT, star INT)")
+    for r in repositories:
+        conn.execute(
+            "INSERT INTO rep (name, language, star) VALUES (?, ?, ?)", (r.name, r.language or UNKNOWN_LANGUAGE, r.stars)
+        )
+    conn.commit()
+    conn.close()
+    return len(repositories)
+
+
+def streaming(fetcher, path):
+    store = RepositoryStore(path)
+    try:
+        return CrawlPipeline(fetcher, store).run(fetcher.max_pages).repositories
+    finally:
+        store.close()
+
+
+def measure(func, server, pages, rate):
+    with tempfile.TemporaryDirectory() as tmp:
+        with Fetcher(base_url=server.base_url, max_workers=4, rate=rate) as fetcher:
+            fetcher.max_pages = pages
+            tracemalloc.start()
+            start = time.perf_counter()
+            count = func(fetcher, os.path.join(tmp, "repository.db"))
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--rate", type=float, default=200.0)
+    args = parser.parse_args()
+
+    base = load_rows()
+    print(f"{'倍率':>4}{'ページ':>8}{'件数':>8}{'溜める':>16}{'パイプライン':>22}")
+    for scale in args.scales:
+        rows = [(f"{name}-{i}" if i else name, language, star) for i in range(scale) for name, language, star in base]
+        pages = -(-len(rows) // 30)
+        with StandInServer(rows) as server:
+            old = measure(accumulate, server, pages, args.rate)
+            new = measure(streaming, server, pages, args.rate)
+        print(
+            f"{scale:>6}{pages:>9}{len(rows):>9}"
+            f"{old[1]:>8.1f}s {old[2] / 2**20:>6.1f}MB"
+            f"{new[1]:>12.1f}s {new[2] / 2**20:>6.1f}MB"
+            f"{'' if old[0] == new[0] == len(rows) else '  件数が合わない'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
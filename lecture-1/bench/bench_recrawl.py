@@ -0,0 +1,105 @@
+"""再クロール（crawl_state.py の記録を使う pipeline.py）を確かめるベンチマーク
+
+ローカルのサーバー（bench/standin.py）に repository.db のリポジトリを置き、
+一時ファイルのデータベースに何回かクロールして、取得・パース・書き込みの量を表示する:
+
+    python bench/bench_recrawl.py
+
+1. 初めてのクロール（全ページをパースして書き込む）
+2. 何も変わっていない再クロール（ETag が同じなので 304。パースも書き込みもしない）
+3. いくつかのページのリポジトリを変えた再クロール（そのページだけを書き込む）
+4. 本物のページのように毎回トークンが変わる再クロール（304 にならないが、リポジトリが同じなら書き込まない）
+5. 途中で止めたクロールと、その続き（記録済みのページは取得しない）
+6. 全ページを書き込む（--full と同じ）クロールを2回（rep の行が重複しない）
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from fetcher import Fetcher  # noqa: E402
+from pipeline import CrawlPipeline, RepositoryStore  # noqa: E402
+from standin import PER_PAGE, StandInServer, load_rows  # noqa: E402
+
+
+class StoppingFetcher(Fetcher):
+    """stop_after ページ取得したら stop() する Fetcher（クロールを途中で止める確認用）"""
+
+    def __init__(self, *args, stop_after=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stop_after = stop_after
+        self.fetched = 0
+
+    def fetch(self, page, headers=None):
+        result = super().fetch(page, headers)
+        with self._sessions_lock:
+            self.fetched += 1
+            if self.stop_after is not None and self.fetched >= self.stop_after:
+                self.stop()
+        return result
+
+
+def crawl(server, path, rate, incremental=True, stop_after=None):
+    store = RepositoryStore(path)
+    try:
+        with StoppingFetcher(base_url=server.base_url, max_workers=4, rate=rate, stop_after=stop_after) as fetcher:
+            requests = server.requests
+            start = time.perf_counter()
+            report = CrawlPipeline(fetcher, store, incremental=incremental).run()
+            elapsed = time.perf_counter() - start
+        rows = store.conn.execute("SELECT COUNT(*) FROM rep").fetchone()[0]
+        finished = store.conn.execute("SELECT COUNT(*) FROM crawl_runs WHERE finished_at IS NOT NULL").fetchone()[0]
+    finally:
+        store.close()
+    return report, server.requests - requests, rows, finished, elapsed
+
+
+def show(label, result):
+    report, requests, rows, finished, elapsed = result
+    print(
+        f"{label:<28}{requests:>8}{report.not_modified:>6}{report.skipped_pages:>6}{report.parsed_pages:>8}"
+        f"{report.changed_pages:>6}{report.repositories:>8}{rows:>8}{finished:>6}{elapsed:>8.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=200.0)
+    parser.add_argument("--change", type=int, nargs="+", default=[5, 40, 90], help="リポジトリを変えるページ")
+    parser.add_argument("--stop-after", type=int, default=40, help="5. で止めるまでに取得するページ数")
+    args = parser.parse_args()
+
+    rows = load_rows()
+    print(f"{len(rows)}件、{-(-len(rows) // PER_PAGE)}ページ")
+    print(f"{'':<28}{'要求':>6}{'304':>6}{'飛ばし':>4}{'パース':>5}{'変更':>4}{'書込':>6}{'rep行':>5}{'完了':>4}{'時間':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "repository.db")
+        with StandInServer(rows) as server:
+            show("1. 初めて", crawl(server, path, args.rate))
+            show("2. 変わっていない", crawl(server, path, args.rate))
+            changed = list(rows)
+            for page in args.change:
+                name, language, star = changed[(page - 1) * PER_PAGE]
+                changed[(page - 1) * PER_PAGE] = (name, language, str(int(star) + 1) if star.isdigit() else "1")
+            server.update(changed)
+            show(f"3. {len(args.change)}ページを変えた", crawl(server, path, args.rate))
+        with StandInServer(changed, nonce=True) as server:
+            show("4. 毎回トークンが変わる", crawl(server, path, args.rate))
+
+        path = os.path.join(tmp, "resume.db")
+        with StandInServer(rows) as server:
+            show(f"5. {args.stop_after}ページで止めた", crawl(server, path, args.rate, stop_after=args.stop_after))
+            show("   その続き", crawl(server, path, args.rate))
+
+        path = os.path.join(tmp, "full.db")
+        with StandInServer(rows) as server:
+            show("6. 全ページ（1回目）", crawl(server, path, args.rate, incremental=False))
+            show("   全ページ（2回目）", crawl(server, path, args.rate, incremental=False))
+
+
+if __name__ == "__main__":
+    main()
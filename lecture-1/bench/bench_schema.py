@@ -0,0 +1,110 @@
+"""repository.db の v1（rep テーブル）と v2（repo_db.py）の検索を比べるベンチマーク
+
+repository.db のリポジトリを scale 倍に増やして v1 のデータベース（一時ファイル）を作り、
+そのコピーを repo_db.migrate で v2 に移し替えてから、同じ検索の時間・結果・EXPLAIN QUERY PLAN を表示する:
+
+    python bench/bench_schema.py --scale 50
+
+v1 はスター数に "2.2k" のような文字列が混ざっているので、ORDER BY star や範囲の条件の結果が正しくない
+（SQLite では文字列が全ての整数より大きい）。正しいかどうかは parse_stars で数えた結果と比べる。
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import repo_db  # noqa: E402
+from repo_parser import parse_stars  # noqa: E402
+from standin import load_rows  # noqa: E402
+
+# (名前, v1 の SQL, v2 の SQL, パラメーター（v1 用, v2 用）)
+QUERIES = (
+    ("上位10件", "SELECT name, language, star FROM rep ORDER BY star DESC, name LIMIT 10",
+     repo_db.TOP_SQL, ((), ("google", 10))),
+    ("言語ごとの上位10件", "SELECT name, language, star FROM rep WHERE language = ? ORDER BY star DESC, name LIMIT 10",
+     repo_db.TOP_BY_LANGUAGE_SQL, (("Python",), ("google", "Python", 10))),
+    ("スター数 1000〜5000", "SELECT name, language, star FROM rep WHERE star BETWEEN ? AND ? ORDER BY star DESC, name",
+     repo_db.RANGE_SQL, ((1000, 5000), ("google", 1000, 5000))),
+    ("言語ごとの件数", "SELECT language, COUNT(*) FROM rep GROUP BY language ORDER BY 2 DESC, language",
+     repo_db.LANGUAGE_COUNTS_SQL, ((), ("google",))),
+)
+
+
+def expected(rows):
+    """parse_stars で数えた正しい結果（QUERIES と同じ順）"""
+    ranked = sorted(((name, language, parse_stars(star)) for name, language, star in rows), key=lambda r: (-r[2], r[0]))
+    counts = {}
+    for _, language, _ in ranked:
+        counts[language] = counts.get(language, 0) + 1
+    return [
+        ranked[:10],
+        [r for r in ranked if r[1] == "Python"][:10],
+        [r for r in ranked if 1000 <= r[2] <= 5000],
+        sorted(counts.items(), key=lambda c: (-c[1], c[0])),
+    ]
+
+
+def measure(conn, sql, params, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    base = load_rows()
+    # 増やしたリポジトリは名前を変え、スター数はページの表示のまま（v1 と同じく "2.2k" は文字列）
+    rows = [
+        (f"{name}-{i}" if i else name, language, int(star) if star.isdigit() else star)
+        for i in range(args.scale) for name, language, star in base
+    ]
+    answers = expected(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        v1_path, v2_path = os.path.join(tmp, "v1.db"), os.path.join(tmp, "v2.db")
+        conn = sqlite3.connect(v1_path)
+        conn.execute("CREATE TABLE rep (name TEXT, language TEXT, star INT)")
+        conn.executemany("INSERT INTO rep (name, language, star) VALUES (?, ?, ?)", rows)
+        conn.commit()
+        conn.close()
+        shutil.copy(v1_path, v2_path)
+
+        v1 = sqlite3.connect(v1_path)
+        v2 = sqlite3.connect(v2_path)
+        start = time.perf_counter()
+        count = repo_db.migrate(v2)
+        print(f"{len(rows)}件（{args.scale}倍）、v2 への移し替え {count}件 {time.perf_counter() - start:.2f}秒")
+        print(f"  ファイルの大きさ: v1 {os.path.getsize(v1_path) / 2**20:.1f}MB、v2 {os.path.getsize(v2_path) / 2**20:.1f}MB")
+
+        for (label, v1_sql, v2_sql, (v1_params, v2_params)), answer in zip(QUERIES, answers):
+            old, old_time = measure(v1, v1_sql, v1_params, args.repeat)
+            new, new_time = measure(v2, v2_sql, v2_params, args.repeat)
+            old_ok = [tuple(r) for r in old] == [tuple(r) for r in answer]
+            new_ok = [tuple(r) for r in new] == [tuple(r) for r in answer]
+            print(f"\n{label}（正しい結果 {len(answer)}件）")
+            print(f"  v1 {old_time * 1000:8.2f}ms {len(old):>7}件 {'正しい' if old_ok else '正しくない'}")
+            for detail in repo_db.query_plan(v1, v1_sql, v1_params):
+                print(f"       {detail}")
+            print(f"  v2 {new_time * 1000:8.2f}ms {len(new):>7}件 {'正しい' if new_ok else '正しくない'}")
+            for detail in repo_db.query_plan(v2, v2_sql, v2_params):
+                print(f"       {detail}")
+            if not old_ok and old:
+                print(f"  v1 の1件目: {tuple(old[0])}（正しくは {tuple(answer[0]) if answer else 'なし'}）")
+        v1.close()
+        v2.close()
+
+
+if __name__ == "__main__":
+    main()
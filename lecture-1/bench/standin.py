@@ -0,0 +1,256 @@
+"""GitHub のリポジトリ一覧ページの代わりをするローカルの HTTP サーバー
+
+repository.db に保存したリポジトリ（gitrep.ipynb で取得したもの）から、GitHub と同じ
+クラス名・属性の HTML を1ページ30件ずつ作って返す。GitHub にアクセスせずに
+fetcher.py などを試したり、ベンチマークしたりするためのもの。
+
+- latency 秒だけ遅らせて返す
+- fail_rate の割合で 503（Retry-After 付き）を返す
+- rate 回/秒 を超えるリクエストには 429 を返す（レート制限の確認用）
+- ETag を付け、If-None-Match が同じなら 304 を返す。nonce=True なら本物のページのように
+  リクエストごとに変わるトークンを入れる（本文も ETag も毎回変わり、304 にならない）
+- update(rows) でリポジトリを入れ替えられる（再クロールで変わったページだけを拾うかの確認用）
+
+    python bench/standin.py --port 8000 --latency 0.3
+    # http://127.0.0.1:8000/orgs/google/repositories?page=2&tab=repositories
+"""
+import argparse
+import hashlib
+import html
+import os
+import random
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(HERE, "..", "repository.db")
+PER_PAGE = 30
+
+
+def format_stars(stars):
+    """スター数を GitHub の表示にする（2200 -> "2.2k"、38000 -> "38k"、文字列はそのまま）"""
+    if isinstance(stars, str) or stars < 1000:
+        return str(stars)
+    return f"{stars / 1000:.1f}".rstrip("0").rstrip(".") + "k"
+
+
+def load_rows(path=DEFAULT_DB):
+    """repository.db の (名前, 言語, スター数の表示) を保存した順に読む
+
+    v1 は rep テーブル、v2（repo_db.py）は同じ列の rep ビューから読む（ビューは保存した順に並ぶ）。
+    """
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT name, language, star FROM rep").fetchall()
+        return [(name, language, format_stars(star)) for name, language, star in rows]
+    finally:
+        conn.close()
+
+
+# ページの前後に付ける、GitHub のページにあるようなナビゲーション・スクリプト（パーサーの負荷を本物に近づける）
+_NAV = "\n".join(
+    f'<li class="HeaderMenu-item"><a class="HeaderMenu-link" href="/features/{i}">Feature {i}</a></li>'
+    for i in range(60)
+)
+_FOOTER = "\n".join(
+    f'<li class="mr-3"><a href="/site/{i}" class="Link--secondary">Footer link {i}</a></li>' for i in range(40)
+)
+_SCRIPT = "".join(
+    f'window.__chunk_{i} = function(e){{return e.map(function(x){{return x*{i}}})}};\n' for i in range(1500)
+)
+
+
+def _item(org, name, language, star):
+    quoted = html.escape(name)
+    if language and language != "不明":
+        lang = (
+            '<li class="ReposListItem-module__metadataItem--1bLvU">'
+            '<div class="LanguageCircle-module__circle--kRJjV"></div>'
+            f'<span class="ReposListItem-module__Text_4--mkG7R" itemprop="programmingLanguage">{html.escape(language)}</span></li>'
+        )
+    else:
+        lang = ""
+    return f"""<li class="ListItem-module__listItem--k4eMk" data-testid="list-view-item">
+<div class="ListItem-module__container--nT7Pa">
+<div class="ListItem-module__mainContent--VJY1F">
+<h4 class="Title-module__heading--s7YnL"><a class="Title-module__anchor--GmXUE" href="/{org}/{quoted}" data-testid="listitem-title-link">{quoted}</a></h4>
+<div class="Description-module__container--Rk8vc"><p class="Text-module__text--4uZqh">{quoted} is a repository of {org}.</p></div>
+<ul class="ReposListItem-module__metadata--BFGpx">{lang}
+<li class="ReposListItem-module__metadataItem--1bLvU"><a href="/{org}/{quoted}/stargazers" aria-label="{star} stars" class="Link-module__link--5lL8L"><svg aria-hidden="true" height="16" viewBox="0 0 16 16" class="octicon octicon-star"><path d="M8 .25a.75.75 0 0 1 .673.418l1.882 3.815"></path></svg><span>{star}</span></a></li>
+<li class="ReposListItem-module__metadataItem--1bLvU"><a href="/{org}/{quoted}/forks" aria-label="forks"><svg class="octicon octicon-repo-forked"></svg><span>12</span></a></li>
+<li class="ReposListItem-module__metadataItem--1bLvU"><span>Updated <relative-time datetime="2025-12-01T00:00:00Z">Dec 1, 2025</relative-time></span></li>
+</ul></div></div></li>"""
+
+
+def render_page(rows, page, org="google", per_page=PER_PAGE):
+    """page ページ目（1から）のリポジトリ一覧の HTML（範囲外のページはリポジトリの無いページ）"""
+    items = rows[(page - 1) * per_page:page * per_page]
+    last_page = max(1, -(-len(rows) // per_page))
+    body = "\n".join(_item(org, *row) for row in items)
+    return f"""<!DOCTYPE html>
+<html lang="en" data-color-mode="auto"><head><meta charset="utf-8">
+<title>{org} repositories</title>
+<script type="text/javascript">{_SCRIPT}</script>
+</head><body>
+<header class="HeaderMktg"><nav><ul class="HeaderMenu-list">{_NAV}</ul></nav></header>
+<main><div data-target="react-app.reactRoot">
+<ul class="ListView-module__ul--vMLEZ" data-testid="list-view-items">
+{body}
+</ul>
+<nav class="Pagination-module__nav--Zc2gr" aria-label="Pagination" data-total-pages="{last_page}">
+<a href="/orgs/{org}/repositories?page={min(page + 1, last_page)}" rel="next">Next</a></nav>
+</div></main>
+<footer><ul class="list-style-none d-flex">{_FOOTER}</ul></footer>
+</body></html>""".encode("utf-8")
+
+
+class StandInServer:
+    """リポジトリ一覧ページを返すローカルの HTTP サーバー（別スレッドで動く）
+
+    with StandInServer(rows) as server:
+        Fetcher("google", base_url=server.base_url)
+    """
+
+    def __init__(self, rows, org="google", port=0, latency=0.0, fail_rate=0.0, rate=None, nonce=False, seed=0):
+        self.rows = rows
+        self.org = org
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rate = rate
+        self.nonce = nonce
+        self.not_modified = 0  # 304 を返した数
+        self.requests = 0  # 受け取ったリクエスト数
+        self.rejected = 0  # 429 / 503 を返した数
+        self.max_active = 0  # 同時に処理していたリクエスト数の最大
+        self._active = 0
+        self._times = []
+        self._pages = {}  # ページ番号 -> HTML（一度作ったら使い回す）
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/orgs/{{org}}/repositories"
+
+    def page(self, number):
+        with self._lock:
+            body = self._pages.get(number)
+            if body is None:
+                body = self._pages[number] = render_page(self.rows, number, self.org)
+            return body
+
+    def update(self, rows):
+        """リポジトリを入れ替える（作ったページは捨てる）"""
+        with self._lock:
+            self.rows = rows
+            self._pages.clear()
+
+    def _admit(self):
+        # 429 / 503 にするかどうか（None なら普通に返す）
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if self.rate is not None:
+                # 直近1秒のリクエスト数がレートを超えたら 429（少しの揺らぎは許す）
+                self._times = [t for t in self._times if now - t < 1.0]
+                if len(self._times) >= max(1, self.rate * 1.2):
+                    self.rejected += 1
+                    return 429
+                self._times.append(now)
+            if self._random.random() < self.fail_rate:
+                self.rejected += 1
+                return 503
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+            return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != f"/orgs/{server.org}/repositories":
+                    self._send(404, b"not found")
+                    return
+                status = server._admit()
+                if status is not None:
+                    self._send(status, b"busy", {"Retry-After": "0.2"})
+                    return
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    number = int(parse_qs(url.query).get("page", ["1"])[0])
+                    body = server.page(number)
+                    if server.nonce:
+                        token = "%016x" % server._random.getrandbits(64)
+                        body = body.replace(b"</head>", f'<meta name="csrf-token" content="{token}"></head>'.encode(), 1)
+                    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        with server._lock:
+                            server.not_modified += 1
+                        self._send(304, b"", {"ETag": etag})
+                    else:
+                        self._send(200, body, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+                finally:
+                    with server._lock:
+                        server._active -= 1
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # アクセスログは出さない
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub のリポジトリ一覧ページの代わりをするサーバー")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=None)
+    args = parser.parse_args()
+    server = StandInServer(
+        load_rows(args.db), port=args.port, latency=args.latency, fail_rate=args.fail_rate, rate=args.rate
+    )
+    print(f"{server.base_url.format(org=server.org)} （Ctrl+C で終了）")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""クロールの進み具合と、ページごとの内容の記録（途中からの再開と、変わったページだけの更新）
+
+repository.db に2つのテーブルを作る:
+
+- crawl_runs: 1回のクロール（組織・始めた時刻・終わった時刻・最後まで続けて終わったページ）
+- crawl_pages: ページごとの最新の記録（ETag・本文のハッシュ・リポジトリのハッシュ・件数）
+
+終わっていないクロール（finished_at が NULL）があれば、次の実行はその続きから始め、
+そのクロールで記録済みのページは取得しない。
+終わったクロールの後の実行は全ページを確かめるが、
+- ETag が同じなら 304 が返り、本文を受け取らない
+- 本文のハッシュが同じならパースしない
+- リポジトリ（名前・言語・スター数）のハッシュが同じなら書き込まない
+ので、変わったページだけがパースと書き込みの手間になる。
+
+ページの記録はそのページのリポジトリと同じトランザクションで書くので、
+途中で止まっても「記録済みのページのリポジトリは保存済み」が必ず成り立つ。
+"""
+import hashlib
+import time
+
+
+def body_hash(body):
+    """ページの本文のハッシュ"""
+    return hashlib.sha1(body).hexdigest()
+
+
+def records_hash(repositories):
+    """ページのリポジトリ（名前・言語・スター数）のハッシュ（HTML の細かい違いは無視する）"""
+    digest = hashlib.sha1()
+    for r in repositories:
+        digest.update(f"{r.name}\t{r.language or ''}\t{r.stars}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PageState:
+    """1ページの記録"""
+
+    __slots__ = ("page", "etag", "body_hash", "records_hash", "repo_count", "changed")
+
+    def __init__(self, page, etag, body_hash, records_hash, repo_count, changed=False):
+        self.page = page
+        self.etag = etag
+        self.body_hash = body_hash
+        self.records_hash = records_hash
+        self.repo_count = repo_count  # 0 ならリポジトリの無いページ（最後のページより後）
+        self.changed = changed  # 前回の記録から変わったか（保存はしない。集計用）
+
+    def __repr__(self):
+        return f"PageState(page={self.page}, {self.repo_count}件, changed={self.changed})"
+
+
+class CrawlState:
+    """1つの組織のクロールの記録
+
+    conn: repository.db の接続（RepositoryStore と同じ接続を使い、同じトランザクションで書く）
+    """
+
+    def __init__(self, conn, org="google"):
+        self.conn = conn
+        self.org = org
+        self.run_id = None
+        self.resumed = False  # 終わっていないクロールの続きか
+        self._done = set()  # このクロールで記録済みのページ
+        self._frontier = 0  # 1ページ目から続けて記録済みの最後のページ
+        with conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_runs (
+                    id INTEGER PRIMARY KEY,
+                    org TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    last_completed_page INTEGER NOT NULL DEFAULT 0,
+                    last_page INTEGER
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_pages (
+                    org TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    run_id INTEGER NOT NULL,
+                    etag TEXT,
+                    body_hash TEXT NOT NULL,
+                    records_hash TEXT NOT NULL,
+                    repo_count INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    changed_at REAL NOT NULL,
+                    PRIMARY KEY (org, page)
+                )"""
+            )
+
+    def begin(self):
+        """クロールを始める（終わっていないクロールがあればその続き）。run の番号を返す"""
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT id FROM crawl_runs WHERE org = ? AND finished_at IS NULL ORDER BY id DESC LIMIT 1",
+                (self.org,),
+            ).fetchone()
+            if row is not None:
+                self.run_id, self.resumed = row[0], True
+            else:
+                cur = self.conn.execute(
+                    "INSERT INTO crawl_runs (org, started_at) VALUES (?, ?)", (self.org, time.time())
+                )
+                self.run_id, self.resumed = cur.lastrowid, False
+        self._done = set(self.completed_pages())
+        self._frontier = 0
+        while self._frontier + 1 in self._done:
+            self._frontier += 1
+        return self.run_id
+
+    def completed_pages(self):
+        """このクロールで記録済みのページ -> 件数（続きから始めるときに取得しないページ）"""
+        rows = self.conn.execute(
+            "SELECT page, repo_count FROM crawl_pages WHERE org = ? AND run_id = ?", (self.org, self.run_id)
+        )
+        return dict(rows.fetchall())
+
+    def previous(self):
+        """ページ -> 前回までの記録（PageState）"""
+        rows = self.conn.execute(
+            "SELECT page, etag, body_hash, records_hash, repo_count FROM crawl_pages WHERE org = ?", (self.org,)
+        )
+        return {row[0]: PageState(*row) for row in rows}
+
+    def mark(self, pages):
+        """ページの記録を書く（コミットは呼び出す側のトランザクションで行う）"""
+        now = time.time()
+        self.conn.executemany(
+            """INSERT INTO crawl_pages
+                   (org, page, run_id, etag, body_hash, records_hash, repo_count, fetched_at, changed_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (org, page) DO UPDATE SET
+                   run_id = excluded.run_id, etag = excluded.etag, body_hash = excluded.body_hash,
+                   records_hash = excluded.records_hash, repo_count = excluded.repo_count,
+                   fetched_at = excluded.fetched_at,
+                   changed_at = CASE WHEN crawl_pages.records_hash = excluded.records_hash
+                                     THEN crawl_pages.changed_at ELSE excluded.changed_at END""",
+            [
+                (self.org, p.page, self.run_id, p.etag, p.body_hash, p.records_hash, p.repo_count, now, now)
+                for p in pages
+            ],
+        )
+        # 1ページ目から続けて記録済みのページ（取得は順番通りに終わらないので、途切れる手前まで）
+        self._done.update(p.page for p in pages)
+        while self._frontier + 1 in self._done:
+            self._frontier += 1
+        self.conn.execute(
+            "UPDATE crawl_runs SET last_completed_page = ? WHERE id = ?", (self._frontier, self.run_id)
+        )
+
+    def last_completed_page(self):
+        """1ページ目から続けて記録済みの最後のページ"""
+        return self._frontier
+
+    def finish(self, last_page=None):
+        """クロールを終わりにする（次の実行は新しいクロールになる）"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE crawl_runs SET finished_at = ?, last_page = ? WHERE id = ?",
+                (time.time(), last_page, self.run_id),
+            )
@@ -0,0 +1,259 @@
+"""GitHub の組織のリポジトリ一覧ページをまとめて取得するモジュール
+
+gitrep.ipynb のクローラーは1ページずつ取得して毎回 time.sleep(2) していたので、
+94ページで 94 ×（通信時間 + 2秒）かかり、503 以外のエラーで全体が止まっていた。
+ここでは
+
+- 同時に max_workers ページまで取得する（ThreadPoolExecutor）
+- リクエストのペースはトークンバケットで rate 回/秒 までに抑える（サーバーに負荷をかけない）
+- 429 / 5xx / 接続エラーはページごとに指数バックオフ＋ジッターでリトライする
+  （Retry-After ヘッダーがあればそれに従う）。リトライし尽くしても他のページは続ける
+- 取得できた順に結果を返す（ページ順とは限らない）。先に取りに行くのは数ページまでなので、
+  受け取る側が遅ければ取得も待つ（結果がメモリに溜まらない）
+
+ので、全体の時間はほぼ「ページ数 / rate」になる。
+
+    from fetcher import Fetcher
+    with Fetcher("google", rate=0.5) as fetcher:
+        for result in fetcher.fetch_pages(range(1, 95)):
+            print(result.page, result.status)
+"""
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://github.com/orgs/{org}/repositories"
+
+# ブラウザと同じようなヘッダー（gitrep.ipynb と同じ）
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Cache-Control': 'max-age=0',
+}
+
+# リトライするステータスコード（混雑・一時的なエラー）
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def page_url(org="google", page=1, base_url=BASE_URL):
+    """リポジトリ一覧の page ページ目の URL（gitrep.ipynb と同じ形）"""
+    url = base_url.format(org=org)
+    if page == 1:
+        return f"{url}?tab=repositories"
+    return f"{url}?page={page}&tab=repositories"
+
+
+class RateLimiter:
+    """トークンバケット方式のレート制限
+
+    rate 回/秒 のペースでトークンが貯まり、最大 burst 個まで貯められる。
+    acquire() はトークンが1つ取れるまで待つ。
+
+    weather/src/prefetch.py の RateLimiter の写し。lecture-1 と weather は別々に実行する
+    フォルダで、共通のパッケージが無いので import できない。直すときは両方を直すこと。
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class PageResult:
+    """1ページ分の取得結果"""
+
+    __slots__ = ("page", "url", "status", "body", "headers", "error", "attempts", "elapsed")
+
+    def __init__(self, page, url, status=None, body=None, headers=None, error=None, attempts=0, elapsed=0.0):
+        self.page = page
+        self.url = url
+        self.status = status  # 最後のレスポンスのステータスコード（接続できなければ None）
+        self.body = body  # 本文（bytes。取得できなければ None）
+        self.headers = headers or {}  # レスポンスヘッダー（ETag などを後で使う）
+        self.error = error  # 取得できなかった理由
+        self.attempts = attempts  # リクエストを送った回数（リトライを含む）
+        self.elapsed = elapsed  # リトライの待ち時間も含めた時間（秒）
+
+    @property
+    def ok(self):
+        return self.status == 200 and self.body is not None
+
+    def __repr__(self):
+        state = f"{self.status}" if self.error is None else f"{self.status} {self.error}"
+        return f"PageResult(page={self.page}, {state}, attempts={self.attempts}, {self.elapsed:.2f}s)"
+
+
+def _retry_after(res):
+    # Retry-After（秒数）があればその秒数、無ければ None
+    value = res.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None  # 日付の形式は使わない（バックオフで待つ）
+
+
+class Fetcher:
+    """リポジトリ一覧のページを並行・レート制限付きで取得する
+
+    org: 組織名
+    base_url: 一覧ページの URL（{org} を組織名に置き換える。テストではローカルのサーバーを指定する）
+    max_workers: 同時に取得するページ数
+    rate, burst: 1秒あたりのリクエスト数と、まとめて送ってよい数（トークンバケット）
+    retries: 1ページあたりのリトライ回数
+    backoff, max_backoff: リトライの待ち時間（backoff × 2^回数 秒まで。0〜その値のランダム）
+    """
+
+    def __init__(
+        self,
+        org="google",
+        base_url=BASE_URL,
+        max_workers=4,
+        rate=0.5,
+        burst=1,
+        retries=4,
+        backoff=1.0,
+        max_backoff=30.0,
+        timeout=(3.05, 15),
+        headers=None,
+    ):
+        self.org = org
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self._local = threading.local()  # requests.Session はスレッドごとに1つ使う
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)  # リトライは自分で行う
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _delay(self, attempt):
+        # 指数バックオフ＋フルジッター（同時に失敗したページが一斉にリトライしないように）
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def fetch(self, page, headers=None):
+        """1ページ取得する（失敗しても例外にせず、PageResult の error に理由を入れる）
+
+        headers: このリクエストだけに付けるヘッダー（If-None-Match など）
+        """
+        url = page_url(self.org, page, self.base_url)
+        result = PageResult(page, url)
+        start = time.monotonic()
+        session = self._session()
+        for attempt in range(self.retries + 1):
+            if self._stop.is_set():
+                result.error = "中止"
+                break
+            self.limiter.acquire()
+            result.attempts += 1
+            retry_after = None
+            try:
+                res = session.get(url, headers=headers, timeout=self.timeout)
+                body = res.content
+            except (requests.ConnectionError, requests.Timeout) as e:
+                result.status, result.error = None, f"接続エラー: {e.__class__.__name__}"
+            else:
+                result.status, result.headers = res.status_code, res.headers
+                if res.status_code in (200, 304):
+                    result.body, result.error = body, None
+                    break
+                result.error = f"HTTP {res.status_code}"
+                if res.status_code not in RETRY_STATUSES:
+                    break  # 404 などはリトライしても変わらない
+                retry_after = _retry_after(res)
+            if attempt < self.retries:
+                time.sleep(
+                    min(retry_after, self.max_backoff) if retry_after is not None else self._delay(attempt)
+                )
+        result.elapsed = time.monotonic() - start
+        return result
+
+    def fetch_pages(self, pages, window=None, headers=None):
+        """pages の全てのページを並行して取得し、取得できた順に PageResult を返す（ジェネレーター）
+
+        同時に取得中・取得済みで受け取られていないページは window（既定 max_workers の2倍）まで。
+        受け取る側が遅ければ次のページを取りに行かないので、結果がメモリに溜まらない。
+        pages は必要になった分だけ読むので、終わりの分からない itertools.count(1) なども渡せる。
+        headers: ページ番号 -> そのページだけに付けるヘッダー（If-None-Match など。None なら付けない）
+        """
+        window = window or self.max_workers * 2
+        pages = iter(pages)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch") as pool:
+            running = set()
+            try:
+                while True:
+                    while len(running) < window and not self._stop.is_set():
+                        page = next(pages, None)
+                        if page is None:
+                            break
+                        running.add(pool.submit(self.fetch, page, headers(page) if headers else None))
+                    if not running:
+                        return
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                # 途中でやめたときは、まだ始まっていないページを取り消す
+                for future in running:
+                    future.cancel()
+
+    def stop(self):
+        """実行中の fetch_pages を止める（送信中のリクエストは終わるまで待つ）"""
+        self._stop.set()
+
+    @property
+    def stopped(self):
+        """stop() で止めたか（途中までしか取得していない）"""
+        return self._stop.is_set()
+
+    def close(self):
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,291 @@
+"""リポジトリ一覧の取得 → パース → 保存を同時に流すパイプライン
+
+gitrep.ipynb は全ページの結果を repositories リストに溜めてから、別のセルで
+repository.db に書き込んでいた。途中で止まると何も残らず、メモリも組織の大きさに比例して増える。
+ここでは3つの段階を同時に動かし、間を長さの決まったキュー（queue.Queue(maxsize)）でつなぐ:
+
+    取得（fetcher.Fetcher のスレッド） → pages キュー → パース（1スレッド）
+        → records キュー → 保存（1スレッド。batch_size 件ずつ executemany してコミット）
+
+後ろの段階が遅ければキューが一杯になって前の段階が待つ（back-pressure）ので、
+メモリに載るのはキューの長さ分のページとレコードだけになる。
+保存はページが届くたびに進むので、途中で止まってもそれまでの分は repository.db に残る。
+
+ページごとの ETag・ハッシュと、クロールの進み具合は crawl_state.CrawlState に記録する。
+途中で止まったクロールは次の実行で続きから始まり、終わったクロールの後は
+変わったページだけをパースして書き込む（--full で全ページ）。
+
+    python pipeline.py --org google --db repository.db
+    python pipeline.py --base-url http://127.0.0.1:8000/orgs/{org}/repositories   # bench/standin.py
+"""
+import argparse
+import itertools
+import queue
+import threading
+import time
+
+from crawl_state import CrawlState, PageState, body_hash, records_hash
+from fetcher import BASE_URL, Fetcher
+from repo_db import connect, write_repositories
+from repo_parser import RepoListParser
+
+_DONE = object()  # キューの終わりの印
+
+
+class CrawlReport:
+    """1回のクロールの結果"""
+
+    def __init__(self):
+        self.pages = 0  # 取得できたページ数（304 を含む）
+        self.failed_pages = []  # 取得できなかった (ページ, 理由)
+        self.empty_pages = 0  # リポジトリが無かったページ数（最後のページより後など）
+        self.skipped_pages = 0  # 続きから始めたので取得しなかったページ数
+        self.not_modified = 0  # 304（前回から変わっていない）で本文を受け取らなかったページ数
+        self.unchanged_pages = 0  # 前回の記録と同じで書き込まなかったページ数（304 を含む）
+        self.changed_pages = 0  # 新しいか変わっていて書き込んだページ数
+        self.parsed_pages = 0  # パースしたページ数（本文が前回と同じページはパースしない）
+        self.repositories = 0  # 保存したリポジトリ数
+        self.batches = 0  # 保存した回数（コミットの回数）
+        self.max_pending_pages = 0  # pages キューの最大の長さ
+        self.max_pending_records = 0  # records キューの最大の長さ
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return (
+            f"CrawlReport(pages={self.pages}, failed={len(self.failed_pages)}, skipped={self.skipped_pages}, "
+            f"changed={self.changed_pages}, unchanged={self.unchanged_pages}, "
+            f"repositories={self.repositories}, batches={self.batches}, {self.elapsed:.1f}s)"
+        )
+
+
+class RepositoryStore:
+    """リポジトリを repository.db（repo_db の v2 スキーマ。v1 なら移し替える）に書き込む
+
+    リポジトリは (組織, 名前) ごとに1行（同じ名前は言語・スター数を更新する）なので、何度クロールしても行が増えない。
+    state: この組織のクロールの記録（crawl_state.CrawlState。同じ接続・同じトランザクションで書く）
+    """
+
+    def __init__(self, path, org="google"):
+        self.path = path
+        self.org = org
+        self.conn = connect(path, org)
+        self.state = CrawlState(self.conn, org)
+
+    def write(self, repositories, pages=()):
+        """Repository のリストと、ページの記録（PageState）を1つのトランザクションで書き込む"""
+        with self.conn:
+            write_repositories(self.conn, self.org, repositories)
+            if pages:
+                self.state.mark(pages)
+
+    def close(self):
+        self.conn.close()
+
+
+class CrawlPipeline:
+    """1つの組織のリポジトリ一覧を取得・パース・保存する
+
+    fetcher: fetcher.Fetcher（同時に取得するページ数とレートはこちらで決める）
+    store: write(repositories, pages) と state を持つ保存先（RepositoryStore）
+    incremental: store.state の記録を使い、終わっていないクロールは続きから、
+        終わったクロールの後は変わったページだけをパース・保存する（False なら全ページ）
+    max_pending: 各キューに溜めてよいページ数
+    batch_size, flush_interval: この件数が溜まるか、この秒数が経ったら保存する
+    """
+
+    def __init__(self, fetcher, store, incremental=True, max_pending=4, batch_size=500, flush_interval=1.0):
+        self.fetcher = fetcher
+        self.store = store
+        self.state = store.state if incremental else None
+        self.parser = RepoListParser(fetcher.org)
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.report = None
+        self._last_page = None  # リポジトリの無いページが見つかったら、その番号（それより後は取得しない）
+        self._completed = {}  # 続きから始めたとき、記録済みのページ -> 件数
+        self._previous = {}  # ページ -> 前回までの記録（PageState）
+        self._error = None
+
+    def _page_numbers(self, max_pages):
+        # 取得するページ番号（max_pages が無ければ、リポジトリの無いページが見つかるまで）
+        pages = range(1, max_pages + 1) if max_pages else itertools.count(1)
+        for page in pages:
+            if self._error is not None or (self._last_page is not None and page >= self._last_page):
+                return
+            if page in self._completed:
+                self.report.skipped_pages += 1
+                continue
+            yield page
+
+    def _headers(self, page):
+        # 前回の ETag があれば If-None-Match を付ける（変わっていなければ 304 で本文が来ない）
+        previous = self._previous.get(page)
+        if previous is not None and previous.etag:
+            return {"If-None-Match": previous.etag}
+        return None
+
+    def _end_at(self, page):
+        # page 以降は取得しない（リポジトリの無いページ・存在しないページが見つかった）
+        if self._last_page is None or page < self._last_page:
+            self._last_page = page
+
+    def _page_state(self, result):
+        # 取得結果を前回の記録と比べて (PageState, 書き込むリポジトリ) を返す
+        previous = self._previous.get(result.page)
+        etag = result.headers.get("ETag")
+        if result.status == 304 and previous is not None:
+            self.report.not_modified += 1
+            return PageState(result.page, etag or previous.etag, previous.body_hash,
+                             previous.records_hash, previous.repo_count), []
+        digest = body_hash(result.body)
+        if previous is not None and previous.body_hash == digest:
+            return PageState(result.page, etag, digest, previous.records_hash, previous.repo_count), []
+        repositories = self.parser.parse(result.body)
+        self.report.parsed_pages += 1
+        records = records_hash(repositories)
+        changed = previous is None or previous.records_hash != records
+        page_state = PageState(result.page, etag, digest, records, len(repositories), changed)
+        return page_state, repositories if changed else []
+
+    def _parse(self, pages, records):
+        report = self.report
+        while True:
+            result = pages.get()
+            if result is _DONE:
+                break
+            if self._last_page is not None and result.page > self._last_page:
+                continue  # 最後のページより後（先に取りに行っていたページ）
+            try:
+                if self.state is None:
+                    repositories = self.parser.parse(result.body)
+                    report.parsed_pages += 1
+                    page_state, count = None, len(repositories)
+                else:
+                    page_state, repositories = self._page_state(result)
+                    count = page_state.repo_count
+            except Exception as e:  # パースできないページがあっても、他のページは続ける
+                report.failed_pages.append((result.page, f"パースエラー: {e}"))
+                continue
+            if not count:
+                report.empty_pages += 1
+                self._end_at(result.page)
+            if page_state is not None:
+                if page_state.changed:
+                    report.changed_pages += 1
+                else:
+                    report.unchanged_pages += 1
+            elif not count:
+                continue
+            records.put((page_state, repositories))  # 保存が遅ければここで待つ
+            report.max_pending_records = max(report.max_pending_records, records.qsize())
+        records.put(_DONE)
+
+    def _store(self, records):
+        batch, page_states = [], []
+        flushed = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = records.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = None
+                if item is _DONE:
+                    break
+                if item is not None:
+                    page_state, repositories = item
+                    batch.extend(repositories)
+                    if page_state is not None:
+                        page_states.append(page_state)
+                pending = len(batch) + len(page_states)
+                if pending and (pending >= self.batch_size or time.monotonic() - flushed >= self.flush_interval):
+                    self._flush(batch, page_states)
+                    batch, page_states = [], []
+                    flushed = time.monotonic()
+            if batch or page_states:
+                self._flush(batch, page_states)
+        except Exception as e:
+            self._error = e
+            # 取得・パースの段階が records.put で止まったままにならないよう、残りを読み捨てる
+            while records.get() is not _DONE:
+                pass
+
+    def _flush(self, batch, page_states):
+        self.store.write(batch, page_states)
+        self.report.repositories += len(batch)
+        self.report.batches += 1
+
+    def run(self, max_pages=None):
+        """クロールして CrawlReport を返す（保存でエラーになったらその例外を出す）
+
+        incremental のときは、取得できなかったページが無ければクロールを終わりにする。
+        あれば終わりにしないので、次の実行はそのページ（と、まだのページ）だけを取得する。
+        """
+        self.report = report = CrawlReport()
+        start = time.monotonic()
+        if self.state is not None:
+            self.state.begin()
+            self._completed = self.state.completed_pages() if self.state.resumed else {}
+            self._previous = self.state.previous()
+            for page, count in self._completed.items():
+                if not count:
+                    self._end_at(page)
+        pages = queue.Queue(maxsize=self.max_pending)
+        records = queue.Queue(maxsize=self.max_pending)
+        parser = threading.Thread(target=self._parse, args=(pages, records), name="parse")
+        store = threading.Thread(target=self._store, args=(records,), name="store")
+        parser.start()
+        store.start()
+        headers = self._headers if self.state is not None else None
+        try:
+            for result in self.fetcher.fetch_pages(self._page_numbers(max_pages), headers=headers):
+                if not (result.ok or (result.status == 304 and result.page in self._previous)):
+                    if result.status == 404:
+                        self._end_at(result.page)
+                    report.failed_pages.append((result.page, result.error))
+                    continue
+                report.pages += 1
+                pages.put(result)  # パースが遅ければここで待つ（その間は次のページを取りに行かない）
+                report.max_pending_pages = max(report.max_pending_pages, pages.qsize())
+        finally:
+            pages.put(_DONE)
+            parser.join()
+            store.join()
+            report.elapsed = time.monotonic() - start
+        if self._error is not None:
+            raise self._error
+        report.failed_pages.sort()
+        if self.state is not None and not report.failed_pages and not self.fetcher.stopped:
+            self.state.finish(self._last_page)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub の組織のリポジトリ一覧を repository.db に保存する")
+    parser.add_argument("--org", default="google")
+    parser.add_argument("--db", default="repository.db")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--max-pages", type=int, default=None, help="省略するとリポジトリが無くなるまで")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0.5, help="1秒あたりのリクエスト数")
+    parser.add_argument("--full", action="store_true", help="前回の記録を使わず、全ページをパースして保存する")
+    args = parser.parse_args()
+
+    store = RepositoryStore(args.db, args.org)
+    try:
+        with Fetcher(args.org, base_url=args.base_url, max_workers=args.workers, rate=args.rate) as fetcher:
+            report = CrawlPipeline(fetcher, store, incremental=not args.full).run(args.max_pages)
+    finally:
+        store.close()
+    print(f"{report.pages}ページ、{report.repositories}件を保存（{report.batches}回）、{report.elapsed:.1f}秒")
+    if not args.full:
+        print(
+            f"  変わったページ {report.changed_pages}、変わらないページ {report.unchanged_pages}"
+            f"（うち 304 {report.not_modified}）、続きから始めて飛ばしたページ {report.skipped_pages}"
+        )
+    for page, error in report.failed_pages:
+        print(f"  ページ {page} を取得できませんでした: {error}")
+
+
+if __name__ == "__main__":
+    main()
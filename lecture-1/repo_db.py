@@ -0,0 +1,197 @@
+"""repository.db のスキーマ（v2）と、その上の検索
+
+gitrep.ipynb の rep テーブル (name TEXT, language TEXT, star INT) にはキーも索引も無く、
+スター数はページの表示のまま（"2.2k" など）入っていた。SQLite は "2.2k" を TEXT のまま入れるので、
+ORDER BY star や範囲の条件は整数と文字列が混ざって正しく並ばず、索引も使えない。
+
+v2 では
+- languages: 言語の表（id と名前）。リポジトリは言語を id で持つ
+- repositories: (org, name) が主キー。スター数は整数（"2.2k" -> 2200、"1,234" -> 1234）
+- スター数の範囲・上位と、言語ごとの検索のための索引（検索する列を全て含むので、表を読まずに済む）
+- rep: これまでの rep と同じ列のビュー。INSERT すると repositories に入る（スター数も整数にする）
+  ので、gitrep.ipynb のこれまでのセルもそのまま動く
+
+migrate() は v1 の rep テーブルを1つのトランザクションで v2 に移し替える（途中で失敗すれば元のまま）。
+
+    conn = connect("repository.db")            # v1 なら移し替える
+    top_repositories(conn, limit=10)           # [(名前, 言語, スター数), ...]
+    repositories_in_range(conn, 1000, 5000, language="Python")
+
+    python repo_db.py --db repository.db       # 移し替えて、スター数の上位を表示する
+"""
+import argparse
+import sqlite3
+
+from repo_parser import UNKNOWN_LANGUAGE, parse_stars
+
+SCHEMA_VERSION = 2  # PRAGMA user_version に入れる
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS languages (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE IF NOT EXISTS repositories (
+        org TEXT NOT NULL,
+        name TEXT NOT NULL,
+        language_id INTEGER NOT NULL REFERENCES languages (id),
+        stars INTEGER NOT NULL CHECK (typeof(stars) = 'integer'),
+        PRIMARY KEY (org, name)
+    )""",
+    # スター数の多い順・範囲（ORDER BY stars DESC, name と同じ並びなので並べ替えが要らない）
+    "CREATE INDEX IF NOT EXISTS repositories_stars ON repositories (org, stars DESC, name, language_id)",
+    # 言語ごとの件数・上位・範囲
+    "CREATE INDEX IF NOT EXISTS repositories_language ON repositories (org, language_id, stars DESC, name)",
+)
+
+# "2.2k" / "1,234" / 整数を整数にする SQL（rep ビューへの INSERT 用。repo_parser.parse_stars と同じ結果）
+_STARS_SQL = """CASE
+    WHEN typeof(NEW.star) = 'integer' THEN NEW.star
+    WHEN lower(trim(NEW.star)) GLOB '*[0-9]k'
+        THEN CAST(round(CAST(replace(rtrim(lower(trim(NEW.star)), 'k'), ',', '') AS REAL) * 1000) AS INTEGER)
+    WHEN lower(trim(NEW.star)) GLOB '*[0-9]m'
+        THEN CAST(round(CAST(replace(rtrim(lower(trim(NEW.star)), 'm'), ',', '') AS REAL) * 1000000) AS INTEGER)
+    ELSE CAST(replace(NEW.star, ',', '') AS INTEGER)
+END"""
+
+_UPSERT = """INSERT INTO repositories (org, name, language_id, stars)
+    VALUES (?, ?, (SELECT id FROM languages WHERE name = ?), ?)
+    ON CONFLICT (org, name) DO UPDATE SET language_id = excluded.language_id, stars = excluded.stars
+    WHERE language_id IS NOT excluded.language_id OR stars IS NOT excluded.stars"""
+
+_SELECT = "SELECT r.name, l.name, r.stars FROM repositories AS r JOIN languages AS l ON l.id = r.language_id"
+
+# 検索（bench/bench_schema.py で EXPLAIN QUERY PLAN も確かめる）
+TOP_SQL = _SELECT + " WHERE r.org = ? ORDER BY r.stars DESC, r.name LIMIT ?"
+TOP_BY_LANGUAGE_SQL = _SELECT + " WHERE r.org = ? AND l.name = ? ORDER BY r.stars DESC, r.name LIMIT ?"
+RANGE_SQL = _SELECT + " WHERE r.org = ? AND r.stars BETWEEN ? AND ? ORDER BY r.stars DESC, r.name"
+RANGE_BY_LANGUAGE_SQL = (
+    _SELECT + " WHERE r.org = ? AND l.name = ? AND r.stars BETWEEN ? AND ? ORDER BY r.stars DESC, r.name"
+)
+LANGUAGE_COUNTS_SQL = """SELECT l.name, c.count FROM
+    (SELECT language_id, COUNT(*) AS count FROM repositories WHERE org = ? GROUP BY language_id) AS c
+    JOIN languages AS l ON l.id = c.language_id ORDER BY c.count DESC, l.name"""
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _create_view(conn, org):
+    # これまでの rep と同じ列のビュー。INSERT は org の repositories に入れる
+    quoted = org.replace("'", "''")
+    conn.execute(
+        """CREATE VIEW IF NOT EXISTS rep AS
+           SELECT r.name AS name, l.name AS language, r.stars AS star
+           FROM repositories AS r JOIN languages AS l ON l.id = r.language_id ORDER BY r.rowid"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS rep_insert INSTEAD OF INSERT ON rep BEGIN
+            INSERT OR IGNORE INTO languages (name) VALUES (COALESCE(NEW.language, '{UNKNOWN_LANGUAGE}'));
+            INSERT INTO repositories (org, name, language_id, stars) VALUES (
+                '{quoted}', NEW.name,
+                (SELECT id FROM languages WHERE name = COALESCE(NEW.language, '{UNKNOWN_LANGUAGE}')),
+                {_STARS_SQL})
+            ON CONFLICT (org, name) DO UPDATE SET language_id = excluded.language_id, stars = excluded.stars;
+        END"""
+    )
+
+
+def _upsert(conn, org, rows):
+    # rows: (名前, 言語, スター数) のリスト。言語の無いものは UNKNOWN_LANGUAGE にする
+    rows = [(name, language or UNKNOWN_LANGUAGE, stars) for name, language, stars in rows]
+    conn.executemany("INSERT OR IGNORE INTO languages (name) VALUES (?)", [(lang,) for lang in {r[1] for r in rows}])
+    conn.executemany(_UPSERT, [(org, name, language, stars) for name, language, stars in rows])
+
+
+def migrate(conn, org="google"):
+    """データベースを v2 にする（v1 の rep テーブルがあれば org のリポジトリとして移し替える）
+
+    移し替えた件数を返す。既に v2 なら何もしない。
+    スター数は repo_parser.parse_stars で整数にする（数字の無い表示は 0）。
+    同じ名前が何行もあれば、最後に書いた行を残す。
+    """
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for sql in _SCHEMA:
+            conn.execute(sql)
+        count = 0
+        row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'rep'").fetchone()
+        if row is not None and row[0] == "table":
+            rows = [
+                (name, language, parse_stars(star))
+                for name, language, star in conn.execute("SELECT name, language, star FROM rep ORDER BY rowid")
+            ]
+            _upsert(conn, org, rows)
+            count = len(rows)
+            conn.execute("DROP TABLE rep")
+        _create_view(conn, org)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("ANALYZE")
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return count
+
+
+def connect(path, org="google"):
+    """repository.db に接続する（v1 なら v2 に移し替える）"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    migrate(conn, org)
+    return conn
+
+
+def write_repositories(conn, org, repositories):
+    """repo_parser.Repository のリストを書き込む（同じ名前は言語・スター数を更新する。コミットはしない）"""
+    _upsert(conn, org, [(r.name, r.language, r.stars) for r in repositories])
+
+
+def top_repositories(conn, org="google", limit=10, language=None):
+    """スター数の多い順に limit 件の (名前, 言語, スター数)"""
+    if language is None:
+        return conn.execute(TOP_SQL, (org, limit)).fetchall()
+    return conn.execute(TOP_BY_LANGUAGE_SQL, (org, language, limit)).fetchall()
+
+
+def repositories_in_range(conn, low, high, org="google", language=None):
+    """スター数が low 以上 high 以下の (名前, 言語, スター数)（多い順）"""
+    if language is None:
+        return conn.execute(RANGE_SQL, (org, low, high)).fetchall()
+    return conn.execute(RANGE_BY_LANGUAGE_SQL, (org, language, low, high)).fetchall()
+
+
+def language_counts(conn, org="google"):
+    """言語ごとのリポジトリ数 [(言語, 件数), ...]（多い順）"""
+    return conn.execute(LANGUAGE_COUNTS_SQL, (org,)).fetchall()
+
+
+def query_plan(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN の説明（detail 列）のリスト"""
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="repository.db を v2 に移し替えて、スター数の上位を表示する")
+    parser.add_argument("--db", default="repository.db")
+    parser.add_argument("--org", default="google")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        version = schema_version(conn)
+        count = migrate(conn, args.org)
+        if version < SCHEMA_VERSION:
+            conn.execute("VACUUM")  # 消した rep テーブルの分を詰める
+            print(f"v{version or 1} -> v{SCHEMA_VERSION}: {count}件を移し替えました")
+        for name, language, stars in top_repositories(conn, args.org, args.top):
+            print(f"{stars:>8} {name} ({language})")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
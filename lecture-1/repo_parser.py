@@ -0,0 +1,187 @@
+"""GitHub のリポジトリ一覧ページからリポジトリ名・言語・スター数を取り出すパーサー
+
+gitrep.ipynb はページごとに BeautifulSoup(html.parser) で木を作り、
+- リポジトリの <li> を最大3通りの find_all（Python の lambda で判定）で探し、
+- 1件ごとに名前・言語・スター数をそれぞれ3段階の候補で探していた。
+
+ここでは
+- lxml（C で書かれた HTML パーサー）で木を作り、コンパイル済みの XPath で探す
+- どの候補（セレクター）が使えるかは、最初にリポジトリが見つかったページで一度だけ決めて、
+  クロールの残りのページでは同じものを使う（RepoListParser.strategy）
+- スター数は "2.2k" や "1,234" を整数にした Repository を返す
+
+    parser = RepoListParser("google")
+    for repo in parser.parse(html_bytes):
+        print(repo.name, repo.language, repo.stars)
+"""
+import re
+
+from lxml import etree, html
+
+UNKNOWN_LANGUAGE = "不明"  # 言語が書かれていないリポジトリ（gitrep.ipynb と同じ）
+
+_STARS = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*([kKmM]?)")
+_SUFFIXES = {"": 1, "k": 1000, "m": 1000000}
+
+
+def parse_stars(text):
+    """スター数の表示を整数にする（"91" -> 91、"1,234" -> 1234、"2.2k" -> 2200、無ければ 0）
+
+    "2.2k" のような表示は丸められているので、元の数とは最大で百の位まで違う。
+    """
+    if text is None:
+        return 0
+    if isinstance(text, int):
+        return text
+    match = _STARS.search(str(text))
+    if match is None:
+        return 0
+    number, suffix = match.groups()
+    return round(float(number.replace(",", "")) * _SUFFIXES[suffix.lower()])
+
+
+class Repository:
+    """一覧ページの1件のリポジトリ"""
+
+    __slots__ = ("name", "language", "stars", "stars_text")
+
+    def __init__(self, name, language, stars, stars_text):
+        self.name = name
+        self.language = language  # 書かれていなければ None
+        self.stars = stars  # 整数（"2.2k" は 2200）
+        self.stars_text = stars_text  # ページに書かれていた表示（"2.2k"。無ければ "0"）
+
+    def __eq__(self, other):
+        return isinstance(other, Repository) and (
+            (self.name, self.language, self.stars, self.stars_text)
+            == (other.name, other.language, other.stars, other.stars_text)
+        )
+
+    def __repr__(self):
+        return f"Repository({self.name!r}, {self.language!r}, {self.stars_text} = {self.stars})"
+
+
+def _has_class(prefix):
+    # GitHub のクラス名は末尾のハッシュ（"--k4eMk" など）がデプロイごとに変わるので、前半だけで探す
+    return f"contains(@class, '{prefix}')"
+
+
+# リポジトリの <li> の候補（上から順に試す）。$org は組織名
+ITEM_SELECTORS = (
+    ("list-item", etree.XPath(f"//li[{_has_class('ListItem-module__listItem')}]")),
+    ("testid", etree.XPath("//li[contains(translate(@data-testid, 'REPOSITORY', 'repository'), 'repository')]")),
+    ("org-link", etree.XPath("//li[.//a[starts-with(@href, concat('/', $org, '/'))]]")),
+)
+
+# 1件の <li> の中で名前・言語・スター数を探す候補（上から順に試す）
+NAME_SELECTORS = (
+    ("title", etree.XPath(f".//h4[{_has_class('Title-module__heading')}]//a[{_has_class('Title-module__anchor')}]")),
+    ("org-link", etree.XPath(".//a[starts-with(@href, concat('/', $org, '/'))]")),
+)
+LANGUAGE_SELECTORS = (
+    ("text-4", etree.XPath(f".//span[{_has_class('ReposListItem-module__Text_4')}]")),
+    ("itemprop", etree.XPath(".//span[@itemprop='programmingLanguage']")),
+    ("circle", etree.XPath(".//div[contains(@class, 'LanguageCircle')]/following-sibling::span[1]")),
+)
+# スター数は stargazers へのリンクを先に使う（aria-label に "star" を含むだけだと、
+# "web-starter-kit" のように名前に star を含むリポジトリで別のリンクを拾ってしまう）
+STAR_SELECTORS = (
+    ("stargazers", etree.XPath(".//a[contains(@href, '/stargazers')]")),
+    ("aria-label", etree.XPath(".//a[contains(translate(@aria-label, 'STAR', 'star'), ' star')]/@aria-label")),
+    ("octicon", etree.XPath(".//svg[contains(@class, 'octicon-star')]/..")),
+)
+
+
+def _text(found):
+    # XPath の結果（要素か属性の文字列）の最初のもののテキスト
+    if not found:
+        return None
+    first = found[0]
+    if isinstance(first, str):
+        return first.strip()
+    return first.text_content().strip()
+
+
+def _choose(selectors, items, org):
+    # items のどれかで何か見つかった最初の候補
+    for name, selector in selectors:
+        if any(selector(item, org=org) for item in items):
+            return name, selector
+    return None
+
+
+class RepoListParser:
+    """リポジトリ一覧ページのパーサー（1つの組織のクロールで使い回す）
+
+    どの候補で探すか（strategy）は最初にリポジトリが見つかったページで決める。
+    GitHub のページの作りが途中で変わって見つからなくなったら、次のページで選び直す。
+    """
+
+    def __init__(self, org="google"):
+        self.org = org
+        self.strategy = None  # {"item": (名前, XPath), "name": ..., "language": ..., "stars": ...}
+
+    def _detect(self, root):
+        org = self.org
+        for name, selector in ITEM_SELECTORS:
+            items = selector(root, org=org)
+            if not items:
+                continue
+            found_name = _choose(NAME_SELECTORS, items, org)
+            if found_name is None:
+                continue  # 名前が無い <li>（ナビゲーションなど）は違う
+            return {
+                "item": (name, selector),
+                "name": found_name,
+                # 言語・スター数は無いページもあるので、見つからなければ候補を全部使う
+                "language": _choose(LANGUAGE_SELECTORS, items, org),
+                "stars": _choose(STAR_SELECTORS, items, org),
+            }
+        return None
+
+    def describe(self):
+        """使っている候補の名前（どのセレクターで探しているか）"""
+        if self.strategy is None:
+            return None
+        return {field: choice[0] if choice else None for field, choice in self.strategy.items()}
+
+    def parse(self, content):
+        """ページの HTML（bytes か str）から Repository のリストを返す"""
+        if not content:
+            return []
+        root = html.fromstring(content)
+        if self.strategy is not None:
+            repos = self._extract(root, self.strategy)
+            if repos:
+                return repos
+        strategy = self._detect(root)
+        if strategy is None:
+            return []
+        self.strategy = strategy
+        return self._extract(root, strategy)
+
+    def _extract(self, root, strategy):
+        org = self.org
+        find_name = strategy["name"][1]
+        language_selectors = [strategy["language"][1]] if strategy["language"] else [s for _, s in LANGUAGE_SELECTORS]
+        star_selectors = [strategy["stars"][1]] if strategy["stars"] else [s for _, s in STAR_SELECTORS]
+        repos = []
+        for item in strategy["item"][1](root, org=org):
+            name = _text(find_name(item, org=org))
+            if not name:
+                continue
+            language = None
+            for selector in language_selectors:
+                language = _text(selector(item))
+                if language:
+                    break
+            stars_text = None
+            for selector in star_selectors:
+                stars_text = _text(selector(item))
+                if stars_text:
+                    break
+            # aria-label は "2.2k stars"、リンクのテキストは "2.2k" なので先頭の数字だけ残す
+            match = _STARS.search(stars_text or "")
+            stars_text = match.group(0).replace(" ", "") if match else "0"
+            repos.append(Repository(name, language or None, parse_stars(stars_text), stars_text))
+        return repos
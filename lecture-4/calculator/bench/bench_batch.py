@@ -0,0 +1,75 @@
+"""一括計算（batch.py）と1つずつの計算（engine.py）の速さを比べるベンチマーク
+
+    python bench/bench_batch.py --size 1000000
+
+1つずつの計算は時間がかかるので、--scalar-size の件数だけ計算して1件あたりの時間を比べる。
+両方の結果を表示用の文字列にして、一致しているかも確かめる。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+
+import batch  # noqa: E402
+from engine import CalcError, compile_expression  # noqa: E402
+
+EXPRESSIONS = ["sin(x)", "log(x)", "√(x)", "10^x", "x²", "x!", "sin(x)^2+cos(x)^2", "1/exp(x)"]
+
+
+def scalar(program, values, angle_mode):
+    """今までの電卓と同じように1つずつ計算する"""
+    out = []
+    for v in values:
+        try:
+            out.append(batch.format_value(program.evaluate(angle_mode, {"x": v})))
+        except CalcError:
+            out.append("Error")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--scalar-size", type=int, default=100_000)
+    parser.add_argument("--rad", action="store_true")
+    args = parser.parse_args()
+    angle_mode = "RAD" if args.rad else "DEG"
+
+    rng = np.random.default_rng(0)
+    # 負の数・0・整数・大きい数が混ざるようにする（エラーの規則も比べるため）
+    x = rng.uniform(-400, 400, args.size)
+    x[::7] = np.round(x[::7])
+    x[::11] = 0
+    x[::13] = rng.uniform(700, 1200, x[::13].size)  # exp(x) が途中で float に収まらなくなる値
+    sample = x[: args.scalar_size].tolist()
+
+    print(f"{'式':<20}{'1つずつ':>14}{'一括計算':>14}{'一括+整形':>14}{'倍率':>8}  一致")
+    for expression in EXPRESSIONS:
+        program = compile_expression(expression)
+
+        t = time.perf_counter()
+        expected = scalar(program, sample, angle_mode)
+        scalar_per = (time.perf_counter() - t) / len(sample)
+
+        t = time.perf_counter()
+        values, errors = batch.run(program, x, angle_mode)
+        batch_per = (time.perf_counter() - t) / len(x)
+
+        t = time.perf_counter()
+        formatted = batch.format_results(values[: len(sample)], errors[: len(sample)])
+        format_per = (time.perf_counter() - t) / len(sample)
+
+        mismatches = sum(a != b for a, b in zip(formatted, expected))
+        print(
+            f"{expression:<20}{scalar_per * 1e9:>11.0f} ns{batch_per * 1e9:>11.1f} ns"
+            f"{(batch_per + format_per) * 1e9:>11.0f} ns{scalar_per / batch_per:>7.0f}x"
+            f"  {len(sample) - mismatches}/{len(sample)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
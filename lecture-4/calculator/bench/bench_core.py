@@ -0,0 +1,106 @@
+"""画面なしの電卓本体（core.py）に大量のキー入力を流して、1キーあたりの時間を測る
+
+    python bench/bench_core.py --keys 1000000
+
+数字・演算子・関数・=・AC などを実際の使い方に近い割合で混ぜたキーの列を作り、
+全体の処理速度と、キーの種類ごとの時間（中央値・99パーセンタイル）を出す。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core import KEY_REGISTRY, CalculatorCore  # noqa: E402
+from engine import FLOAT_MODE  # noqa: E402
+from history import History  # noqa: E402
+from numeric_modes import DecimalMode, FractionMode  # noqa: E402
+
+DIGITS = "0123456789"
+OPERATORS = "+-*/"
+FUNCTIONS = [key for key, spec in KEY_REGISTRY.items() if spec.text.endswith("(")]
+POSTFIX = ["x²", "n!", "%"]
+
+
+def synthetic_keys(count, seed=0):
+    """それらしいキーの列を count 個作る（例: 12 + sin ( 30 ) = ... AC）"""
+    rng = random.Random(seed)
+    keys = []
+    while len(keys) < count:
+        for _ in range(rng.randint(1, 4)):
+            open_parens = 0
+            if rng.random() < 0.2:
+                keys.append(rng.choice(FUNCTIONS))
+                open_parens += 1
+            keys.extend(rng.choice(DIGITS) for _ in range(rng.randint(1, 3)))
+            if rng.random() < 0.2:
+                keys.append(".")
+                keys.append(rng.choice(DIGITS))
+            keys.extend([")"] * open_parens)
+            if rng.random() < 0.1:
+                keys.append(rng.choice(POSTFIX))
+            keys.append(rng.choice(OPERATORS))
+        keys.append(rng.choice(DIGITS))
+        keys.append("=")
+        r = rng.random()
+        if r < 0.05:
+            keys.append("+/-")
+        elif r < 0.3:
+            keys.append("AC")
+    return keys[:count]
+
+
+def kind(key):
+    if key in DIGITS or key == ".":
+        return "数字"
+    if key == "=":
+        return "="
+    if key in OPERATORS or key in ("(", ")"):
+        return "演算子"
+    if key in ("AC", "+/-"):
+        return "AC, +/-"
+    return "関数"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=["float", "decimal", "fraction"], default="float")
+    parser.add_argument("--history", action="store_true", help="履歴と結果のキャッシュを使う")
+    parser.add_argument("--sample", type=int, default=200_000, help="キーごとの時間を測るキーの数")
+    args = parser.parse_args()
+
+    mode = {"float": FLOAT_MODE, "decimal": DecimalMode(), "fraction": FractionMode()}[args.mode]
+    keys = synthetic_keys(args.keys)
+
+    core = CalculatorCore(history=History() if args.history else None, modes=[mode])
+    start = time.perf_counter()
+    core.run(keys)
+    elapsed = time.perf_counter() - start
+    print(f"{len(keys)}キー {elapsed:.2f}秒（{len(keys) / elapsed:,.0f}キー/秒、平均 {elapsed / len(keys) * 1e6:.2f}us）")
+
+    # キーの種類ごとの時間
+    core = CalculatorCore(history=History() if args.history else None, modes=[mode])
+    timings = {}
+    clock = time.perf_counter_ns
+    for key in keys[: args.sample]:
+        t = clock()
+        core.press(key)
+        timings.setdefault(kind(key), []).append(clock() - t)
+    print(f"{'キー':<10}{'回数':>10}{'中央値':>12}{'99%':>12}{'最大':>12}")
+    for name, values in sorted(timings.items()):
+        print(
+            f"{name:<10}{len(values):>10}{percentile(values, 0.5) / 1000:>10.2f}us"
+            f"{percentile(values, 0.99) / 1000:>10.2f}us{max(values) / 1000:>10.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
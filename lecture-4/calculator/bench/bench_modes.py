@@ -0,0 +1,82 @@
+"""数値モード（float / 10進数 / 分数）ごとの計算の速さを比べるベンチマーク
+
+    python bench/bench_modes.py [--precision 28 50] [--repeat 2000]
+
+式ごとに、コンパイル済みの式を何度も計算して1回あたりの時間を出す。
+最後に、モードによって表示が変わる式の結果を並べる。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from engine import FLOAT_MODE, CalcError, compile_expression  # noqa: E402
+from numeric_modes import DecimalMode, FractionMode  # noqa: E402
+
+EXPRESSIONS = [
+    "0.1+0.2",
+    "1/3*3-1",
+    "12.5*8-3/7+2^10",
+    "(1+2)*(3+4)/(5-6)%",
+    "sin(30)+cos(60)",
+    "√(2)*log(1000)/ln(10)",
+    "20!/18!",
+    "1.0001^365",
+]
+
+ACCURACY = ["0.1+0.2", "0.1*3-0.3", "1/3+1/6", "sin(30)", "√(2)^2", "25!"]
+
+
+def timed(program, mode, repeat):
+    try:
+        program.evaluate("DEG", None, mode)  # 定数の読み直しなど最初の1回の分は除く
+    except CalcError:
+        pass
+    t = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            program.evaluate("DEG", None, mode)
+        except CalcError:
+            pass
+    return (time.perf_counter() - t) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--precision", type=int, nargs="+", default=[28, 50])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    modes = [("float", FLOAT_MODE)]
+    modes += [(f"decimal{p}", DecimalMode(p)) for p in args.precision]
+    modes.append(("fraction", FractionMode()))
+
+    print(f"{'式':<26}" + "".join(f"{name:>14}" for name, _ in modes))
+    totals = [0.0] * len(modes)
+    for expression in EXPRESSIONS:
+        program = compile_expression(expression)
+        row = []
+        for i, (name, mode) in enumerate(modes):
+            per = timed(program, mode, args.repeat)
+            totals[i] += per
+            row.append(f"{per * 1e6:>11.1f} us")
+        print(f"{expression:<26}" + "".join(row))
+    print(f"{'合計（float との比）':<22}" + "".join(f"{t / totals[0]:>13.1f}x" for t in totals))
+
+    print()
+    print(f"{'式':<26}" + "".join(f"{name:>32}" for name, _ in modes))
+    for expression in ACCURACY:
+        row = []
+        for name, mode in modes:
+            try:
+                text = mode.format(compile_expression(expression).evaluate("DEG", None, mode))
+            except CalcError:
+                text = "Error"
+            row.append(f"{text[:30]:>32}")
+        print(f"{expression:<26}" + "".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""グラフ・表モード（plot.py）のベンチマーク
+
+    python bench/bench_plot.py --points 1000000
+
+範囲の全ての点を計算して画面の横幅にまとめる時間と、表の1画面分（見えている行だけ）を
+計算する時間を測る。グラフに描く点の数は範囲の点の数によらず横幅の2倍まで。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from plot import SampleRange, downsample, table_rows  # noqa: E402
+
+EXPRESSIONS = ["sin", "tan", "log", "x!", "sin(x)^2+cos(x)^2", "x^3-2x"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--width", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--rad", action="store_true")
+    args = parser.parse_args()
+    angle_mode = "RAD" if args.rad else "DEG"
+
+    sample_range = SampleRange(0, 360, 360 / (args.points - 1))
+    print(f"x = 0〜360（{len(sample_range):,}点）、横幅 {args.width}、表 {args.rows}行")
+    print(f"{'式':<20}{'グラフ':>10}{'点/秒':>14}{'描く点':>8}{'表1画面':>10}")
+    for expression in EXPRESSIONS:
+        start = time.perf_counter()
+        columns = downsample(expression, sample_range, args.width, angle_mode)
+        plot_time = time.perf_counter() - start
+        points = sum(1 if lo == hi else 2 for x, lo, hi in columns)
+
+        start = time.perf_counter()
+        table_rows(expression, sample_range, len(sample_range) // 2, args.rows, angle_mode)
+        table_time = time.perf_counter() - start
+
+        print(
+            f"{expression:<20}{plot_time * 1e3:>8.1f}ms{len(sample_range) / plot_time:>14,.0f}"
+            f"{points:>8}{table_time * 1e6:>8.0f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""電卓本体（core.py）のファジング
+
+ランダムなキーの列を流して、次の性質がいつも成り立つかを確かめる。
+
+1. どのキーを押しても例外が出ない
+2. 表示はいつも空でない文字列
+3. AC を押すと表示は "0" に戻り、入力中の式も空になる
+4. Error の表示中に何かキーを押すと、表示は "0" に戻る（AC と同じ）
+5. 同じキーの列からは同じ表示の列になる（状態が前の計算に引きずられない）
+6. 履歴と結果のキャッシュを使っても使わなくても、表示の列は同じ
+
+hypothesis が入っていればそれを使い、無ければ自前の乱数で試す。
+見つかった反例は、性質が崩れたままキーをできるだけ減らしてから表示する。
+
+    python bench/fuzz_core.py --runs 2000 --length 60 [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import traceback
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core import KEY_REGISTRY, CalculatorCore  # noqa: E402
+from engine import FLOAT_MODE  # noqa: E402
+from history import ERROR, History  # noqa: E402
+from numeric_modes import DecimalMode, FractionMode  # noqa: E402
+
+MODES = [FLOAT_MODE, DecimalMode(28), FractionMode()]
+KEYS = list(KEY_REGISTRY)  # 電卓の全てのキー
+
+
+class PropertyFailed(Exception):
+    pass
+
+
+def check(keys):
+    """キーの列で性質 1〜6 を確かめる（崩れたら PropertyFailed）"""
+    core = CalculatorCore(modes=MODES)
+    displays = []
+    for i, key in enumerate(keys):
+        was_error = core.display == ERROR
+        try:
+            display = core.press(key)
+        except Exception as e:
+            raise PropertyFailed(f"1. {i}番目のキー {key!r} で例外: {e!r}") from e
+        if not isinstance(display, str) or not display:
+            raise PropertyFailed(f"2. {i}番目のキー {key!r} の後の表示が {display!r}")
+        if key == "AC" and (display != "0" or core.expression):
+            raise PropertyFailed(f"3. AC の後の表示が {display!r}、式が {core.expression!r}")
+        if was_error and display != "0":
+            raise PropertyFailed(f"4. Error の後に {key!r} を押した表示が {display!r}")
+        displays.append(display)
+
+    again = CalculatorCore(modes=MODES).run(keys)
+    if again != displays:
+        raise PropertyFailed("5. 同じキーの列で表示が変わった")
+
+    # ↑↓ は履歴があるときだけ動くので、6 はそれ以外のキーで比べる
+    plain = [key for key in keys if key not in ("↑", "↓")]
+    without = CalculatorCore(modes=MODES).run(plain)
+    with_history = CalculatorCore(history=History(), modes=MODES).run(plain)
+    if without != with_history:
+        raise PropertyFailed("6. 履歴・キャッシュを使うと表示が変わった")
+
+
+def fails(keys):
+    try:
+        check(keys)
+    except PropertyFailed:
+        return True
+    return False
+
+
+def shrink(keys):
+    """性質が崩れたまま、キーをできるだけ取り除く"""
+    chunk = max(1, len(keys) // 2)
+    while chunk >= 1:
+        i = 0
+        while i < len(keys):
+            candidate = keys[:i] + keys[i + chunk:]
+            if candidate and fails(candidate):
+                keys = candidate
+            else:
+                i += chunk
+        chunk //= 2
+    return keys
+
+
+def report(keys):
+    keys = shrink(keys)
+    try:
+        check(keys)
+    except PropertyFailed as e:
+        print(f"反例（{len(keys)}キー）: {keys}")
+        print(f"  {e}")
+        if e.__cause__ is not None:
+            traceback.print_exception(type(e.__cause__), e.__cause__, e.__cause__.__traceback__)
+
+
+def run_random(runs, length, seed):
+    rng = random.Random(seed)
+    # 数字・演算子を多めにして、計算できる式もできるようにする
+    weights = [4 if len(key) == 1 else 1 for key in KEYS]
+    for run in range(runs):
+        keys = rng.choices(KEYS, weights=weights, k=rng.randint(1, length))
+        if rng.random() < 0.02:
+            # 同じキーの長い連続（深い入れ子のかっこ・関数など）
+            keys[rng.randrange(len(keys)):0] = [rng.choice(KEYS)] * rng.randint(100, 3000)
+        if fails(keys):
+            print(f"{run + 1}回目で性質が崩れました（seed={seed}）")
+            report(keys)
+            return False
+    print(f"{runs}回のキー列で全ての性質が成り立ちました（seed={seed}）")
+    return True
+
+
+def run_hypothesis(runs, length):
+    from hypothesis import given, settings, strategies as st
+
+    @settings(max_examples=runs, deadline=None)
+    @given(st.lists(st.sampled_from(KEYS), min_size=1, max_size=length))
+    def prop(keys):
+        check(keys)
+
+    try:
+        prop()
+    except PropertyFailed as e:
+        print(f"性質が崩れました: {e}")
+        return False
+    print(f"{runs}回のキー列で全ての性質が成り立ちました（hypothesis）")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--length", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-hypothesis", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        import hypothesis  # noqa: F401
+        use_hypothesis = not args.no_hypothesis and args.seed is None
+    except ImportError:
+        use_hypothesis = False
+
+    if use_hypothesis:
+        ok = run_hypothesis(args.runs, args.length)
+    else:
+        seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+        ok = run_random(args.runs, args.length, seed)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""電卓の関数を大量の値にまとめて適用する（一括計算モード）
+
+engine.py でコンパイルした式を、1つずつの値ではなく配列全体に対して実行する。
+NumPy があれば配列のまま計算し、"Error" になる要素はマスク（真偽値の配列）で表す。
+NumPy が無いときは 1つずつ engine で計算する。
+
+    python batch.py "sin(x)" values.txt          # 1行に1つの値（度）
+    python batch.py "log(x)" values.txt --rad    # RADモード
+
+結果は電卓の表示と同じ形式（format_number と同じ規則、計算できなければ Error）で1行ずつ出力する。
+
+エラーになる要素は1つずつの計算と必ず同じになる。値は、NumPy の sin や累乗が
+math モジュールと最後の1ビットだけ違うことがあり、ごくまれに表示の最後の桁が変わる。
+"""
+import argparse
+import math
+import sys
+
+from engine import (
+    ADD, CALL, DIV, LOAD, MUL, NEG, POST, PUSH, SUB,
+    FLOAT_MODE, CalcError, compile_expression,
+)
+from numeric import FLOAT_FACTORIALS, LargeNumber
+
+try:
+    import numpy as np
+except ImportError:  # NumPy が無くても動くようにする
+    np = None
+
+
+# ---------------------------------------------------------------- 配列用の関数
+
+def _radians(x, angle_mode):
+    return np.radians(x) if angle_mode == "DEG" else x
+
+
+def _no_error(x):
+    return None
+
+
+# 関数名 -> (計算, エラーになる要素のマスク)
+# エラーの規則は engine.FUNCTIONS と同じ
+def _vector_functions():
+    return {
+        "sin": (lambda x, mode: np.sin(_radians(x, mode)), _no_error),
+        "cos": (lambda x, mode: np.cos(_radians(x, mode)), _no_error),
+        "tan": (lambda x, mode: np.tan(_radians(x, mode)), _no_error),
+        "log": (lambda x, mode: np.log10(x), lambda x: x <= 0),
+        "ln": (lambda x, mode: np.log(x), lambda x: x <= 0),
+        "exp": (lambda x, mode: np.exp(x), _no_error),
+        "√": (lambda x, mode: np.sqrt(x), lambda x: x < 0),
+        "sqrt": (lambda x, mode: np.sqrt(x), lambda x: x < 0),
+    }
+
+
+def _factorial(x, mode):
+    # 0!〜170! は表を引き、float に収まらないものは inf にしておく（後で1つずつ計算し直す）
+    fits = (x >= 0) & (x < len(FLOAT_FACTORIALS)) & (x == np.floor(x))
+    n = np.where(fits, x, 0).astype(np.int64)
+    return np.where(fits, np.asarray(FLOAT_FACTORIALS)[n], np.inf)
+
+
+def _vector_postfix():
+    return {
+        # 階乗は0以上の整数のみ
+        "!": (_factorial, lambda x: (x < 0) | (x != np.floor(x))),
+        "²": (lambda x, mode: x * x, _no_error),
+        "%": (lambda x, mode: x / 100, _no_error),
+    }
+
+
+VECTOR_FUNCTIONS = _vector_functions() if np is not None else {}
+VECTOR_POSTFIX = _vector_postfix() if np is not None else {}
+
+
+# ---------------------------------------------------------------- 一括計算
+
+def _run_numpy(program, variables, angle_mode):
+    variables = {name: np.asarray(v, dtype=np.float64) for name, v in variables.items()}
+    shape = np.broadcast_shapes(*(v.shape for v in variables.values()))
+    errors = np.zeros(shape, dtype=bool)
+    # 途中で float に収まらなくなった要素（1/exp(x) のように最後は有限に戻ることがある）
+    overflow = np.zeros(shape, dtype=bool)
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    with np.errstate(all="ignore"):  # 警告はマスクで扱う
+        for op, arg in program.code:
+            if op == PUSH:
+                push(arg)
+            elif op == LOAD:
+                push(variables[arg])
+            elif op == CALL or op == POST:
+                func, invalid = (VECTOR_FUNCTIONS if op == CALL else VECTOR_POSTFIX)[arg]
+                a = np.asarray(pop(), dtype=np.float64)
+                bad = invalid(a)
+                if bad is not None:
+                    errors |= bad
+                result = func(a, angle_mode)
+                overflow |= ~np.isfinite(result)
+                push(result)
+            elif op == NEG:
+                push(-pop())
+            else:
+                b = pop()
+                a = pop()
+                if op == ADD:
+                    push(a + b)
+                elif op == SUB:
+                    push(a - b)
+                elif op == MUL:
+                    result = a * b
+                    overflow |= ~np.isfinite(result)
+                    push(result)
+                elif op == DIV:
+                    errors |= np.asarray(b) == 0  # 0で割ろうとした場合
+                    push(a / b)
+                else:
+                    a = np.asarray(a, dtype=np.float64)
+                    b = np.asarray(b, dtype=np.float64)
+                    # 負の数の小数乗は複素数、0の負の数乗は0で割るのと同じ
+                    errors |= ((a < 0) & (b != np.floor(b))) | ((a == 0) & (b < 0))
+                    result = a ** b
+                    overflow |= ~np.isfinite(result)
+                    push(result)
+        values = np.broadcast_to(np.asarray(stack[-1], dtype=np.float64), shape)
+        overflow = (overflow | ~np.isfinite(values)) & ~errors
+    values = np.where(errors, np.nan, values)
+    if overflow.any():
+        # 途中か最後で float に収まらなかった要素（めったにない）だけ engine で計算し直す
+        # （LargeNumber になるか Error になるかを1つずつの計算と同じにするため）
+        values, errors = _recompute(program, variables, angle_mode, values, errors, overflow)
+    return values, errors
+
+
+def _recompute(program, variables, angle_mode, values, errors, mask):
+    shape = values.shape
+    columns = {name: np.broadcast_to(v, shape).ravel() for name, v in variables.items()}
+    values = values.astype(object).ravel()
+    errors = errors.ravel()
+    for i in np.flatnonzero(mask).tolist():
+        try:
+            values[i] = program.evaluate(angle_mode, {name: float(c[i]) for name, c in columns.items()})
+        except CalcError:
+            values[i] = math.nan
+            errors[i] = True
+    return values.reshape(shape), errors.reshape(shape)
+
+
+def _run_scalar(program, variables, angle_mode):
+    names = list(variables)
+    columns = [v if isinstance(v, (list, tuple)) else None for v in variables.values()]
+    size = max((len(c) for c in columns if c is not None), default=1)
+    values, errors = [], []
+    for i in range(size):
+        env = {
+            name: float(column[i] if column is not None else variables[name])
+            for name, column in zip(names, columns)
+        }
+        try:
+            values.append(program.evaluate(angle_mode, env))
+            errors.append(False)
+        except CalcError:
+            values.append(math.nan)
+            errors.append(True)
+    return values, errors
+
+
+def run(expression, x, angle_mode="DEG", y=None):
+    """式（x と y を変数として使える）を x（と y）の全ての値で計算する
+
+    (値の配列, エラーのマスク) を返す。エラーの要素の値は nan。
+    NumPy が無いときは、どちらもリストになる。
+    """
+    program = compile_expression(expression) if isinstance(expression, str) else expression
+    variables = {"x": x} if y is None else {"x": x, "y": y}
+    if np is None:
+        if not isinstance(x, (list, tuple)):
+            variables["x"] = list(x)
+        return _run_scalar(program, variables, angle_mode)
+    return _run_numpy(program, variables, angle_mode)
+
+
+# 電卓のボタン -> 式（一括計算でも同じ関数が使えるように）
+KEY_EXPRESSIONS = {
+    "sin": "sin(x)",
+    "cos": "cos(x)",
+    "tan": "tan(x)",
+    "log": "log(x)",
+    "ln": "ln(x)",
+    "eˣ": "exp(x)",
+    "10ˣ": "10^x",
+    "√": "√(x)",
+    "x²": "x²",
+    "n!": "x!",
+}
+
+
+def apply(key, x, angle_mode="DEG"):
+    """電卓のボタン1つ分の関数を、x の全ての値に適用する"""
+    return run(KEY_EXPRESSIONS[key], x, angle_mode)
+
+
+def power(x, y):
+    """xʸ を要素ごとに計算する（x と y は同じ長さか、どちらかが1つの値）"""
+    return run("x^y", x, y=y)
+
+
+# ---------------------------------------------------------------- 表示用の整形
+
+def format_value(num):
+    """電卓の表示（float モード）と同じ規則で1つの値を文字列にする（LargeNumber も可）"""
+    return FLOAT_MODE.format(num)
+
+
+def format_results(values, errors):
+    """一括計算の結果を表示と同じ文字列のリストにする（エラーは "Error"）
+
+    規則は FloatMode.format と同じで、要素ごとの判定だけ NumPy でまとめて行う。
+    """
+    if np is None:
+        return ["Error" if bad else format_value(v) for v, bad in zip(values, errors)]
+
+    values = np.asarray(values)
+    out = np.full(values.shape, "Error", dtype=object)
+    ok = ~np.asarray(errors)
+    if values.dtype == object:
+        # float に収まらない数（LargeNumber）は先に整形して、残りを float の配列にする
+        large = np.array([isinstance(v, LargeNumber) for v in values.ravel().tolist()]).reshape(values.shape)
+        out[large] = [f"{v:.6e}" for v in values[large].tolist()]
+        ok &= ~large
+        values = np.where(large | ~ok, 0.0, values).astype(np.float64)
+    magnitude = np.abs(values)
+    scientific = ok & ((magnitude > 1e10) | ((magnitude < 1e-10) & (values != 0)))
+    integral = ok & ~scientific & (values % 1 == 0)
+    fraction = ok & ~scientific & ~integral
+
+    # 種類ごとにまとめて整形する（要素ごとの判定は NumPy で済ませておく）
+    out[scientific] = [f"{v:.6e}" for v in values[scientific].tolist()]
+    out[integral] = [str(int(v)) for v in values[integral].tolist()]
+    out[fraction] = [str(round(v, 10)) for v in values[fraction].tolist()]
+    return out.tolist()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="電卓の式をファイルの全ての値で計算する")
+    parser.add_argument("expression", help='x を変数とする式（例: "sin(x)"）')
+    parser.add_argument("path", nargs="?", default="-", help="1行に1つの値のファイル（省略すると標準入力）")
+    parser.add_argument("--rad", action="store_true", help="RADモードで計算する")
+    args = parser.parse_args(argv)
+
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    with stream:
+        if np is not None:
+            x = np.loadtxt(stream, dtype=np.float64, ndmin=1)
+        else:
+            x = [float(line) for line in stream if line.strip()]
+
+    values, errors = run(args.expression, x, "RAD" if args.rad else "DEG")
+    sys.stdout.write("\n".join(format_results(values, errors)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,60 @@
+import os
+import time
 import flet as ft
-import math
-
-# ボタンの基本クラス（全てのボタンの元になる）
+from core import CalculatorCore, key_rows
+from engine import CalcError
+from engine import FLOAT_MODE
+from history import History
+from numeric_modes import DecimalMode, FractionMode
+from plot import Downsampler, SampleRange, samples, table_rows, y_range
+
+# 10進数モードで計算する桁数
+DECIMAL_PRECISION = 28
+
+# MODEボタンで切り替える数値モード（float -> 10進数 -> 分数 -> float ...）
+NUMERIC_MODES = [FLOAT_MODE, DecimalMode(DECIMAL_PRECISION), FractionMode()]
+
+# グラフの横幅（この数の列ごとに最小値・最大値を描く）と、表に一度に表示する行数
+PLOT_WIDTH = 500
+TABLE_ROWS = 10
+
+# ボタンの見た目（KeySpec.style -> 色）。同じ見た目のボタンは1つの ButtonStyle を共有する
+BUTTON_STYLES = {
+    # 数字ボタン（0〜9と小数点）：薄い白の背景に白い文字
+    "digit": ft.ButtonStyle(bgcolor=ft.Colors.WHITE24, color=ft.Colors.WHITE),
+    # 演算子ボタン（+、-、×、÷、=）：オレンジの背景に白い文字
+    "action": ft.ButtonStyle(bgcolor=ft.Colors.ORANGE, color=ft.Colors.WHITE),
+    # 特別な操作ボタン（AC、+/-、%など）：薄い青灰色の背景に黒い文字
+    "extra": ft.ButtonStyle(bgcolor=ft.Colors.BLUE_GREY_100, color=ft.Colors.BLACK),
+    # 科学計算ボタン（sin、cos、logなど）：濃い藍色の背景に白い文字
+    "scientific": ft.ButtonStyle(bgcolor=ft.Colors.INDIGO_700, color=ft.Colors.WHITE),
+}
+
+# ボタンのクラス（どのキーも KeySpec から作る）
 class CalcButton(ft.ElevatedButton):
-    def __init__(self, text, button_clicked, expand=1):
+    def __init__(self, spec, button_clicked):
         super().__init__()
-        self.text = text  # ボタンに表示される文字
-        self.expand = expand  # ボタンの幅の比率
+        self.text = spec.key  # ボタンに表示される文字
+        self.expand = spec.expand  # ボタンの幅の比率
+        self.style = BUTTON_STYLES[spec.style]  # ボタンの色（共有の ButtonStyle）
         self.on_click = button_clicked  # ボタンが押されたときに実行する関数
-        self.data = text  # ボタンが押されたときに渡すデータ
-
-# 数字ボタン用のクラス（0〜9と小数点）
-class DigitButton(CalcButton):
-    def __init__(self, text, button_clicked, expand=1):
-        CalcButton.__init__(self, text, button_clicked, expand)
-        self.bgcolor = ft.Colors.WHITE24  # 背景色：薄い白
-        self.color = ft.Colors.WHITE  # 文字色：白
-
-# 演算子ボタン用のクラス（+、-、×、÷）
-class ActionButton(CalcButton):
-    def __init__(self, text, button_clicked):
-        CalcButton.__init__(self, text, button_clicked)
-        self.bgcolor = ft.Colors.ORANGE  # 背景色：オレンジ
-        self.color = ft.Colors.WHITE  # 文字色：白
-
-# 特別な操作ボタン用のクラス（AC、+/-、%）
-class ExtraActionButton(CalcButton):
-    def __init__(self, text, button_clicked):
-        CalcButton.__init__(self, text, button_clicked)
-        self.bgcolor = ft.Colors.BLUE_GREY_100  # 背景色：薄い青灰色
-        self.color = ft.Colors.BLACK  # 文字色：黒
-
-# 科学計算ボタン用のクラス（sin、cos、logなど）
-class ScientificButton(CalcButton):
-    def __init__(self, text, button_clicked):
-        CalcButton.__init__(self, text, button_clicked)
-        self.bgcolor = ft.Colors.INDIGO_700  # 背景色：濃い藍色
-        self.color = ft.Colors.WHITE  # 文字色：白
+        self.data = spec.key  # ボタンが押されたときに渡すデータ
 
 # 電卓のメインクラス
 class CalculatorApp(ft.Container):
-    def __init__(self):
+    def __init__(self, history=None):
         super().__init__()
-        self.reset()  # 計算機の内部状態を初期化
-        self.angle_mode = "DEG"  # 角度モード（DEG=度、RAD=ラジアン）
-        self.power_mode = False  # 累乗入力モードのフラグ
+        # 電卓の状態（入力中の式・角度モード・数値モード）と計算は CalculatorCore が持つ
+        history = history if history is not None else History()  # 計算の履歴と結果のキャッシュ
+        self.core = CalculatorCore(history=history, modes=NUMERIC_MODES)
+        state = self.core.state()
         
         # 計算結果を表示するテキスト（初期値は"0"）
-        self.result = ft.Text(value="0", color=ft.Colors.WHITE, size=20)
+        self.result = ft.Text(value=state.display, color=ft.Colors.WHITE, size=20)
         # 角度モードを表示するテキスト（左上に表示）
-        self.angle_indicator = ft.Text(value="DEG", color=ft.Colors.AMBER, size=14)
+        self.angle_indicator = ft.Text(value=state.angle_mode, color=ft.Colors.AMBER, size=14)
+        # 数値モードを表示するテキスト（角度モードの隣に表示）
+        self.mode_indicator = ft.Text(value=state.mode_label, color=ft.Colors.AMBER, size=14)
         
         self.width = 550  # 電卓の幅を550ピクセルに設定
         self.bgcolor = ft.Colors.BLACK  # 背景色：黒
@@ -57,313 +62,154 @@ class CalculatorApp(ft.Container):
         self.padding = 20  # 内側の余白
         
         # 電卓のレイアウト（縦に並べる）
+        button_clicked = self.button_clicked  # 全てのボタンで同じ関数を使う
         self.content = ft.Column(
             controls=[
                 # 一番上の行：角度モード表示と計算結果
                 ft.Row(
-                    controls=[self.angle_indicator, self.result], 
+                    controls=[ft.Row(controls=[self.angle_indicator, self.mode_indicator]), self.result], 
                     alignment="spaceBetween"  # 左右に配置
                 ),
-                # 科学計算ボタンの行1（三角関数と累乗）
-                ft.Row(
-                    controls=[
-                        ScientificButton(text="sin", button_clicked=self.button_clicked),
-                        ScientificButton(text="cos", button_clicked=self.button_clicked),
-                        ScientificButton(text="tan", button_clicked=self.button_clicked),
-                        ScientificButton(text="√", button_clicked=self.button_clicked),
-                        ScientificButton(text="x²", button_clicked=self.button_clicked),
-                        ScientificButton(text="xʸ", button_clicked=self.button_clicked),
-                    ]
-                ),
-                # 科学計算ボタンの行2（対数、指数、階乗、円周率）
-                ft.Row(
-                    controls=[
-                        ScientificButton(text="log", button_clicked=self.button_clicked),
-                        ScientificButton(text="ln", button_clicked=self.button_clicked),
-                        ScientificButton(text="eˣ", button_clicked=self.button_clicked),
-                        ScientificButton(text="10ˣ", button_clicked=self.button_clicked),
-                        ScientificButton(text="n!", button_clicked=self.button_clicked),
-                        ScientificButton(text="π", button_clicked=self.button_clicked),
-                    ]
-                ),
-                # 角度モード切り替えボタンの行
-                ft.Row(
-                    controls=[
-                        ExtraActionButton(text="DEG/RAD", button_clicked=self.button_clicked),
-                    ]
-                ),
-                # 特別操作と割り算の行
-                ft.Row(
-                    controls=[
-                        ExtraActionButton(text="AC", button_clicked=self.button_clicked),
-                        ExtraActionButton(text="+/-", button_clicked=self.button_clicked),
-                        ExtraActionButton(text="%", button_clicked=self.button_clicked),
-                        ActionButton(text="/", button_clicked=self.button_clicked),
-                    ]
-                ),
-                # 数字7〜9と掛け算の行
-                ft.Row(
-                    controls=[
-                        DigitButton(text="7", button_clicked=self.button_clicked),
-                        DigitButton(text="8", button_clicked=self.button_clicked),
-                        DigitButton(text="9", button_clicked=self.button_clicked),
-                        ActionButton(text="*", button_clicked=self.button_clicked),
-                    ]
-                ),
-                # 数字4〜6と引き算の行
+            ]
+            # ボタンの行（core.KEY_REGISTRY の表から、起動時に一度だけ作る）
+            + [
+                ft.Row(controls=[CalcButton(spec, button_clicked) for spec in row])
+                for row in key_rows()
+            ]
+        )
+
+    # ボタンが押されたときに実行される関数
+    # 押されたボタンを CalculatorCore に渡し、返ってきた表示を画面に写すだけ
+    def button_clicked(self, e):
+        self.core.press(e.control.data)  # 押されたボタンのデータ（文字）を渡す
+        state = self.core.state()
+        self.result.value = state.display
+        self.angle_indicator.value = state.angle_mode
+        self.mode_indicator.value = state.mode_label
+        self.update()  # 画面を更新して変更を反映（変わったプロパティだけが送られる）
+
+# 入力欄の数値を読む（数値でなければ ValueError）
+def read_number(field):
+    try:
+        return float(field.value)
+    except ValueError:
+        raise ValueError(f"{field.label}が数値でない: {field.value}")
+
+# グラフ・表モード（式を範囲の全ての x で計算して、グラフと表で見る）
+class PlotView(ft.Container):
+    def __init__(self, angle_mode):
+        super().__init__()
+        self.angle_mode = angle_mode  # 電卓の角度モードを返す関数（電卓と同じ DEG / RAD で計算する）
+        self.range = None  # 計算している範囲（SampleRange）
+        self.expression = None  # 計算している式
+        self.first_row = 0  # 表の一番上の行の番号
+
+        self.width = 550
+        self.bgcolor = ft.Colors.BLACK
+        self.border_radius = ft.border_radius.all(20)
+        self.padding = 20
+
+        # 式（x の式か、"sin" のようなボタンの名前）と範囲の入力欄
+        self.expression_field = ft.TextField(label="式（x の関数）", value="sin(x)", expand=2)
+        self.start_field = ft.TextField(label="始め", value="0", expand=1)
+        self.stop_field = ft.TextField(label="終わり", value="360", expand=1)
+        self.step_field = ft.TextField(label="刻み", value="0.01", expand=1)
+        self.message = ft.Text(value="", color=ft.Colors.AMBER, size=14)
+
+        # グラフ（列ごとの最小値・最大値を順に結ぶ。点の数は列の数の2倍まで）
+        self.series = ft.LineChartData(data_points=[], color=ft.Colors.ORANGE, stroke_width=1)
+        self.chart = ft.LineChart(data_series=[self.series], height=250, interactive=False)
+
+        # 表（行のコントロールは TABLE_ROWS 個だけ作り、スクロールしたら中の文字を入れ替える）
+        self.x_cells = [ft.Text(value="", color=ft.Colors.WHITE, expand=1) for _ in range(TABLE_ROWS)]
+        self.y_cells = [ft.Text(value="", color=ft.Colors.WHITE, expand=2) for _ in range(TABLE_ROWS)]
+        self.scroll = ft.Slider(min=0, max=1, value=0, on_change=self.scroll_changed, expand=1)
+
+        self.content = ft.Column(
+            controls=[
+                ft.Row(controls=[self.expression_field]),
+                ft.Row(controls=[self.start_field, self.stop_field, self.step_field]),
                 ft.Row(
-                    controls=[
-                        DigitButton(text="4", button_clicked=self.button_clicked),
-                        DigitButton(text="5", button_clicked=self.button_clicked),
-                        DigitButton(text="6", button_clicked=self.button_clicked),
-                        ActionButton(text="-", button_clicked=self.button_clicked),
-                    ]
+                    controls=[ft.ElevatedButton(text="計算", on_click=self.draw_clicked), self.message],
                 ),
-                # 数字1〜3と足し算の行
-                ft.Row(
-                    controls=[
-                        DigitButton(text="1", button_clicked=self.button_clicked),
-                        DigitButton(text="2", button_clicked=self.button_clicked),
-                        DigitButton(text="3", button_clicked=self.button_clicked),
-                        ActionButton(text="+", button_clicked=self.button_clicked),
-                    ]
+                self.chart,
+                ft.Column(
+                    controls=[ft.Row(controls=[x, y]) for x, y in zip(self.x_cells, self.y_cells)],
+                    spacing=2,
                 ),
-                # 数字0、小数点、イコールの行
                 ft.Row(
                     controls=[
-                        DigitButton(text="0", expand=2, button_clicked=self.button_clicked),  # 0ボタンは2倍の幅
-                        DigitButton(text=".", button_clicked=self.button_clicked),
-                        ActionButton(text="=", button_clicked=self.button_clicked),
+                        ft.TextButton(text="↑", on_click=lambda e: self.scroll_to(self.first_row - TABLE_ROWS)),
+                        self.scroll,
+                        ft.TextButton(text="↓", on_click=lambda e: self.scroll_to(self.first_row + TABLE_ROWS)),
                     ]
                 ),
             ]
         )
 
-    # ボタンが押されたときに実行される関数う
-    def button_clicked(self, e):
-        data = e.control.data  # 押されたボタンのデータ（文字）を取得
-        print(f"Button clicked with data = {data}")  # デバッグ用：どのボタンが押されたか表示
-        
-        # エラー表示中か、ACボタンが押された場合
-        if self.result.value == "Error" or data == "AC":
-            self.result.value = "0"  # 表示を"0"にリセット
-            self.reset()  # 内部状態をリセット
-            self.power_mode = False  # 累乗モードを解除
-
-        # 角度モード切り替えボタンが押された場合
-        # 三角関数の入力を度数法（DEG）とラジアン（RAD）で切り替える
-        elif data == "DEG/RAD":
-            # 現在のモードがDEGならRADに、RADならDEGに切り替え
-            self.angle_mode = "RAD" if self.angle_mode == "DEG" else "DEG"
-            self.angle_indicator.value = self.angle_mode  # 表示を更新
-
-        # 円周率ボタンが押された場合
-        elif data == "π":
-            self.result.value = self.format_number(math.pi)  # πの値を表示
-            self.new_operand = True  # 次の入力で上書きするフラグを立てる
-        # operandとはex) 2 + 3 の場合の2や3のこと
-
-        # 平方根ボタンが押された場合
-        elif data == "√":
-            try:
-                value = float(self.result.value)  # 現在の表示を数値に変換
-                if value < 0:  # 負の数の場合
-                    self.result.value = "Error"  # エラー表示
-                else:
-                    self.result.value = self.format_number(math.sqrt(value))  # 平方根を計算
-                self.reset()  # 内部をリセット
-            except:  # エラーが発生した場合
-                self.result.value = "Error"  # エラー表示
-                self.reset()  # 内部をリセット
-
-        # 2乗ボタンが押された場合
-        elif data == "x²":
-            try:
-                value = float(self.result.value)  # 現在の表示を数値に変換
-                self.result.value = self.format_number(value ** 2)  # 2乗を計算（value × value）
-                self.reset()  # 内部をリセット
-            except:  # エラーが発生した場合
-                self.result.value = "Error"  # エラー表示
-                self.reset()  # 内部をリセット
-
-        # 累乗ボタンが押された場合
-        elif data == "xʸ":
-            self.power_mode = True  # 累乗モードを有効化
-            self.operand1 = float(self.result.value)  # 現在の値を底として保存
-            self.operator = "^"  # 演算子を累乗に設定
-            self.new_operand = True  # 次の入力を指数として受け取る準備
-        # operandの説明は164行目参照
-
-        # 自然指数ボタンが押された場合
-        elif data == "eˣ":
-            try:
-                value = float(self.result.value)  # 現在の表示を数値に変換
-                self.result.value = self.format_number(math.exp(value))  # e^value を計算
-                self.reset()  # 内部をリセット
-            except:  # エラーが発生した場合
-                self.result.value = "Error"  # エラー表示
-                self.reset()  # 内部をリセット
-
-        # 10の累乗ボタンが押された場合
-        elif data == "10ˣ":
-            try:
-                value = float(self.result.value)  # 現在の表示を数値に変換
-                self.result.value = self.format_number(10 ** value)  # 10^value を計算
-                self.reset()  # 内部をリセット
-            except:  # エラーが発生した場合
-                self.result.value = "Error"  # エラー表示
-                self.reset()  # 内部をリセット
-
-        # 階乗ボタンが押された場合
-        elif data == "n!":
-            try:
-                value = float(self.result.value)  # 現在の表示を数値に変換
-                # 階乗は0以上の整数でないと計算できない
-                if value < 0 or value != int(value):  # 負の数または小数の場合
-                    self.result.value = "Error"  # エラー表示
-                else:
-                    # math.factorial()で階乗を計算
-                    self.result.value = self.format_number(math.factorial(int(value)))
-                self.reset()  # 内部をリセット
-            except:  # エラーが発生した場合
-                self.result.value = "Error"  # エラー表示
-                self.reset()  # 内部をリセット
-
-        # 三角関数・対数関数ボタンが押された場合
-        elif data in ("sin", "cos", "tan", "log", "ln"):
-            try:
-                value = float(self.result.value)  # 現在の表示を数値に変換する
-                
-                # sinが押された場合
-                if data == "sin":
-                    if self.angle_mode == "DEG":  # 度モードの場合
-                        value = math.radians(value)  # 度をラジアンに変換
-                    self.result.value = self.format_number(math.sin(value))  # sinを計算
-                
-                # cosが押された場合
-                elif data == "cos":
-                    if self.angle_mode == "DEG":  # 度モードの場合
-                        value = math.radians(value)  # 度をラジアンに変換
-                    self.result.value = self.format_number(math.cos(value))  # cosを計算
-                
-                # tanが押された場合
-                elif data == "tan":
-                    if self.angle_mode == "DEG":  # 度モードの場合
-                        value = math.radians(value)  # 度をラジアンに変換
-                    self.result.value = self.format_number(math.tan(value))  # tanを計算
-                
-                # 常用対数があ押された場合
-                elif data == "log":
-                    if value <= 0:  # 0以下の場合
-                        self.result.value = "Error"  # エラー表示（対数は正の数でしか計算できない）
-                    else:
-                        self.result.value = self.format_number(math.log10(value))  # log10を計算
-                
-                # 自然対数が押された場合
-                elif data == "ln":
-                    if value <= 0:  # 0以下の場合
-                        self.result.value = "Error"  # エラー表示（対数は正の数でしか計算できない）
-                    else:
-                        self.result.value = self.format_number(math.log(value))  # 自然対数を計算
-                
-                self.reset()  # 内部状態をリセット
-            except:  # エラーが発生した場合
-                self.result.value = "Error"  # エラー表示
-                self.reset()  # 内部状態をリセット
-
-        # 数字ボタン（0〜9）または小数点が押された場合
-        elif data in ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."):
-            # 現在の表示が"0"または新しい数値の入力開始の場合
-            if self.result.value == "0" or self.new_operand == True:
-                self.result.value = data  # 押された数字で上書き
-                self.new_operand = False  # 入力継続をオフ
-            else:
-                self.result.value = self.result.value + data  # 既存の表示に数字を追加
-        # operandの説明は164行目参照
-
-        # 四則演算ボタン（+、-、×、÷）が押された場合
-        elif data in ("+", "-", "*", "/"):
-            # 前の計算があれば実行（例：5 + 3 + の2回目の+を押したとき、5+3=8を計算）
-            self.result.value = self.calculate(
-                self.operand1, float(self.result.value), self.operator
-            )
-            self.operator = data  # 新しい演算子を保存
-            if self.result.value == "Error":  # エラーの場合
-                self.operand1 = "0"  # 第1operandを0にリセット
-            else:
-                self.operand1 = float(self.result.value)  # 計算結果を第1operandとして保存
-            self.new_operand = True  # 次の入力を新しい数値として受け取る
-            self.power_mode = False  # 累乗モードを解除
-        # operandの説明は164行目参照
-
-        # イコールボタンが押された場合
-        elif data in ("="):
-            # 保存されている計算を実行（例：5 + 3 = の場合、5+3を計算）
-            self.result.value = self.calculate(
-                self.operand1, float(self.result.value), self.operator
-            )
-            self.reset()  # 内部状態をリセット
-            self.power_mode = False  # 累乗モードを解除
-
-        # パーセントボタンが押された場合
-        elif data in ("%"):
-            self.result.value = float(self.result.value) / 100  # 現在の値を100で割る
-            self.reset()  # 内部状態をリセット
-
-        # 正負切り替えボタンが押された場合
-        elif data in ("+/-"):
-            if float(self.result.value) > 0:  # 正の数の場合
-                self.result.value = "-" + str(self.result.value)  # マイナスを付ける
-            elif float(self.result.value) < 0:  # 負の数の場合
-                # マイナスを取って絶対値にする
-                self.result.value = str(
-                    self.format_number(abs(float(self.result.value)))
-                )
-
-        self.update()  # 画面を更新して変更を反映
-            
-    # 数値を見やすい形式に整形する関数
-    def format_number(self, num):
-        # 非常に大きい数（100億以上）または非常に小さい数（0.0000000001未満）の場合
-        if abs(num) > 1e10 or (abs(num) < 1e-10 and num != 0):
-            return f"{num:.6e}"  # 指数表記で表示（例：1.23e+10）
-        elif num % 1 == 0:  # 小数部分が0の場合
-            return int(num)  # 整数として表示
-        else:
-            return round(num, 10)  # 小数点以下10桁する
-
-    # 四則演算と累乗を実際に計算する関数
-    def calculate(self, operand1, operand2, operator):
+    # 計算ボタン：範囲の全ての x をチャンクごとに計算し、途中経過も描きながらグラフにする
+    def draw_clicked(self, e):
         try:
-            if operator == "+":  # 足し算
-                return self.format_number(operand1 + operand2)
-            elif operator == "-":  # 引き算
-                return self.format_number(operand1 - operand2)
-            elif operator == "*":  # 掛け算
-                return self.format_number(operand1 * operand2)
-            elif operator == "/":  # 割り算
-                if operand2 == 0:  # 0で割ろうとした場合
-                    return "Error"  # エラー表示
-                else:
-                    return self.format_number(operand1 / operand2)
-            elif operator == "^":  # 累乗（x^yボタン用）
-                return self.format_number(operand1 ** operand2)  # operand1のoperand2乗を計算
-        except:  # 何らかのエラーが発生した場合
-            return "Error"  # エラー表示
-        # operandの説明は164行目参照
-
-    # 計算機を初期化する
-    def reset(self):
-        self.operator = "+"  # 演算子を初期化（+で初期化すると最初の計算が0+数値になる）
-        self.operand1 = 0  # 第1operandを0にリセット
-        self.new_operand = True  # 次の入力を新しい数値として受け取る
-    # operandの説明は164行目参照
+            sample_range = SampleRange(
+                read_number(self.start_field), read_number(self.stop_field), read_number(self.step_field)
+            )
+            chunks = samples(self.expression_field.value, sample_range, self.angle_mode())
+            sampler = Downsampler(sample_range, PLOT_WIDTH)
+            shown = time.perf_counter()
+            for first, x, values, errors in chunks:
+                sampler.add(first, values, errors)
+                if time.perf_counter() - shown > 0.2:  # 時間がかかるときは途中のグラフを見せる
+                    self.message.value = f"計算中 {sampler.done:,}/{len(sample_range):,}点"
+                    self.show_chart(sampler.columns())
+                    shown = time.perf_counter()
+        except (ValueError, CalcError) as error:  # 範囲や式が正しくない場合
+            self.message.value = f"Error: {error}"
+            self.update()
+            return
+        self.range = sample_range
+        self.expression = self.expression_field.value
+        self.message.value = f"{len(sample_range):,}点"
+        self.scroll.max = max(len(sample_range) - TABLE_ROWS, 1)
+        self.show_chart(sampler.columns())
+        self.scroll_to(0)
+
+    def show_chart(self, columns):
+        low, high = y_range(columns)
+        points = []
+        for x, lo, hi in columns:
+            # 縦軸の外に飛び出した値（tan の 90度付近など）は端で止める
+            points.append(ft.LineChartDataPoint(x, min(max(lo, low), high)))
+            if hi != lo:
+                points.append(ft.LineChartDataPoint(x, min(max(hi, low), high)))
+        self.series.data_points = points
+        self.chart.min_y, self.chart.max_y = low, high
+        self.update()
+
+    # 表のスクロール：見えている行だけを計算する
+    def scroll_changed(self, e):
+        self.scroll_to(int(self.scroll.value))
+
+    def scroll_to(self, first):
+        if self.range is None:
+            return
+        first = min(max(first, 0), max(len(self.range) - TABLE_ROWS, 0))
+        rows = table_rows(self.expression, self.range, first, TABLE_ROWS, self.angle_mode())
+        rows += [("", "")] * (TABLE_ROWS - len(rows))
+        for (x, y), x_cell, y_cell in zip(rows, self.x_cells, self.y_cells):
+            x_cell.value = x
+            y_cell.value = y
+        self.first_row = first
+        self.scroll.value = first
+        self.update()
 
 # アプリを起動する
 def main(page: ft.Page):
     page.title = "Scientific Calculator"  # タイトルを設定
-    calc = CalculatorApp()  # 電卓を作成
-    page.add(calc)  # ページに電卓を追加
+    # CALC_HISTORY_DB にファイル名を指定すると、履歴を保存して次回も使える
+    calc = CalculatorApp(history=History(os.getenv("CALC_HISTORY_DB")))  # 電卓を作成
+    plot = PlotView(angle_mode=lambda: calc.core.angle_mode)  # グラフ・表（電卓の角度モードを使う）
+    # 電卓とグラフ・表をタブで切り替える
+    page.add(ft.Tabs(tabs=[ft.Tab(text="電卓", content=calc), ft.Tab(text="グラフ・表", content=plot)], expand=1))
 
 # アプリを実行
 ft.app(main)
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""画面に依存しない電卓の本体（状態機械）
+
+キー（ボタンの文字）を1つずつ受け取り、表示する文字列を返す。
+Flet・print・画面の更新は一切使わないので、画面なしでベンチマークや
+ファジング（bench/bench_core.py, bench/fuzz_core.py）ができる。
+CalculatorApp（calc.py）はボタンのイベントをこのクラスに渡して、結果を画面に写すだけ。
+"""
+from engine import FLOAT_MODE
+from history import ERROR, compute
+
+# 計算結果の続きとして書き足せる文字（演算子・後ろに付ける記号）
+OPERATOR_STARTS = "+-*/^²!%)"
+
+
+class KeySpec:
+    """電卓のキー1つ分の定義
+
+    key: ボタンの文字（press に渡す値）
+    action: 押したときの処理の名前（ACTIONS のキー）
+    style: ボタンの見た目の名前（calc.py の BUTTON_STYLES のキー）
+    row: 画面の何行目に置くか（同じ行の中は登録した順に左から並ぶ）
+    text: 式に書き足す文字（action が "input" のとき。省略するとボタンの文字）
+    expand: ボタンの幅の比率
+    """
+
+    __slots__ = ("key", "action", "style", "row", "text", "expand")
+
+    def __init__(self, key, action, style, row, text=None, expand=1):
+        self.key = key
+        self.action = action
+        self.style = style
+        self.row = row
+        self.text = text if text is not None else key
+        self.expand = expand
+
+    def __repr__(self):
+        return f"KeySpec({self.key!r}, {self.action}, {self.style}, row={self.row})"
+
+
+# キー -> KeySpec（登録した順に画面に並ぶ）
+KEY_REGISTRY = {}
+
+
+def register_key(spec):
+    """キーを登録する（同じ文字のキーは置き換える）
+
+    関数のボタンを増やすときは、engine の関数表（と各数値モードの functions）に
+    関数を足してから、action="input" のキーを登録するだけでよい。
+    """
+    KEY_REGISTRY[spec.key] = spec
+    return spec
+
+
+def key_rows():
+    """画面の行ごとのキーのリスト（KEY_REGISTRY から作る）"""
+    rows = {}
+    for spec in KEY_REGISTRY.values():
+        rows.setdefault(spec.row, []).append(spec)
+    return [rows[row] for row in sorted(rows)]
+
+
+for _spec in (
+    # 科学計算ボタンの行1（三角関数と累乗）
+    KeySpec("sin", "input", "scientific", 0, "sin("),
+    KeySpec("cos", "input", "scientific", 0, "cos("),
+    KeySpec("tan", "input", "scientific", 0, "tan("),
+    KeySpec("√", "input", "scientific", 0, "√("),
+    KeySpec("x²", "input", "scientific", 0, "²"),
+    KeySpec("xʸ", "input", "scientific", 0, "^"),
+    # 科学計算ボタンの行2（対数、指数、階乗、円周率）
+    KeySpec("log", "input", "scientific", 1, "log("),
+    KeySpec("ln", "input", "scientific", 1, "ln("),
+    KeySpec("eˣ", "input", "scientific", 1, "exp("),
+    KeySpec("10ˣ", "input", "scientific", 1, "10^("),
+    KeySpec("n!", "input", "scientific", 1, "!"),
+    KeySpec("π", "input", "scientific", 1),
+    # 角度モード・数値モードの切り替え、かっこ、履歴の呼び出しの行
+    KeySpec("DEG/RAD", "toggle_angle", "extra", 2),
+    KeySpec("MODE", "next_mode", "extra", 2),
+    KeySpec("(", "input", "extra", 2),
+    KeySpec(")", "input", "extra", 2),
+    KeySpec("↑", "recall", "extra", 2),  # 前の式を呼び出す
+    KeySpec("↓", "recall", "extra", 2),  # 次の式を呼び出す
+    # 特別操作と割り算の行
+    KeySpec("AC", "clear", "extra", 3),
+    KeySpec("+/-", "negate", "extra", 3),
+    KeySpec("%", "input", "extra", 3),
+    KeySpec("/", "input", "action", 3),
+    # 数字と四則演算の行
+    KeySpec("7", "input", "digit", 4),
+    KeySpec("8", "input", "digit", 4),
+    KeySpec("9", "input", "digit", 4),
+    KeySpec("*", "input", "action", 4),
+    KeySpec("4", "input", "digit", 5),
+    KeySpec("5", "input", "digit", 5),
+    KeySpec("6", "input", "digit", 5),
+    KeySpec("-", "input", "action", 5),
+    KeySpec("1", "input", "digit", 6),
+    KeySpec("2", "input", "digit", 6),
+    KeySpec("3", "input", "digit", 6),
+    KeySpec("+", "input", "action", 6),
+    # 数字0（2倍の幅）、小数点、イコールの行
+    KeySpec("0", "input", "digit", 7, expand=2),
+    KeySpec(".", "input", "digit", 7),
+    KeySpec("=", "equals", "action", 7),
+):
+    register_key(_spec)
+
+
+class DisplayState:
+    """画面に表示する内容"""
+
+    __slots__ = ("display", "angle_mode", "mode_label")
+
+    def __init__(self, display, angle_mode, mode_label):
+        self.display = display
+        self.angle_mode = angle_mode
+        self.mode_label = mode_label
+
+    def __eq__(self, other):
+        return isinstance(other, DisplayState) and (
+            (self.display, self.angle_mode, self.mode_label)
+            == (other.display, other.angle_mode, other.mode_label)
+        )
+
+    def __repr__(self):
+        return f"DisplayState({self.display!r}, {self.angle_mode}, {self.mode_label})"
+
+
+def _wrapped(expression):
+    # "-(...)" の形で、先頭のかっこが最後のかっこで閉じているか（"-(2)+(3)" は違う）
+    if not (expression.startswith("-(") and expression.endswith(")")):
+        return False
+    depth = 0
+    for i, c in enumerate(expression[1:], 1):
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                return i == len(expression) - 1
+    return False
+
+
+def negate(expression):
+    """式の正負を切り替える（数値だけなら符号を付け外し、式ならかっこで囲む）"""
+    if not expression:
+        return ""
+    if _wrapped(expression):
+        return expression[2:-1]
+    try:
+        float(expression)
+    except ValueError:
+        return "-(" + expression + ")"
+    return expression[1:] if expression.startswith("-") else "-" + expression
+
+
+class CalculatorCore:
+    """キーの列 -> 表示の列 の状態機械
+
+    history を渡すと計算を記録し、結果のキャッシュと ↑↓ の呼び出しが使える
+    （None なら記録しない。ベンチマークやファジングで記録が増え続けないように）。
+    modes は MODE キーで順に切り替える数値モード。
+    """
+
+    def __init__(self, history=None, modes=None):
+        self.history = history
+        self.modes = list(modes) if modes else [FLOAT_MODE]
+        self.angle_mode = "DEG"  # 角度モード（DEG=度、RAD=ラジアン）
+        self.numeric_mode = self.modes[0]  # 数値モード
+        self.display = "0"  # 表示している文字列
+        self.reset()
+
+    def reset(self):
+        self.expression = ""  # 入力中の式
+        self.new_operand = True  # 次の入力を新しい数値として受け取る
+
+    def state(self):
+        return DisplayState(self.display, self.angle_mode, self.numeric_mode.label)
+
+    def press(self, key):
+        """キーを1つ処理して、表示する文字列を返す（知らないキーは無視する）"""
+        if self.display == ERROR:
+            # エラー表示中はどのキーでもリセットする
+            self.clear()
+        else:
+            spec = KEY_REGISTRY.get(key)
+            if spec is not None:
+                ACTIONS[spec.action](self, spec)
+        return self.display
+
+    # キーの処理（ACTIONS から呼ぶ） -------------------------------------
+
+    def clear(self, spec=None):
+        """AC: 表示と入力中の式を消す"""
+        self.display = "0"
+        self.reset()
+
+    def toggle_angle(self, spec):
+        """角度モードの切り替え（DEG <-> RAD）"""
+        self.angle_mode = "RAD" if self.angle_mode == "DEG" else "DEG"
+
+    def next_mode(self, spec):
+        """数値モードの切り替え（float -> 10進数 -> 分数）"""
+        index = self.modes.index(self.numeric_mode)
+        self.numeric_mode = self.modes[(index + 1) % len(self.modes)]
+
+    def recall(self, spec):
+        """↑↓: 過去の式を呼び出す（=でもう一度計算できる）"""
+        if self.history is not None:
+            entry = self.history.recall(-1 if spec.key == "↑" else 1)
+            self.expression = entry.expression if entry is not None else ""
+            self.new_operand = False
+            self.display = self.expression or "0"
+
+    def equals(self, spec):
+        """=: 式全体を計算する"""
+        self.display = self.evaluate(self.expression)
+        self.reset()
+        if self.display != ERROR:
+            # 結果の続きから計算できるようにする（負の数や分数はかっこで囲む）
+            text = self.display
+            self.expression = f"({text})" if text.startswith("-") or "/" in text else text
+
+    def toggle_sign(self, spec):
+        """+/-: 正負の切り替え"""
+        self.expression = negate(self.expression)
+        self.new_operand = False
+        self.display = self.expression or "0"
+
+    def append(self, spec):
+        """式に書き足す"""
+        text = spec.text
+        # 計算結果の直後に数字や関数を押したら、新しい式を始める
+        if self.new_operand and text[0] not in OPERATOR_STARTS:
+            self.expression = ""
+        self.new_operand = False
+        self.expression += text
+        self.display = self.expression
+
+    def evaluate(self, expression):
+        """式を計算して表示する文字列を返す（計算できなければ "Error"）"""
+        if self.history is not None:
+            return self.history.evaluate(expression, self.angle_mode, self.numeric_mode)
+        return compute(expression, self.angle_mode, self.numeric_mode)
+
+    def run(self, keys):
+        """キーの列を順に処理して、キーごとの表示を返す"""
+        press = self.press
+        return [press(key) for key in keys]
+
+
+# 処理の名前 -> 処理（KeySpec.action で選ぶ。新しい処理は (core, spec) を受け取る関数を足す）
+ACTIONS = {
+    "input": CalculatorCore.append,
+    "clear": CalculatorCore.clear,
+    "negate": CalculatorCore.toggle_sign,
+    "equals": CalculatorCore.equals,
+    "toggle_angle": CalculatorCore.toggle_angle,
+    "next_mode": CalculatorCore.next_mode,
+    "recall": CalculatorCore.recall,
+}
@@ -0,0 +1,462 @@
+import math
+from contextlib import nullcontext
+from functools import lru_cache
+
+import numeric
+from numeric import LargeNumber
+
+# 画面に依存しない計算エンジン
+# 式の文字列（例: "2+3×sin(30)"）を
+#   1. 字句解析（トークンに分ける）
+#   2. 構文解析（演算子の優先順位に従って木にする）
+#   3. コンパイル（スタックで計算する命令の列にする）
+# の順に変換し、命令の列を何度でも素早く計算できるようにする。
+# 数値の種類（float / decimal / 分数）は数値モードで切り替える（FloatMode と numeric_modes.py）。
+
+
+class CalcError(Exception):
+    """計算できない式・値（電卓では "Error" と表示する）"""
+
+
+# ---------------------------------------------------------------- 関数と定数
+
+def _angle(value, angle_mode):
+    # 度モードなら度をラジアンに変換
+    return math.radians(value) if angle_mode == "DEG" else value
+
+
+def _sqrt(x, angle_mode):
+    if x < 0:  # 負の数の平方根は計算できない
+        raise CalcError("負の数の平方根")
+    if isinstance(x, LargeNumber):
+        return LargeNumber.from_log10(x.log10 / 2)
+    return math.sqrt(x)
+
+
+def _log10(x, angle_mode):
+    if x <= 0:  # 対数は正の数でしか計算できない
+        raise CalcError("0以下の対数")
+    if isinstance(x, LargeNumber):
+        return x.log10
+    return math.log10(x)
+
+
+def _ln(x, angle_mode):
+    if x <= 0:
+        raise CalcError("0以下の対数")
+    if isinstance(x, LargeNumber):
+        return x.log10 * numeric.LN10
+    return math.log(x)
+
+
+def _exp(x, angle_mode):
+    # float に収まらなければ、10ˣ や n! と同じく LargeNumber（log10(eˣ) = x / ln10）にする
+    if isinstance(x, LargeNumber):
+        if x.sign < 0:
+            return 0.0
+        raise OverflowError("大きすぎて表示できない")
+    try:
+        return math.exp(x)
+    except OverflowError:
+        return LargeNumber.from_log10(x / numeric.LN10)
+
+
+def _factorial(x, angle_mode):
+    # 170! までは表を引き、それより大きいと log-gamma で求める（巨大な整数は作らない）
+    return numeric.factorial(x)
+
+
+# 関数名 -> 関数（引数は (値, 角度モード)）
+# ここに追加すれば、式の中で使える関数が増える
+FUNCTIONS = {
+    "sin": lambda x, mode: math.sin(_angle(x, mode)),
+    "cos": lambda x, mode: math.cos(_angle(x, mode)),
+    "tan": lambda x, mode: math.tan(_angle(x, mode)),
+    "log": _log10,
+    "ln": _ln,
+    "exp": _exp,
+    "√": _sqrt,
+    "sqrt": _sqrt,
+}
+
+# 後ろに付ける演算子（例: 5! 3² 50%）
+POSTFIX = {
+    "!": _factorial,
+    "²": lambda x, mode: x * x,
+    "%": lambda x, mode: x / 100,
+}
+
+# 変数（グラフや一括計算で、値を差し替えて同じ式を何度も計算する）
+VARIABLES = frozenset(("x", "y"))
+
+# 定数
+CONSTANTS = {
+    "π": math.pi,
+    "pi": math.pi,
+    "e": math.e,
+}
+
+# 2項演算子 -> (優先順位, 右結合か)
+BINARY = {
+    "+": (1, False),
+    "-": (1, False),
+    "*": (2, False),
+    "/": (2, False),
+    "^": (4, True),
+}
+UNARY_MINUS_PRECEDENCE = 3  # -2^2 = -(2^2) になるように ^ より低くする
+
+# 画面の記号を内部の記号にそろえる
+ALIASES = {"×": "*", "÷": "/", "−": "-", "**": "^"}
+
+
+# ---------------------------------------------------------------- 字句解析
+
+NUM, NAME, OP, LPAREN, RPAREN, END = "NUM", "NAME", "OP", "(", ")", "END"
+DIGITS = frozenset("0123456789.")  # str.isdigit() は "²" も数字とみなすので使わない
+
+
+def tokenize(text):
+    """式をトークン (種類, 値) のリストに分ける"""
+    tokens = []
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c.isspace():
+            i += 1
+        elif c in DIGITS:
+            start = i
+            while i < n and text[i] in DIGITS:
+                i += 1
+            # 指数表記（例: 1.5e+10）
+            if i < n and text[i] in "eE" and i + 1 < n and (
+                text[i + 1] in DIGITS or (text[i + 1] in "+-" and i + 2 < n and text[i + 2] in DIGITS)
+            ):
+                i += 2
+                while i < n and text[i] in DIGITS:
+                    i += 1
+            literal = text[start:i]
+            try:
+                float(literal)
+            except ValueError:
+                raise CalcError(f"数値が正しくない: {literal}")
+            # 数値は文字列のまま渡す（decimal / 分数モードで誤差なく読めるように）
+            tokens.append((NUM, literal))
+        elif c.isalpha() and c.isascii():
+            start = i
+            while i < n and text[i].isalpha() and text[i].isascii():
+                i += 1
+            tokens.append((NAME, text[start:i]))
+        elif text.startswith("**", i):
+            tokens.append((OP, "^"))
+            i += 2
+        elif c in ALIASES:
+            tokens.append((OP, ALIASES[c]))
+            i += 1
+        elif c in BINARY or c in POSTFIX:
+            tokens.append((OP, c))
+            i += 1
+        elif c in FUNCTIONS or c in CONSTANTS:
+            tokens.append((NAME, c))
+            i += 1
+        elif c == "(":
+            tokens.append((LPAREN, c))
+            i += 1
+        elif c == ")":
+            tokens.append((RPAREN, c))
+            i += 1
+        else:
+            raise CalcError(f"使えない文字: {c}")
+    tokens.append((END, None))
+    return tokens
+
+
+# ---------------------------------------------------------------- 構文解析
+
+class Parser:
+    """優先順位付きの再帰下降（Pratt）パーサー
+
+    木のノードはタプル:
+      ("num", 書かれた数値・定数の名前) / ("var", 名前) / ("neg", x) / ("bin", 演算子, a, b) / ("call", 関数名, x) / ("post", 演算子, x)
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expression(0)
+        kind, value = self.peek()
+        if kind == RPAREN:
+            raise CalcError("閉じかっこが多い")
+        if kind != END:
+            raise CalcError(f"式が正しくない: {value}")
+        return node
+
+    def starts_operand(self, token):
+        kind, value = token
+        return kind in (NUM, NAME, LPAREN)
+
+    def expression(self, min_precedence):
+        left = self.unary()
+        while True:
+            token = self.peek()
+            kind, value = token
+            if kind == OP and value in BINARY:
+                precedence, right_assoc = BINARY[value]
+            elif self.starts_operand(token):
+                # 2π や 3(4+5) のような省略された掛け算
+                value = "*"
+                precedence, right_assoc = BINARY["*"]
+            else:
+                break
+            if precedence < min_precedence:
+                break
+            if kind == OP:
+                self.next()
+            right = self.expression(precedence if right_assoc else precedence + 1)
+            left = ("bin", value, left, right)
+        return left
+
+    def unary(self):
+        kind, value = self.peek()
+        if kind == OP and value == "-":
+            self.next()
+            return ("neg", self.expression(UNARY_MINUS_PRECEDENCE))
+        if kind == OP and value == "+":
+            self.next()
+            return self.expression(UNARY_MINUS_PRECEDENCE)
+        return self.postfix(self.primary())
+
+    def postfix(self, node):
+        while True:
+            kind, value = self.peek()
+            if kind == OP and value in POSTFIX:
+                self.next()
+                node = ("post", value, node)
+            else:
+                return node
+
+    def primary(self):
+        kind, value = self.next()
+        if kind == NUM:
+            return ("num", value)
+        if kind == LPAREN:
+            node = self.expression(0)
+            if self.peek()[0] == RPAREN:
+                self.next()
+            # 閉じかっこが足りないときは式の最後で閉じたものとみなす
+            elif self.peek()[0] != END:
+                raise CalcError("かっこが正しくない")
+            return node
+        if kind == NAME:
+            if value in CONSTANTS:
+                return ("num", value)
+            if value in VARIABLES:
+                return ("var", value)
+            if value in FUNCTIONS:
+                # sin(30) も sin30 も書ける（かっこが無いときは直後の値だけに掛かる）
+                if self.peek()[0] == LPAREN:
+                    return ("call", value, self.primary())
+                return ("call", value, self.postfix(self.primary()))
+            raise CalcError(f"知らない関数: {value}")
+        if kind == END:
+            raise CalcError("式が途中で終わっている")
+        raise CalcError(f"式が正しくない: {value}")
+
+
+# ---------------------------------------------------------------- コンパイルと計算
+
+# 命令の種類
+PUSH, LOAD, NEG, ADD, SUB, MUL, DIV, POW, CALL, POST = range(10)
+BIN_OPCODES = {"+": ADD, "-": SUB, "*": MUL, "/": DIV, "^": POW}
+
+
+def _emit(node, code):
+    kind = node[0]
+    if kind == "num":
+        # 引数は float の値。書かれた文字列は Program.literals に残す
+        literal = node[1]
+        value = CONSTANTS[literal] if literal in CONSTANTS else float(literal)
+        code.append((PUSH, (value, literal)))
+    elif kind == "var":
+        code.append((LOAD, node[1]))
+    elif kind == "neg":
+        _emit(node[1], code)
+        code.append((NEG, None))
+    elif kind == "bin":
+        _emit(node[2], code)
+        _emit(node[3], code)
+        code.append((BIN_OPCODES[node[1]], None))
+    elif kind == "call":
+        _emit(node[2], code)
+        code.append((CALL, node[1]))
+    elif kind == "post":
+        _emit(node[2], code)
+        code.append((POST, node[1]))
+
+
+class FloatMode:
+    """float で計算する数値モード（ふつうの電卓）
+
+    数値モードは、式の数値の読み込み（number / convert）・関数・累乗・
+    結果の確認（finalize）・表示（format）をまとめたもの。
+    DecimalMode / FractionMode（numeric_modes.py）も同じ形をしている。
+    """
+
+    name = "float"
+    key = ("float",)
+    label = "FLOAT"
+    functions = FUNCTIONS
+    postfix = POSTFIX
+
+    def context(self):
+        return nullcontext()  # float は計算のための設定が要らない
+
+    def number(self, literal):
+        return CONSTANTS[literal] if literal in CONSTANTS else float(literal)
+
+    def convert(self, value):
+        return value
+
+    def power(self, x, y):
+        return numeric.power(x, y)
+
+    def finalize(self, result):
+        if isinstance(result, LargeNumber):  # float に収まらない数は表示用の近似値のまま返す
+            return result
+        if isinstance(result, complex):  # 負の数の小数乗など
+            raise CalcError("複素数になった")
+        try:
+            result = float(result)
+        except OverflowError as e:  # 大きすぎる整数（階乗など）
+            raise CalcError(str(e))
+        if math.isnan(result) or math.isinf(result):
+            raise CalcError("計算できない値")
+        return result
+
+    def format(self, num):
+        """表示用の文字列（大きすぎ・小さすぎる数は指数表記、整数は小数点なし、それ以外は10桁に丸める）"""
+        if abs(num) > 1e10 or (abs(num) < 1e-10 and num != 0):
+            return f"{num:.6e}"
+        elif num % 1 == 0:
+            return str(int(num))
+        else:
+            return str(round(num, 10))
+
+
+FLOAT_MODE = FloatMode()
+
+
+class Program:
+    """コンパイル済みの式（スタックで計算する命令の列）
+
+    命令は (種類, 引数) のタプル。CALL / POST の引数は関数名なので、
+    同じ命令の列を別の実装（batch.py の配列計算など）でも実行できる。
+    PUSH の引数は float の値で、float 以外の数値モードでは
+    書かれた文字列から作り直した命令の列を使う（モードごとに一度だけ作る）。
+    """
+
+    __slots__ = ("source", "code", "literals", "variables", "_mode_code")
+
+    def __init__(self, source, code):
+        self.source = source
+        self.literals = {i: arg[1] for i, (op, arg) in enumerate(code) if op == PUSH}
+        self.code = tuple((op, arg[0]) if op == PUSH else (op, arg) for op, arg in code)
+        # 式の中で使っている変数
+        self.variables = frozenset(arg for op, arg in self.code if op == LOAD)
+        self._mode_code = {FLOAT_MODE.key: self.code}
+
+    def code_for(self, mode):
+        """数値モード用の命令の列（数値をそのモードの型で読み直したもの）"""
+        code = self._mode_code.get(mode.key)
+        if code is None:
+            code = list(self.code)
+            for i, literal in self.literals.items():
+                code[i] = (PUSH, mode.number(literal))
+            code = self._mode_code[mode.key] = tuple(code)
+        return code
+
+    def evaluate(self, angle_mode="DEG", variables=None, mode=FLOAT_MODE):
+        """式を計算して結果を返す（計算できなければ CalcError）
+
+        結果の型は数値モードによる（float か LargeNumber / Decimal / Fraction）。
+        """
+        if mode is FLOAT_MODE:
+            return mode.finalize(self._run(self.code, angle_mode, variables, mode))
+        try:
+            with mode.context():
+                code = self.code_for(mode)
+                return mode.finalize(self._run(code, angle_mode, variables, mode))
+        except CalcError:
+            raise
+        except (ArithmeticError, ValueError, TypeError) as e:
+            raise CalcError(str(e))
+
+    def _run(self, code, angle_mode, variables, mode):
+        functions = mode.functions
+        postfix = mode.postfix
+        convert = mode.convert
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        try:
+            for op, arg in code:
+                if op == PUSH:
+                    push(arg)
+                elif op == CALL:
+                    push(functions[arg](pop(), angle_mode))
+                elif op == POST:
+                    push(postfix[arg](pop(), angle_mode))
+                elif op == LOAD:
+                    if not variables or arg not in variables:
+                        raise CalcError(f"変数 {arg} の値が無い")
+                    push(convert(variables[arg]))
+                elif op == NEG:
+                    push(-pop())
+                else:
+                    b = pop()
+                    a = pop()
+                    if op == ADD:
+                        push(a + b)
+                    elif op == SUB:
+                        push(a - b)
+                    elif op == MUL:
+                        push(a * b)
+                    elif op == DIV:
+                        if b == 0:  # 0で割ろうとした場合
+                            raise CalcError("0で割った")
+                        push(a / b)
+                    else:
+                        push(mode.power(a, b))
+        except CalcError:
+            raise
+        except (ArithmeticError, ValueError, TypeError) as e:
+            raise CalcError(str(e))
+        return stack[-1]
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text):
+    """式をコンパイルする（同じ式は一度だけコンパイルする）"""
+    try:
+        node = Parser(tokenize(text)).parse()
+        code = []
+        _emit(node, code)
+    except RecursionError:  # かっこや関数が深く入れ子になりすぎた式
+        raise CalcError("式の入れ子が深すぎる")
+    return Program(text, code)
+
+
+def evaluate(text, angle_mode="DEG", variables=None, mode=FLOAT_MODE):
+    """式を計算する"""
+    return compile_expression(text).evaluate(angle_mode, variables, mode)
@@ -0,0 +1,194 @@
+"""計算の履歴と結果のキャッシュ
+
+- 計算した式と結果を、順番に追記するだけの記録（History.entries）に残す
+  path を渡すと SQLite にも保存し、次に起動したときに読み込む
+- 同じ式・角度モード・数値モードの計算は結果をキャッシュ（LRU）して、2回目からは計算しない
+  （電卓の計算は同じ入力なら必ず同じ結果になるので、キャッシュしてよい）
+- recall / rerun で過去の式を呼び出して計算し直せる
+- replay.py は記録した計算をまとめて計算し直し、結果が変わっていないか確かめる
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from engine import FLOAT_MODE, CalcError, evaluate
+from numeric_modes import DecimalMode, FractionMode
+
+ERROR = "Error"
+
+
+def mode_id(mode):
+    """数値モードを保存用の文字列にする（例: "float", "decimal:28"）"""
+    return ":".join(str(part) for part in mode.key)
+
+
+_modes = {mode_id(FLOAT_MODE): FLOAT_MODE}
+
+
+def mode_from_id(text):
+    """mode_id の文字列から数値モードを作る（同じ文字列なら同じオブジェクトを返す）"""
+    mode = _modes.get(text)
+    if mode is None:
+        name, _, precision = text.partition(":")
+        if name == "decimal":
+            mode = DecimalMode(int(precision))
+        elif name == "fraction":
+            mode = FractionMode(int(precision))
+        else:
+            raise ValueError(f"知らない数値モード: {text}")
+        _modes[text] = mode
+    return mode
+
+
+class HistoryEntry:
+    """1回の計算の記録"""
+
+    __slots__ = ("seq", "expression", "angle_mode", "mode", "result", "created_at")
+
+    def __init__(self, seq, expression, angle_mode, mode, result, created_at):
+        self.seq = seq  # 何番目の計算か（0から）
+        self.expression = expression
+        self.angle_mode = angle_mode
+        self.mode = mode  # mode_id の文字列
+        self.result = result  # 表示した文字列（計算できなければ "Error"）
+        self.created_at = created_at
+
+    @property
+    def ok(self):
+        return self.result != ERROR
+
+    def __repr__(self):
+        return f"HistoryEntry({self.expression} = {self.result} [{self.angle_mode} {self.mode}])"
+
+
+class ResultCache:
+    """(式, 角度モード, 数値モード) -> 表示する文字列 の LRU キャッシュ"""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)  # 一番長く使っていないものを捨てる
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def compute(expression, angle_mode, mode):
+    """式を計算して表示する文字列を返す（キャッシュも記録も使わない）"""
+    try:
+        return mode.format(evaluate(expression or "0", angle_mode, mode=mode))
+    except CalcError:
+        return ERROR
+
+
+class History:
+    """計算の履歴（追記のみ）と結果のキャッシュ
+
+    path を渡すと SQLite に保存する（None ならメモリの中だけ）。
+    """
+
+    def __init__(self, path=None, cache_size=512, load_limit=1000):
+        self.entries = []
+        self.cache = ResultCache(cache_size)
+        self._lock = threading.Lock()
+        self._conn = None
+        if path is not None:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS calc_history (
+                    seq INTEGER PRIMARY KEY,
+                    expression TEXT NOT NULL,
+                    angle_mode TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            self._conn.commit()
+            self._load(load_limit)
+        self._cursor = len(self.entries)  # recall で今どこを見ているか
+
+    def _load(self, limit):
+        # 前回までの計算のうち、新しいものから limit 件を読み込む
+        rows = self._conn.execute(
+            "SELECT seq, expression, angle_mode, mode, result, created_at "
+            "FROM calc_history ORDER BY seq DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        self.entries = [HistoryEntry(*row) for row in reversed(rows)]
+
+    def evaluate(self, expression, angle_mode="DEG", mode=FLOAT_MODE):
+        """式を計算して表示する文字列を返し、履歴に記録する
+
+        同じ (式, 角度モード, 数値モード) は2回目からキャッシュの結果を返す。
+        """
+        key = (expression, angle_mode, mode.key)
+        result = self.cache.get(key)
+        if result is None:
+            result = compute(expression, angle_mode, mode)
+            if result != ERROR:  # 時間切れなどのエラーは次は計算できるかもしれないので覚えない
+                self.cache.put(key, result)
+        self.record(expression, angle_mode, mode, result)
+        return result
+
+    def record(self, expression, angle_mode, mode, result):
+        """計算を1件記録する"""
+        with self._lock:
+            seq = self.entries[-1].seq + 1 if self.entries else 0
+            entry = HistoryEntry(seq, expression, angle_mode, mode_id(mode), result, time.time())
+            self.entries.append(entry)
+            self._cursor = len(self.entries)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO calc_history VALUES (?, ?, ?, ?, ?, ?)",
+                    (entry.seq, entry.expression, entry.angle_mode, entry.mode,
+                     entry.result, entry.created_at),
+                )
+                self._conn.commit()
+        return entry
+
+    def recall(self, step=-1):
+        """1つ前（step=-1）・1つ後（step=1）の記録を返す（無ければ None）"""
+        with self._lock:
+            if not self.entries:
+                return None
+            self._cursor = min(max(self._cursor + step, 0), len(self.entries))
+            if self._cursor == len(self.entries):
+                return None  # 一番新しい記録より後（入力中の式に戻る）
+            return self.entries[self._cursor]
+
+    def rerun(self, entry, angle_mode=None, mode=None):
+        """記録した式を計算し直す（角度モード・数値モードを変えてもよい）"""
+        angle_mode = angle_mode or entry.angle_mode
+        mode = mode or mode_from_id(entry.mode)
+        return self.evaluate(entry.expression, angle_mode, mode)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
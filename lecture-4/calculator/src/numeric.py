@@ -0,0 +1,285 @@
+"""階乗と累乗の計算（大きな数でも画面が固まらないようにする）
+
+- 表示用（ふつうの電卓の計算）
+  結果が float に収まるときは float を返す。階乗は 0!〜170! の表を引くだけ。
+  float に収まらないときは、巨大な整数を作らずに log-gamma / 対数で
+  LargeNumber（仮数と指数だけを持つ数）を返す。表示は "%.6e" なのでこれで足りる。
+- 正確な計算（exact=True を指定したときだけ）
+  巨大な整数・分数で計算する。桁数と時間の上限（Budget）を超えそうなら BudgetExceeded。
+
+engine.py から使うので、このモジュールは engine を import しない
+（エラーは ValueError / ArithmeticError で返し、engine が CalcError に変える）。
+"""
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from fractions import Fraction
+from functools import total_ordering
+
+LN10 = math.log(10)
+MAX_LOG10 = 1e14  # これより大きい数は log10 の精度が足りず、仮数が正しく出せない
+INLINE_DIGITS = 2000  # これより小さい正確な計算は別スレッドに回さずにその場で行う
+
+
+class BudgetExceeded(ArithmeticError):
+    """計算に時間やメモリがかかりすぎるので打ち切った"""
+
+
+class Budget:
+    """正確な計算の上限
+
+    max_digits: 結果の桁数の上限（メモリの上限）
+    timeout: 1回の計算を待つ秒数（これを過ぎたら結果を待たずに打ち切る）
+    """
+
+    __slots__ = ("max_digits", "timeout")
+
+    def __init__(self, max_digits=20000, timeout=0.05):
+        self.max_digits = max_digits
+        self.timeout = timeout
+
+    def check_digits(self, digits):
+        if digits > self.max_digits:
+            raise BudgetExceeded(f"結果が{self.max_digits}桁を超える（約{digits:.0f}桁）")
+
+
+DEFAULT_BUDGET = Budget()
+
+
+# ---------------------------------------------------------------- float に収まらない数
+
+@total_ordering
+class LargeNumber:
+    """float に収まらない大きな数（符号と常用対数だけを持つ）
+
+    表示（f"{x:.6e}"）と、四則演算・符号反転・比較ができる（計算は対数のまま行う）。
+    """
+
+    __slots__ = ("sign", "log10")
+
+    def __init__(self, sign, log10):
+        if log10 > MAX_LOG10:
+            raise OverflowError("大きすぎて表示できない")
+        self.sign = sign
+        self.log10 = log10
+
+    @classmethod
+    def from_log10(cls, log10, sign=1):
+        """常用対数から作る（float に収まるなら float を返す）"""
+        if log10 < 308:
+            value = 10.0 ** log10
+            if not math.isinf(value):
+                return sign * value
+        return cls(sign, log10)
+
+    def _key(self):
+        return (self.sign, self.sign * self.log10)
+
+    def __float__(self):
+        raise OverflowError("float に収まらない")
+
+    def __abs__(self):
+        return LargeNumber(1, self.log10)
+
+    def __neg__(self):
+        return LargeNumber(-self.sign, self.log10)
+
+    def __add__(self, other):
+        if isinstance(other, LargeNumber):
+            other_sign, other_log = other.sign, other.log10
+        elif other == 0:
+            return self
+        else:
+            other_sign, other_log = (1 if other > 0 else -1), math.log10(abs(other))
+        # 大きい方を基準に log10(a + b) = log10(a) + log10(1 ± b/a) で足す
+        big_sign, big_log, small_sign, small_log = self.sign, self.log10, other_sign, other_log
+        if small_log > big_log:
+            big_sign, big_log, small_sign, small_log = small_sign, small_log, big_sign, big_log
+        ratio = 1 + big_sign * small_sign * 10.0 ** (small_log - big_log)
+        if ratio == 0:
+            return 0.0
+        return LargeNumber.from_log10(big_log + math.log10(abs(ratio)), big_sign if ratio > 0 else -big_sign)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, LargeNumber):
+            return LargeNumber.from_log10(self.log10 + other.log10, self.sign * other.sign)
+        if other == 0:
+            return 0.0
+        sign = self.sign if other > 0 else -self.sign
+        return LargeNumber.from_log10(self.log10 + math.log10(abs(other)), sign)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, LargeNumber):
+            return LargeNumber.from_log10(self.log10 - other.log10, self.sign * other.sign)
+        if other == 0:
+            raise ZeroDivisionError("0で割った")
+        sign = self.sign if other > 0 else -self.sign
+        return LargeNumber.from_log10(self.log10 - math.log10(abs(other)), sign)
+
+    def __rtruediv__(self, other):
+        # 大きな数で割ると、float では 0 に近い数になる
+        if other == 0:
+            return 0.0
+        sign = self.sign if other > 0 else -self.sign
+        return sign * 10.0 ** (math.log10(abs(other)) - self.log10)
+
+    def __eq__(self, other):
+        if isinstance(other, LargeNumber):
+            return self._key() == other._key()
+        return False  # float の値とは等しくならない
+
+    def __lt__(self, other):
+        if isinstance(other, LargeNumber):
+            return self._key() < other._key()
+        return self.sign < 0  # 負なら全ての float より小さい
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def mantissa_exponent(self, digits=6):
+        """仮数（digits 桁に丸めた文字列）と指数"""
+        exponent = math.floor(self.log10)
+        mantissa = f"{10 ** (self.log10 - exponent):.{digits}f}"
+        if mantissa.startswith("10"):  # 9.9999999 が 10.000000 に丸められたとき
+            exponent += 1
+            mantissa = f"{10 ** (self.log10 - exponent):.{digits}f}"
+        return mantissa, exponent
+
+    def __format__(self, spec):
+        # float と同じように "e" の書式だけ受け付ける（例: ".6e"）
+        digits = 6
+        if spec.endswith("e") and spec[:-1].startswith("."):
+            digits = int(spec[1:-1])
+        mantissa, exponent = self.mantissa_exponent(digits)
+        sign = "-" if self.sign < 0 else ""
+        return f"{sign}{mantissa}e+{exponent:02d}"
+
+    def __str__(self):
+        return format(self, ".6e")
+
+    def __repr__(self):
+        return f"LargeNumber({self})"
+
+
+# ---------------------------------------------------------------- 階乗
+
+FLOAT_FACTORIAL_LIMIT = 170  # 171! は float に収まらない
+FLOAT_FACTORIALS = tuple(float(math.factorial(n)) for n in range(FLOAT_FACTORIAL_LIMIT + 1))
+
+EXACT_CACHE_LIMIT = 1000  # ここまでの正確な階乗は覚えておく
+_exact_factorials = [1]
+_exact_lock = threading.Lock()
+
+
+def check_factorial_arg(n):
+    # 階乗は0以上の整数でないと計算できない
+    if n < 0 or n != int(n):
+        raise ValueError("階乗は0以上の整数のみ")
+    return int(n)
+
+
+def factorial_log10(n):
+    """log10(n!)（log-gamma で求めるので n が大きくてもすぐ終わる）"""
+    return math.lgamma(n + 1) / LN10
+
+
+def _exact_factorial(n):
+    if n > EXACT_CACHE_LIMIT:
+        return math.factorial(n)
+    with _exact_lock:
+        table = _exact_factorials
+        for k in range(len(table), n + 1):
+            table.append(table[-1] * k)
+        return table[n]
+
+
+def factorial(n, exact=False, budget=DEFAULT_BUDGET):
+    """n! を計算する
+
+    exact=False（表示用）: float か LargeNumber を返す。時間はほぼ一定。
+    exact=True: 正確な整数を返す（budget を超えそうなら BudgetExceeded）。
+    """
+    n = check_factorial_arg(n)
+    if not exact:
+        if n <= FLOAT_FACTORIAL_LIMIT:
+            return FLOAT_FACTORIALS[n]
+        return LargeNumber.from_log10(factorial_log10(n))
+    digits = factorial_log10(n) + 1
+    budget.check_digits(digits)
+    if n <= EXACT_CACHE_LIMIT or digits <= INLINE_DIGITS:
+        return _exact_factorial(n)
+    return run_limited(_exact_factorial, n, budget=budget)
+
+
+# ---------------------------------------------------------------- 累乗
+
+def _is_integer(y):
+    return y == int(y)
+
+
+def power(x, y, exact=False, budget=DEFAULT_BUDGET):
+    """x の y 乗を計算する
+
+    exact=False（表示用）: float か LargeNumber を返す。
+    exact=True: x が整数・分数、y が整数なら正確な値を返す（budget あり）。
+    """
+    if x == 0 and y < 0:
+        raise ZeroDivisionError("0の負の数乗")
+    if x < 0 and not _is_integer(y):
+        raise ValueError("負の数の小数乗は複素数になる")
+
+    if exact and _is_integer(y) and isinstance(x, (int, Fraction)):
+        y = int(y)
+        if y < 0:
+            x = Fraction(x)  # 整数の負の数乗は分数にする（float にしない）
+        digits = 1
+        if x not in (0, 1, -1):
+            digits += abs(y) * abs(math.log10(abs(x)))
+        budget.check_digits(digits)
+        if digits <= INLINE_DIGITS:
+            return x ** y
+        return run_limited(pow, x, y, budget=budget)
+
+    if isinstance(x, LargeNumber):
+        sign = x.sign if int(y) % 2 == 1 else 1
+        return LargeNumber.from_log10(x.log10 * float(y), sign)
+
+    x = float(x)
+    y = float(y)
+    try:
+        return x ** y
+    except OverflowError:
+        # float に収まらないときは対数で求める（符号は負の数の奇数乗だけ負）
+        sign = -1 if x < 0 and int(y) % 2 == 1 else 1
+        return LargeNumber.from_log10(y * math.log10(abs(x)), sign)
+
+
+# ---------------------------------------------------------------- 時間の上限
+
+_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="numeric")
+
+
+def run_limited(func, *args, budget=DEFAULT_BUDGET):
+    """func(*args) を別スレッドで実行し、budget.timeout 秒以内に終わらなければ打ち切る
+
+    打ち切った計算は裏で最後まで動くが、桁数の上限があるので長くはかからない。
+    ただし math.factorial や整数の累乗は1回の呼び出しの間 GIL を離さないので、
+    その途中では打ち切れない。1回の計算を短く保つのは max_digits の役目で、
+    既定値（2万桁）なら数ミリ秒で終わる。
+    """
+    future = _worker.submit(func, *args)
+    try:
+        return future.result(timeout=budget.timeout)
+    except TimeoutError:
+        future.cancel()
+        raise BudgetExceeded(f"{budget.timeout}秒で計算が終わらなかった")
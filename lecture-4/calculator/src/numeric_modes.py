@@ -0,0 +1,265 @@
+"""float 以外の数値モード（10進数 decimal と分数 fractions）
+
+engine.py は数値モードを受け取り、数値の読み込み・関数・累乗・結果の確認・表示を
+モードに任せる。float モード（FloatMode）は engine.py にあり、ここには
+
+- DecimalMode: decimal で指定した桁数（precision）まで計算する。0.1+0.2 がちょうど 0.3 になる
+- FractionMode: 四則演算・%・²・整数乗・階乗は分数のまま正確に計算する。
+  sin や log のような無理数になる関数は DecimalMode で計算して分数に戻す
+
+を置く。engine と同じく、エラーは ValueError / ArithmeticError で返す。
+"""
+import decimal
+from contextlib import nullcontext
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
+
+import numeric
+
+# Stirling の級数の係数（ln n! = n ln n - n + ln(2πn)/2 + Σ a/b / n^k）
+STIRLING_TERMS = (
+    (1, 12, 1), (-1, 360, 3), (1, 1260, 5), (-1, 1680, 7),
+    (1, 1188, 9), (-691, 360360, 11), (1, 156, 13),
+)
+
+
+@lru_cache(maxsize=16)
+def decimal_pi(precision):
+    """precision 桁の円周率（decimal のドキュメントのレシピ）"""
+    with decimal.localcontext() as ctx:
+        ctx.prec = precision + 2
+        three = Decimal(3)
+        lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != lasts:
+            lasts = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    with decimal.localcontext() as ctx:
+        ctx.prec = precision
+        return +s
+
+
+class DecimalMode:
+    """decimal で precision 桁まで計算するモード"""
+
+    name = "decimal"
+
+    def __init__(self, precision=28):
+        self.precision = precision
+        self.key = ("decimal", precision)  # コンパイル済みの式の定数をモードごとに覚えるためのキー
+        self.label = "DEC"
+        self._context = decimal.Context(
+            prec=precision,
+            traps=[decimal.InvalidOperation, decimal.DivisionByZero, decimal.Overflow],
+        )
+        self.functions = {
+            "sin": self._sin,
+            "cos": self._cos,
+            "tan": self._tan,
+            "log": self._log10,
+            "ln": self._ln,
+            "exp": lambda x, mode: x.exp(),
+            "√": self._sqrt,
+            "sqrt": self._sqrt,
+        }
+        self.postfix = {
+            "!": self._factorial,
+            "²": lambda x, mode: x * x,
+            "%": lambda x, mode: x / 100,
+        }
+
+    def context(self):
+        return decimal.localcontext(self._context)
+
+    # 数値の読み込み -------------------------------------------------
+
+    def number(self, literal):
+        """式の中の数値・定数を Decimal にする（"0.1" は文字列から読むので誤差が無い）"""
+        if literal == "π" or literal == "pi":
+            return decimal_pi(self.precision)
+        if literal == "e":
+            with self.context():
+                return Decimal(1).exp()
+        return self._context.create_decimal(literal)
+
+    def convert(self, value):
+        """変数の値を Decimal にする"""
+        if isinstance(value, Fraction):
+            with self.context():
+                return Decimal(value.numerator) / Decimal(value.denominator)
+        if isinstance(value, float):
+            return self._context.create_decimal_from_float(value)
+        return self._context.create_decimal(value)
+
+    # 関数 -----------------------------------------------------------
+
+    def _radians(self, x, angle_mode):
+        if angle_mode == "DEG":
+            return x * decimal_pi(self.precision + 5) / 180
+        return x
+
+    def _sin_cos(self, x, angle_mode, cos):
+        with decimal.localcontext() as ctx:
+            ctx.prec = self.precision + 5
+            x = self._radians(x, angle_mode)
+            x %= 2 * decimal_pi(ctx.prec)  # 1周より大きい角度は1周の中に戻す
+            # テイラー級数（decimal のドキュメントのレシピ）
+            if cos:
+                i, lasts, s, fact, num, sign = 0, 0, 1, 1, 1, 1
+            else:
+                i, lasts, s, fact, num, sign = 1, 0, x, 1, x, 1
+            while s != lasts:
+                lasts = s
+                i += 2
+                fact *= i * (i - 1)
+                num *= x * x
+                sign *= -1
+                s += num / fact * sign
+        # 誤差で 1e-30 のようになった 0 は 0 にする
+        if abs(s) < Decimal(10) ** -(self.precision + 2):
+            s = Decimal(0)
+        return +s
+
+    def _sin(self, x, angle_mode):
+        return self._sin_cos(x, angle_mode, cos=False)
+
+    def _cos(self, x, angle_mode):
+        return self._sin_cos(x, angle_mode, cos=True)
+
+    def _tan(self, x, angle_mode):
+        cos = self._cos(x, angle_mode)
+        if cos == 0:
+            raise ValueError("tan が無限大になる")
+        return self._sin(x, angle_mode) / cos
+
+    def _log10(self, x, angle_mode):
+        if x <= 0:  # 対数は正の数でしか計算できない
+            raise ValueError("0以下の対数")
+        return x.log10()
+
+    def _ln(self, x, angle_mode):
+        if x <= 0:
+            raise ValueError("0以下の対数")
+        return x.ln()
+
+    def _sqrt(self, x, angle_mode):
+        if x < 0:  # 負の数の平方根は計算できない
+            raise ValueError("負の数の平方根")
+        return x.sqrt()
+
+    def _factorial(self, x, angle_mode):
+        n = numeric.check_factorial_arg(x)
+        digits = numeric.factorial_log10(n) + 1
+        if digits <= numeric.DEFAULT_BUDGET.max_digits:
+            return self._context.create_decimal(numeric.factorial(n, exact=True))
+        return self._stirling(n)
+
+    def _stirling(self, n):
+        # 正確な値が大きすぎるときは Stirling の級数で precision 桁だけ求める
+        # （n が大きいので数項で precision 桁に収束する）
+        with decimal.localcontext() as ctx:
+            exponent_digits = len(str(int(numeric.factorial_log10(n))))
+            ctx.prec = self.precision + exponent_digits + 10
+            ctx.Emax = decimal.MAX_EMAX
+            n = Decimal(n)
+            ln_fact = n * n.ln() - n + (2 * decimal_pi(ctx.prec) * n).ln() / 2
+            for a, b, k in STIRLING_TERMS:
+                ln_fact += Decimal(a) / (b * n ** k)
+            result = ln_fact.exp()
+        return +result
+
+    def power(self, x, y):
+        if x == 0 and y < 0:
+            raise ZeroDivisionError("0の負の数乗")
+        if x < 0 and y != y.to_integral_value():
+            raise ValueError("負の数の小数乗は複素数になる")
+        return x ** y
+
+    # 結果 -----------------------------------------------------------
+
+    def finalize(self, result):
+        result = +self.convert(result) if not isinstance(result, Decimal) else +result
+        if not result.is_finite():
+            raise ValueError("計算できない値")
+        return result
+
+    def format(self, num):
+        """表示用の文字列（大きすぎ・小さすぎる数は指数表記、それ以外は precision 桁まで）"""
+        if num.is_zero():
+            return "0"
+        magnitude = abs(num)
+        if magnitude > 10 ** 10 or magnitude < Decimal("1e-10"):
+            return f"{num:.6e}"
+        if num == num.to_integral_value():
+            return str(int(num))
+        return format(num.normalize(), "f")
+
+
+class FractionMode:
+    """分数で正確に計算するモード"""
+
+    name = "fraction"
+
+    def __init__(self, precision=34, max_denominator_digits=6):
+        self.key = ("fraction", precision)
+        self.label = "FRAC"
+        # 無理数になる関数は、この桁数の DecimalMode で計算して分数に戻す
+        self.decimal = DecimalMode(precision)
+        self.max_denominator = 10 ** max_denominator_digits  # これより大きい分母は小数で表示する
+        self.functions = {
+            name: self._via_decimal(func) for name, func in self.decimal.functions.items()
+        }
+        self.postfix = {
+            "!": lambda x, mode: Fraction(numeric.factorial(x, exact=True)),
+            "²": lambda x, mode: x * x,
+            "%": lambda x, mode: x / 100,
+        }
+
+    def context(self):
+        return nullcontext()
+
+    def _via_decimal(self, func):
+        def call(x, angle_mode):
+            with self.decimal.context():
+                return Fraction(func(self.decimal.convert(x), angle_mode))
+        return call
+
+    def number(self, literal):
+        if literal in ("π", "pi", "e"):
+            return Fraction(self.decimal.number(literal))
+        return Fraction(literal)
+
+    def convert(self, value):
+        return Fraction(value)
+
+    def power(self, x, y):
+        if y.denominator == 1:
+            # 整数乗は分数のまま正確に計算する（桁数・時間の上限あり）
+            return Fraction(numeric.power(x, y.numerator, exact=True))
+        if x < 0:
+            raise ValueError("負の数の小数乗は複素数になる")
+        if x == 0:
+            return Fraction(0)
+        with self.decimal.context():
+            return Fraction(self.decimal.convert(x) ** self.decimal.convert(y))
+
+    def finalize(self, result):
+        return Fraction(result)
+
+    def format(self, num):
+        """整数はそのまま、分母が小さければ "分子/分母"、それ以外は小数で表示する"""
+        if num == 0:
+            return "0"
+        with self.decimal.context():
+            approx = self.decimal.convert(num)
+        magnitude = abs(num)
+        if magnitude > 10 ** 10 or magnitude < Fraction(1, 10 ** 10):
+            return f"{approx:.6e}"
+        if num.denominator == 1:
+            return str(num.numerator)
+        if num.denominator <= self.max_denominator:
+            return f"{num.numerator}/{num.denominator}"
+        return self.decimal.format(approx)
@@ -0,0 +1,168 @@
+"""関数の値を範囲でまとめて計算する（グラフ・表モード）
+
+sin(x) を x = 0〜360（0.01刻み）のように、範囲の全ての x で計算する。
+
+- x は SampleRange が必要な分だけ作り、samples() がチャンク（既定 65536 個）ずつ
+  batch.run で計算して返す。100万点の範囲でもメモリは1チャンク分しか使わない
+- グラフは Downsampler で画面の横幅（ピクセルの列）ごとの最小値・最大値にまとめる。
+  描く点は列の数の2倍だけで、尖った山や谷も消えない
+- 表は table_rows() で見えている行だけを計算する
+
+計算は batch.run で行うので、式・関数・角度モード・エラーの規則は電卓と同じ。
+"""
+import math
+
+from batch import KEY_EXPRESSIONS, format_results, format_value, np, run
+from engine import compile_expression
+from numeric import LargeNumber
+
+CHUNK = 65536  # 一度に計算する x の数
+MAX_SAMPLES = 100_000_000  # これより多い範囲は刻みが細かすぎるとみなす
+
+
+class SampleRange:
+    """start から stop まで step 刻みの x（両端を含む。値は必要なときに作る）"""
+
+    __slots__ = ("start", "stop", "step", "count")
+
+    def __init__(self, start, stop, step):
+        if not all(math.isfinite(v) for v in (start, stop, step)):
+            raise ValueError("範囲は有限の数で指定する")
+        if step <= 0:
+            raise ValueError("刻みは正の数")
+        if stop < start:
+            raise ValueError("終わりが始めより小さい")
+        # 浮動小数点の誤差で最後の点が落ちないように少しだけ余裕を持たせる
+        count = math.floor((stop - start) / step + 1e-9) + 1
+        if count > MAX_SAMPLES:
+            raise ValueError(f"点が多すぎる（{count}点、上限 {MAX_SAMPLES}点）")
+        self.start = start
+        self.stop = stop
+        self.step = step
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def value(self, i):
+        """i 番目の x（足し合わせずに毎回掛け算で求めるので誤差がたまらない）"""
+        return self.start + i * self.step
+
+    def values(self, first, last):
+        """first 番目から last 番目の手前までの x"""
+        if np is not None:
+            return self.start + np.arange(first, last, dtype=np.float64) * self.step
+        return [self.start + i * self.step for i in range(first, last)]
+
+
+def expression_for(text):
+    """ボタンの名前（"sin" や "n!"）なら x の式にし、それ以外は式としてそのまま使う"""
+    text = text.strip()
+    return KEY_EXPRESSIONS.get(text, text)
+
+
+def samples(expression, sample_range, angle_mode="DEG", first=0, last=None, chunk=CHUNK):
+    """(最初の番号, x, 値, エラーのマスク) をチャンクごとに返すジェネレーター"""
+    program = compile_expression(expression_for(expression))  # 式の誤りはここで CalcError
+    last = len(sample_range) if last is None else min(last, len(sample_range))
+    for lo in range(first, last, chunk):
+        x = sample_range.values(lo, min(lo + chunk, last))
+        values, errors = run(program, x, angle_mode)
+        yield lo, x, values, errors
+
+
+def _plottable(values, errors):
+    # グラフに描ける値（float）と、描けない要素のマスク（エラー・無限大・LargeNumber）
+    if np is None:
+        return [
+            math.nan if bad or isinstance(v, LargeNumber) or not math.isfinite(v) else v
+            for v, bad in zip(values, errors)
+        ]
+    if values.dtype == object:
+        values = np.array([math.nan if isinstance(v, LargeNumber) else v for v in values.tolist()])
+    return np.where(np.asarray(errors) | ~np.isfinite(values), np.nan, values)
+
+
+class Downsampler:
+    """サンプルを横幅 width の列ごとの最小値・最大値にまとめる
+
+    i 番目のサンプルは i * width // 点の数 番目の列に入る。
+    描ける値が1つも無い列（全てエラーなど）は nan のまま残る。
+    """
+
+    def __init__(self, sample_range, width):
+        self.range = sample_range
+        self.width = max(1, min(width, len(sample_range)))
+        self.done = 0  # まとめたサンプルの数
+        if np is not None:
+            self.low = np.full(self.width, np.nan)
+            self.high = np.full(self.width, np.nan)
+        else:
+            self.low = [math.nan] * self.width
+            self.high = [math.nan] * self.width
+
+    def add(self, first, values, errors):
+        """first 番目から始まるサンプルのチャンクを加える"""
+        values = _plottable(values, errors)
+        n = len(self.range)
+        if np is None:
+            for i, v in enumerate(values, first):
+                if v == v:  # nan でない
+                    c = i * self.width // n
+                    low, high = self.low[c], self.high[c]
+                    self.low[c] = v if not low <= v else low
+                    self.high[c] = v if not high >= v else high
+        elif len(values):
+            columns = np.arange(first, first + len(values), dtype=np.int64) * self.width // n
+            # 列の番号は増えていくだけなので、列の境目ごとにまとめて最小・最大を取る
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(columns)) + 1))
+            columns = columns[starts]
+            # fmin / fmax は nan を無視する（列の全てが nan なら nan）
+            self.low[columns] = np.fmin(self.low[columns], np.fmin.reduceat(values, starts))
+            self.high[columns] = np.fmax(self.high[columns], np.fmax.reduceat(values, starts))
+        self.done += len(values)
+
+    def column_x(self, column):
+        """列の最初のサンプルの x"""
+        n = len(self.range)
+        return self.range.value(-(-column * n // self.width))
+
+    def columns(self):
+        """描ける列の (x, 最小値, 最大値) のリスト"""
+        low, high = self.low, self.high
+        if np is not None:
+            low, high = low.tolist(), high.tolist()
+        return [
+            (self.column_x(c), lo, hi)
+            for c, (lo, hi) in enumerate(zip(low, high))
+            if lo == lo
+        ]
+
+
+def downsample(expression, sample_range, width, angle_mode="DEG"):
+    """範囲の全ての x で計算して、横幅 width の列ごとの (x, 最小値, 最大値) を返す"""
+    sampler = Downsampler(sample_range, width)
+    for first, x, values, errors in samples(expression, sample_range, angle_mode):
+        sampler.add(first, values, errors)
+    return sampler.columns()
+
+
+def y_range(columns, margin=0.1):
+    """グラフの縦軸の範囲（1本だけ飛び出した値で全体が潰れないように、両端1%は外す）"""
+    if not columns:
+        return -1.0, 1.0
+    lows = sorted(lo for x, lo, hi in columns)
+    highs = sorted(hi for x, lo, hi in columns)
+    cut = len(columns) // 100
+    low, high = lows[cut], highs[-1 - cut]
+    pad = (high - low) * margin or max(abs(low) * margin, 1.0)
+    return low - pad, high + pad
+
+
+def table_rows(expression, sample_range, first, count, angle_mode="DEG"):
+    """first 番目から count 行の (x, 値) を表示する文字列で返す（見えている行だけ計算する）"""
+    rows = []
+    for lo, x, values, errors in samples(expression, sample_range, angle_mode, first, first + count):
+        x = x.tolist() if np is not None else x
+        rows.extend(zip((format_value(v) for v in x), format_results(values, errors)))
+    return rows
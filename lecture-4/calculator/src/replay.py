@@ -0,0 +1,91 @@
+"""記録した計算をまとめて計算し直す（回帰テスト用）
+
+    python replay.py calc_history.db            # 全ての記録を計算し直して結果を比べる
+    python replay.py calc_history.db --cache    # 結果のキャッシュを使う（2回目以降の同じ式はすぐ終わる）
+
+画面を使わずに engine だけで計算するので、何千件の記録でもすぐに終わる。
+結果が記録と違う計算があれば表示して、終了コード 1 で終わる。
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from history import ERROR, History, ResultCache, compute, mode_from_id
+
+
+class ReplayReport:
+    """計算し直した結果のまとめ"""
+
+    __slots__ = ("total", "mismatches", "elapsed", "cache_hits")
+
+    def __init__(self, total, mismatches, elapsed, cache_hits):
+        self.total = total
+        self.mismatches = mismatches  # (記録, 今の結果) のリスト
+        self.elapsed = elapsed
+        self.cache_hits = cache_hits
+
+    @property
+    def ok(self):
+        return not self.mismatches
+
+
+def replay(entries, cache=None):
+    """記録（HistoryEntry のリスト）を順に計算し直して、記録と違うものを集める"""
+    mismatches = []
+    hits_before = cache.hits if cache is not None else 0
+    start = time.perf_counter()
+    for entry in entries:
+        mode = mode_from_id(entry.mode)
+        result = None
+        key = (entry.expression, entry.angle_mode, mode.key)
+        if cache is not None:
+            result = cache.get(key)
+        if result is None:
+            result = compute(entry.expression, entry.angle_mode, mode)
+            if cache is not None and result != ERROR:
+                cache.put(key, result)
+        if result != entry.result:
+            mismatches.append((entry, result))
+    elapsed = time.perf_counter() - start
+    hits = (cache.hits - hits_before) if cache is not None else 0
+    return ReplayReport(len(entries), mismatches, elapsed, hits)
+
+
+def load_entries(path):
+    """SQLite に保存した履歴を全て読み込む（ファイルが無ければ FileNotFoundError）"""
+    # sqlite3.connect は無いファイルを空のデータベースとして作ってしまい、0件のまま成功になる
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"履歴のファイルがありません: {path}")
+    history = History(path, load_limit=-1)  # LIMIT -1 は全件
+    try:
+        return history.entries
+    finally:
+        history.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="記録した計算を計算し直して結果を比べる")
+    parser.add_argument("path", help="履歴の SQLite ファイル")
+    parser.add_argument("--cache", action="store_true", help="結果のキャッシュを使う")
+    args = parser.parse_args(argv)
+
+    try:
+        entries = load_entries(args.path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"履歴を読み込めませんでした: {e}", file=sys.stderr)
+        return 2
+
+    report = replay(entries, ResultCache(maxsize=4096) if args.cache else None)
+    for entry, result in report.mismatches:
+        print(f"#{entry.seq} {entry.expression} [{entry.angle_mode} {entry.mode}]: "
+              f"記録 {entry.result} / 今 {result}")
+    rate = report.total / report.elapsed if report.elapsed else 0
+    print(f"{report.total}件 {report.elapsed * 1000:.1f}ms（{rate:.0f}件/秒、キャッシュ {report.cache_hits}件）"
+          f" 不一致 {len(report.mismatches)}件")
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""天気予報のパース＋表示準備にかかる時間を比べるベンチマーク
+
+bench/data/forecast_*.json（保存しておいた気象庁の forecast JSON）を使う:
+
+    python bench/bench_forecast.py --variants 50
+
+forecast_model は時刻と日付の表示を timeDefines ごとに lru_cache で覚えるので、同じ JSON を繰り返すと
+2回目からはキャッシュに当たる。実際のアプリでは新しい予報ごとに timeDefines が変わるので、
+保存した JSON の日付を1日ずつずらしたものを --variants 個作り、キャッシュを空にしてから全てを1回ずつ処理する
+（cold）。同じ JSON を繰り返す場合（warm）も表示する。
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from forecast_model import parse_forecast, parse_time_defines, time_labels  # noqa: E402
+
+
+def legacy(weather_data):
+    """これまでの display_weather と同じ走査（カードごとに日付をパース）"""
+    cards = []
+    for forecast in weather_data:
+        for series in forecast.get("timeSeries", []):
+            time_defines = series.get("timeDefines", [])
+            for area in series.get("areas", []):
+                weathers = area.get("weathers", [])
+                winds = area.get("winds", [])
+                waves = area.get("waves", [])
+                temps = area.get("temps", [])
+                if weathers:
+                    for i, (time_def, weather) in enumerate(zip(time_defines, weathers)):
+                        try:
+                            dt = datetime.fromisoformat(time_def.replace('Z', '+00:00'))
+                            date_str = dt.strftime('%m月%d日')
+                            day_str = ['月', '火', '水', '木', '金', '土', '日'][dt.weekday()]
+                        except ValueError:
+                            date_str = time_def[:10]
+                            day_str = ""
+                        wind_text = winds[i] if i < len(winds) else ""
+                        wave_text = waves[i] if i < len(waves) else ""
+                        temp_text = temps[i] if i < len(temps) else ""
+                        temp_val = None
+                        if temp_text:
+                            try:
+                                temp_val = int(temp_text)
+                            except ValueError:
+                                pass
+                        cards.append((f"{date_str}({day_str})", weather, temp_val, wind_text, wave_text))
+    return cards
+
+
+def model(weather_data):
+    """forecast_model で1回パースしてから型付きのフィールドを読む"""
+    cards = []
+    for s in parse_forecast(weather_data).weather_areas:
+        for i in range(min(len(s.times), len(s.weathers))):
+            wind = s.winds[i] if i < len(s.winds) else ""
+            wave = s.waves[i] if i < len(s.waves) else ""
+            cards.append((s.labels[i], s.weathers[i], s.temp(i), wind, wave))
+    return cards
+
+
+def shifted(payload, days):
+    """timeDefines と reportDatetime を days 日ずらした JSON"""
+    def shift(text):
+        return (datetime.fromisoformat(text) + timedelta(days=days)).isoformat()
+
+    result = json.loads(json.dumps(payload))
+    for forecast in result:
+        if "reportDatetime" in forecast:
+            forecast["reportDatetime"] = shift(forecast["reportDatetime"])
+        for series in forecast.get("timeSeries", []):
+            series["timeDefines"] = [shift(t) for t in series.get("timeDefines", [])]
+    return result
+
+
+def measure(func, payloads, repeat):
+    """payloads を1回ずつ処理する時間（1件あたり、repeat 回の最小）。毎回キャッシュを空にしてから"""
+    best = float("inf")
+    for _ in range(repeat):
+        parse_time_defines.cache_clear()
+        time_labels.cache_clear()
+        start = time.perf_counter()
+        for payload in payloads:
+            func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best / len(payloads)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variants", type=int, default=50, help="日付をずらして作る JSON の数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pattern = os.path.join(os.path.dirname(__file__), "data", "forecast_*.json")
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        payloads = [shifted(payload, days) for days in range(args.variants)]
+        for p in payloads:
+            assert [c[:2] for c in legacy(p)] == [c[:2] for c in model(p)]
+
+        print(f"{os.path.basename(path)}（日付をずらして {len(payloads)}個）")
+        for name, func in (("legacy", legacy), ("model", model)):
+            cold = measure(func, payloads, args.repeat)
+            warm = measure(func, [payload] * len(payloads), args.repeat)
+            print(f"  {name:7s} cold {cold * 1e6:8.1f} µs/回  warm {warm * 1e6:8.1f} µs/回")
+
+
+if __name__ == "__main__":
+    main()
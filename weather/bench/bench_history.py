@@ -0,0 +1,90 @@
+"""履歴DB（history.py）の書き込み速度と検索時間のベンチマーク
+
+bench/data/forecast_*.json の発表時刻と予報時刻をずらしながら、
+数十の気象台 × 数十日分の発表を保存し、気温の推移を検索する:
+
+    python bench/bench_history.py --offices 50 --days 30
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from history import SnapshotStore  # noqa: E402
+
+
+def shift_times(text, delta):
+    """JSON文字列の中の時刻を delta だけずらす"""
+    def shift(value):
+        try:
+            return (datetime.fromisoformat(value) + delta).isoformat()
+        except ValueError:
+            return value
+
+    def walk(node):
+        if isinstance(node, dict):
+            return {k: walk(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [walk(v) for v in node]
+        if isinstance(node, str) and len(node) == 25 and node[10] == "T":
+            return shift(node)
+        return node
+
+    return walk(json.loads(text))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offices", type=int, default=50)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--per-day", type=int, default=3, help="1日あたりの発表回数")
+    args = parser.parse_args()
+
+    pattern = os.path.join(os.path.dirname(__file__), "data", "forecast_*.json")
+    with open(sorted(glob.glob(pattern))[0], encoding="utf-8") as f:
+        template = f.read()
+
+    # 基準の発表を「今日」にそろえる
+    base = datetime.fromisoformat(json.loads(template)[0]["reportDatetime"])
+    now = datetime.now(base.tzinfo)
+    payloads = []
+    for n in range(args.days * args.per_day):
+        delta = (now - base) - timedelta(hours=24 / args.per_day * n)
+        payloads.append(shift_times(template, delta))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SnapshotStore(os.path.join(tmp, "history.db"))
+
+        rows = 0
+        start = time.perf_counter()
+        for office in range(args.offices):
+            code = f"{office:02d}0000"
+            for payload in payloads:
+                rows += store.record_forecast(code, payload)
+        elapsed = time.perf_counter() - start
+        snapshots = args.offices * len(payloads)
+        print(f"保存: {snapshots}発表 / {rows}行 {elapsed:.2f}秒 "
+              f"({rows / elapsed:,.0f}行/秒, {elapsed / snapshots * 1000:.2f}ms/発表)")
+
+        for label, kwargs in (("気象台全体", {}), ("1地域", {"area_code": "44132"})):
+            number = 200
+            start = time.perf_counter()
+            for _ in range(number):
+                trend = store.temperature_trend("000000", days=30, **kwargs)
+            ms = (time.perf_counter() - start) / number * 1000
+            print(f"検索（{label}, 30日）: {len(trend)}件 {ms:.2f}ms/回")
+
+        start = time.perf_counter()
+        store.latest_forecast("000000")
+        print(f"最新の発表を読み込み: {(time.perf_counter() - start) * 1000:.2f}ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""地域検索（area_search.py）のインデックス作成時間と検索時間のベンチマーク
+
+保存しておいた area.json を使う:
+
+    python bench/bench_search.py --area-json bench/data/area.json
+
+--area-json を省略すると、実際の area.json と同じくらいの件数の地域を生成して使う。
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from area_search import AreaIndex  # noqa: E402
+
+KANJI = "北南東西中央上下山川田島原野宮崎本松井石木林森沢谷浜岡長高大小新市町村郡"
+KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわ"
+
+
+def generate_area_json(seed=0):
+    """実際の area.json と同じくらいの件数（約2500地域）の階層を作る"""
+    rng = random.Random(seed)
+
+    def name(n):
+        return "".join(rng.choice(KANJI) for _ in range(n))
+
+    def kana(n):
+        return "".join(rng.choice(KANA) for _ in range(n))
+
+    data = {key: {} for key in ("centers", "offices", "class10s", "class15s", "class20s")}
+    for c in range(11):
+        center = f"{c + 1:02d}0100"
+        data["centers"][center] = {"name": name(2) + "地方", "children": []}
+        for o in range(5):
+            office = f"{c + 1:02d}{o}000"
+            data["centers"][center]["children"].append(office)
+            data["offices"][office] = {"name": name(2) + "県", "parent": center, "children": []}
+            for k in range(3):
+                c10 = f"{office[:4]}{k}0"
+                data["offices"][office]["children"].append(c10)
+                data["class10s"][c10] = {"name": name(2) + "部", "parent": office, "children": []}
+                for m in range(2):
+                    c15 = f"{c10[:5]}{m}"
+                    data["class10s"][c10]["children"].append(c15)
+                    data["class15s"][c15] = {"name": name(3), "parent": c10, "children": []}
+                    for t in range(6):
+                        c20 = f"{c15}{t}0"
+                        data["class15s"][c15]["children"].append(c20)
+                        data["class20s"][c20] = {
+                            "name": name(2) + rng.choice("市町村"),
+                            "kana": kana(rng.randint(3, 6)),
+                            "parent": c15,
+                        }
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--area-json", help="保存しておいた area.json")
+    args = parser.parse_args()
+
+    if args.area_json:
+        with open(args.area_json, encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = generate_area_json()
+
+    start = time.perf_counter()
+    index = AreaIndex.from_area_json(data)
+    print(f"インデックス作成: {len(index)}地域 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    # 入力途中の文字列も含めて、実際の名前から検索語を作る
+    rng = random.Random(1)
+    queries = []
+    for i in rng.sample(range(len(index)), 300):
+        text = index.kanas[i] or index.names[i]
+        for n in range(1, len(text) + 1):
+            queries.append(text[:n])
+    for i in rng.sample(range(len(index)), 300):
+        queries.append(index.names[i][1:3])  # 部分一致
+
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    print(f"検索: {len(queries)}回 平均 {sum(times) / len(times) * 1e6:.0f}µs "
+          f"p50 {times[len(times) // 2] * 1e6:.0f}µs "
+          f"p99 {times[int(len(times) * 0.99)] * 1e6:.0f}µs "
+          f"最大 {times[-1] * 1e6:.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
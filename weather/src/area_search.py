@@ -0,0 +1,188 @@
+import heapq
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+
+# area.json の階層（上から順に）
+LEVELS = ("centers", "offices", "class10s", "class15s", "class20s")
+CENTER, OFFICE, CLASS10, CLASS15, CLASS20 = range(len(LEVELS))
+
+
+def normalize(text):
+    """検索用に文字をそろえる（全角/半角・大文字/小文字・カタカナ/ひらがな）"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    # カタカナ（ァ〜ヶ）をひらがなにする
+    return "".join(chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c for c in text)
+
+
+class AreaIndex:
+    """area.json の全階層（地方〜市区町村）を配列で持つ検索用インデックス
+
+    地域には 0 から始まる番号を振り、名前や親の番号はその番号で引く配列に入れる。
+    子の一覧は children[child_start[i]:child_start[i + 1]] に並んでいる。
+    検索は次の2つを使う:
+    - 名前・読みの先頭一致（並べ替えた名前のリストを二分探索）
+    - 名前・読みに含まれる2文字（1文字）ごとの地域番号リスト（部分一致）
+    """
+
+    def __init__(self):
+        self.codes = []
+        self.names = []
+        self.kanas = []
+        self.levels = array('b')
+        self.parents = array('i')
+        self.child_start = array('i')
+        self.children = array('i')
+        self.code_to_id = {}
+        self._texts = []  # 地域ごとの normalize 済みの「名前\t読み」（部分一致の確認用）
+        self._sorted = []  # (文字列, 地域番号) を並べ替えたもの（先頭一致用）
+        self._grams = {}  # 1文字・2文字 -> その文字を含む地域番号の array（昇順）
+        self._last_query = None
+        self._last_candidates = None
+
+    @classmethod
+    def from_area_json(cls, data):
+        """area.json の辞書からインデックスを作る"""
+        index = cls()
+        parent_codes = []
+        for level, key in enumerate(LEVELS):
+            for code, info in data.get(key, {}).items():
+                # 同じコードが別の階層にもある（気象台と class10 など）ので階層も区別する
+                index.code_to_id[(level, code)] = len(index.codes)
+                index.codes.append(code)
+                index.names.append(info.get("name", ""))
+                index.kanas.append(info.get("kana", ""))
+                index.levels.append(level)
+                parent_codes.append(info.get("parent"))
+
+        # 親の番号（1つ上の階層から探す。地方の parent は無い）
+        for i, parent_code in enumerate(parent_codes):
+            parent_id = -1
+            if parent_code is not None:
+                parent_id = index.code_to_id.get((index.levels[i] - 1, parent_code), -1)
+            index.parents.append(parent_id)
+
+        # 子の一覧（親ごとにまとめて1本の配列に並べる）
+        counts = [0] * (len(index.codes) + 1)
+        for p in index.parents:
+            if p >= 0:
+                counts[p + 1] += 1
+        for i in range(len(index.codes)):
+            counts[i + 1] += counts[i]
+        index.child_start = array('i', counts)
+        fill = list(counts)
+        children = [0] * counts[-1]
+        for i, p in enumerate(index.parents):
+            if p >= 0:
+                children[fill[p]] = i
+                fill[p] += 1
+        index.children = array('i', children)
+
+        index._build_search()
+        return index
+
+    def _build_search(self):
+        grams = {}
+        keys = []
+        for i, (name, kana) in enumerate(zip(self.names, self.kanas)):
+            name, kana = normalize(name), normalize(kana)
+            self._texts.append(f"{name}\t{kana}")
+            for text in {name, kana}:
+                if not text:
+                    continue
+                keys.append((text, i))
+                seen = set()
+                for n in (1, 2):
+                    for j in range(len(text) - n + 1):
+                        gram = text[j:j + n]
+                        if gram not in seen:
+                            seen.add(gram)
+                            grams.setdefault(gram, []).append(i)
+        # 同じ地域が名前と読みの両方で入ることがあるので重複を除く
+        self._grams = {g: array('i', sorted(set(ids))) for g, ids in grams.items()}
+        self._sorted = sorted(keys)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def id_of(self, level, code):
+        return self.code_to_id.get((level, code))
+
+    def child_ids(self, i):
+        return self.children[self.child_start[i]:self.child_start[i + 1]]
+
+    def ancestor(self, i, level):
+        """地域 i の、指定した階層の親（無ければNone）"""
+        while i >= 0 and self.levels[i] > level:
+            i = self.parents[i]
+        if i >= 0 and self.levels[i] == level:
+            return i
+        return None
+
+    def office_of(self, i):
+        """地域 i の天気予報を出している気象台の番号（地方ならNone）"""
+        return self.ancestor(i, OFFICE)
+
+    def path(self, i):
+        """地方から地域 i までの名前"""
+        names = []
+        while i >= 0:
+            names.append(self.names[i])
+            i = self.parents[i]
+        return list(reversed(names))
+
+    def _candidates(self, q):
+        """q を含む可能性がある地域番号"""
+        # 入力を1文字ずつ足しているときは、前回の候補から絞り込む
+        if self._last_query and q.startswith(self._last_query):
+            base = self._last_candidates
+        else:
+            grams = [q] if len(q) == 1 else [q[j:j + 2] for j in range(len(q) - 1)]
+            lists = []
+            for gram in set(grams):
+                ids = self._grams.get(gram)
+                if ids is None:
+                    return []
+                lists.append(ids)
+            lists.sort(key=len)
+            base = lists[0]
+            for other in lists[1:]:
+                allowed = set(other)
+                base = [i for i in base if i in allowed]
+        # 2文字ずつの一致だけでは順番が合っているか分からないので、実際に含まれるか確かめる
+        texts = self._texts
+        result = [i for i in base if q in texts[i]]
+        self._last_query = q
+        self._last_candidates = result
+        return result
+
+    def search(self, query, limit=20, levels=None):
+        """名前・読みで地域を検索して、よく合うものから番号を返す
+
+        並び順: 完全一致 → 先頭一致 → 部分一致、同じなら上の階層・短い名前が先
+        """
+        q = normalize(query.strip())
+        if not q:
+            return []
+
+        scores = {}
+        # 先頭一致（二分探索で範囲を探す）
+        pos = bisect_left(self._sorted, (q,))
+        while pos < len(self._sorted):
+            key, i = self._sorted[pos]
+            if not key.startswith(q):
+                break
+            pos += 1
+            score = 0 if key == q else 1
+            if score < scores.get(i, 3):
+                scores[i] = score
+        # 部分一致
+        for i in self._candidates(q):
+            scores.setdefault(i, 2)
+
+        ids = [i for i in scores if levels is None or self.levels[i] in levels]
+        # 上位 limit 件だけ取り出す（全件は並べ替えない）
+        return heapq.nsmallest(
+            limit, ids, key=lambda i: (scores[i], self.levels[i], len(self.names[i]), i)
+        )
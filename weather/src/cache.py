@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+# 保存先（flet build したアプリでは FLET_APP_STORAGE_DATA が渡される）
+DEFAULT_CACHE_DIR = os.getenv("FLET_APP_STORAGE_DATA", os.path.join("storage", "data"))
+
+# エンドポイントごとの有効期限（秒）
+DEFAULT_TTLS = {
+    "area": 24 * 60 * 60,  # 地域リストはほとんど変わらないので1日
+    "forecast": 10 * 60,  # 天気予報は1日数回の更新なので10分
+    "warning": 3 * 60,  # 警報・注意報はすぐ変わるので3分
+}
+
+
+class CacheEntry:
+    """キャッシュされた1件のレスポンス"""
+
+    __slots__ = ("url", "kind", "body", "etag", "last_modified", "stored_at")
+
+    def __init__(self, url, kind, body, etag, last_modified, stored_at):
+        self.url = url
+        self.kind = kind
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+
+class HttpCache:
+    """気象庁APIのレスポンスをSQLiteに保存するキャッシュ
+
+    - kind（"area" / "forecast" / "warning"）ごとに有効期限を持つ
+    - 期限切れでも ETag / Last-Modified があれば条件付きリクエストで再検証できる
+    - 合計サイズが max_bytes を超えたら、最後に使われたのが古い順に削除する（LRU）
+    """
+
+    def __init__(self, path=None, ttls=None, max_bytes=20 * 1024 * 1024):
+        if path is None:
+            os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_CACHE_DIR, "http_cache.db")
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes
+        self.hits = 0  # 有効期限内でそのまま返せた回数
+        self.misses = 0  # ネットワークが必要だった回数
+
+        # Fletのイベントは別スレッドから呼ばれるので、接続を共有してロックで守る
+        self._lock = threading.Lock()
+        # 読み出しのたびに書き込まないよう、使われた時刻はメモリに貯めて put / touch / close でまとめて書く
+        self._accessed = {}  # url -> 最後に使われた時刻
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS http_cache_last_access ON http_cache (last_access)"
+        )
+        self._conn.commit()
+        self._total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM http_cache"
+        ).fetchone()[0]
+
+    def get(self, url):
+        """URLに対応するエントリを返す（無ければNone）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, body, etag, last_modified, stored_at FROM http_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            # 使われた時刻を覚えておく（LRU用。書き込みは _flush_access でまとめて行う）
+            self._accessed[url] = time.time()
+        return CacheEntry(url, *row)
+
+    def is_fresh(self, entry):
+        """有効期限内かどうか"""
+        ttl = self.ttls.get(entry.kind, 0)
+        return time.time() - entry.stored_at < ttl
+
+    def conditional_headers(self, entry):
+        """再検証用のリクエストヘッダーを作る"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def put(self, url, kind, body, etag=None, last_modified=None):
+        """レスポンスを保存する"""
+        now = time.time()
+        size = len(body)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO http_cache
+                    (url, kind, body, etag, last_modified, stored_at, last_access, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, kind, body, etag, last_modified, now, now, size),
+            )
+            self._total += size - (old[0] if old else 0)
+            self._accessed.pop(url, None)
+            self._flush_access()
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url):
+        """304 Not Modified のとき、保存時刻だけ更新して有効期限を延ばす"""
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(url, None)
+            self._flush_access()
+            self._conn.execute(
+                "UPDATE http_cache SET stored_at = ?, last_access = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """キャッシュを全て削除する"""
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache")
+            self._conn.commit()
+            self._accessed.clear()
+            self._total = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+            self._conn.close()
+
+    def _flush_access(self):
+        """貯めておいた使われた時刻を書き込む（ロック取得済みで呼ぶ。コミットは呼び出し側）"""
+        if not self._accessed:
+            return
+        self._conn.executemany(
+            "UPDATE http_cache SET last_access = ? WHERE url = ?",
+            [(at, url) for url, at in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def _evict(self):
+        """合計サイズが上限を超えていたら古いものから削除（ロック取得済みで呼ぶ）"""
+        if self._total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT url, size FROM http_cache ORDER BY last_access"
+        ).fetchall()
+        for url, size in rows:
+            if self._total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            self._total -= size
@@ -0,0 +1,153 @@
+from array import array
+from datetime import datetime
+from functools import lru_cache
+
+
+WEEKDAYS = ['月', '火', '水', '木', '金', '土', '日']
+
+# 気温・降水確率が無いときの値（array には None を入れられないため）
+MISSING = -32768
+
+
+class AreaSeries:
+    """1つの地域・1つの時系列の予報
+
+    時刻は datetime に変換済み、気温と降水確率は整数の array で持つ。
+    同じ時系列の地域は times / labels を共有する（labels は天気の文章がある時系列だけ）。
+    """
+
+    __slots__ = (
+        "code", "name", "times", "labels",
+        "weather_codes", "weathers", "winds", "waves", "temps", "temp_texts", "pops",
+    )
+
+    def __init__(self, code, name, times, labels):
+        self.code = code
+        self.name = name
+        self.times = times
+        self.labels = labels  # 表示用の日付（例: "01月01日(水)"）
+        self.weather_codes = ()
+        self.weathers = ()
+        self.winds = ()
+        self.waves = ()
+        self.temps = array('h')
+        self.temp_texts = ()  # JSON のままの気温（整数にできない値も表示するため）
+        self.pops = array('h')
+
+    def __len__(self):
+        return len(self.times)
+
+    def temp(self, i):
+        """i番目の気温（無ければNone）"""
+        if i < len(self.temps) and self.temps[i] != MISSING:
+            return self.temps[i]
+        return None
+
+    def temp_text(self, i):
+        """i番目の気温の JSON のままの文字列（無ければ ""）"""
+        if i < len(self.temp_texts):
+            return self.temp_texts[i] or ""
+        return ""
+
+    def __repr__(self):
+        return f"AreaSeries({self.code} {self.name} x{len(self.times)})"
+
+
+class Forecast:
+    """1つの気象台の天気予報（気象庁の forecast JSON 1件分）"""
+
+    __slots__ = ("office", "report_datetime", "series")
+
+    def __init__(self, office, report_datetime, series):
+        self.office = office
+        self.report_datetime = report_datetime
+        self.series = series  # AreaSeries のリスト（JSONに出てくる順）
+
+    @property
+    def weather_areas(self):
+        """天気の文章がある地域（画面にカードとして表示するもの）"""
+        return [s for s in self.series if s.weathers]
+
+    @property
+    def temp_areas(self):
+        """気温がある地域"""
+        return [s for s in self.series if s.temps]
+
+
+def parse_time(text):
+    """ISO形式の時刻をdatetimeに変換（失敗したらNone）"""
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def date_label(dt, text):
+    """カードに表示する日付"""
+    if dt is None:
+        return f"{text[:10]}()"
+    return f"{dt.month:02d}月{dt.day:02d}日({WEEKDAYS[dt.weekday()]})"  # strftime より速い
+
+
+@lru_cache(maxsize=512)
+def parse_time_defines(time_defines):
+    """timeDefines（タプル）を datetime に変換する
+
+    同じ timeDefines は時系列・地域・再取得をまたいで何度も出てくるので、結果を覚えておく。
+    """
+    return tuple(parse_time(t) for t in time_defines)
+
+
+@lru_cache(maxsize=512)
+def time_labels(time_defines):
+    """timeDefines（タプル）の表示用の日付（カードにする時系列の分だけ作る）"""
+    return tuple(date_label(dt, t) for dt, t in zip(parse_time_defines(time_defines), time_defines))
+
+
+def to_int_array(values):
+    """"12" や "" のような文字列のリストを整数の array にする"""
+    result = array('h')
+    for v in values:
+        try:
+            result.append(int(v))
+        except (TypeError, ValueError, OverflowError):  # array('h') に入らない値も無いものとする
+            result.append(MISSING)
+    return result
+
+
+def parse_forecast(payload):
+    """気象庁の forecast JSON を1回だけ走査して Forecast に変換する"""
+    if not payload:
+        return Forecast("", None, [])
+
+    office = payload[0].get("publishingOffice", "")
+    report_datetime = parse_time(payload[0].get("reportDatetime", ""))
+    series_list = []
+
+    for forecast in payload:
+        for series in forecast.get("timeSeries", []):
+            time_defines = tuple(series.get("timeDefines", []))
+            times = parse_time_defines(time_defines)
+            # 降水確率・気温だけの時系列はカードにならないので、日付の文字列は作らない
+            areas = series.get("areas", [])
+            labels = time_labels(time_defines) if any("weathers" in a for a in areas) else ()
+
+            for area in areas:
+                info = area.get("area", {})
+                s = AreaSeries(info.get("code", ""), info.get("name", ""), times, labels)
+                if "weathers" in area:
+                    s.weathers = tuple(area["weathers"])
+                if "weatherCodes" in area:
+                    s.weather_codes = tuple(area["weatherCodes"])
+                if "winds" in area:
+                    s.winds = tuple(area["winds"])
+                if "waves" in area:
+                    s.waves = tuple(area["waves"])
+                if "temps" in area:
+                    s.temp_texts = tuple(area["temps"])
+                    s.temps = to_int_array(area["temps"])
+                if "pops" in area:
+                    s.pops = to_int_array(area["pops"])
+                series_list.append(s)
+
+    return Forecast(office, report_datetime, series_list)
@@ -0,0 +1,276 @@
+import flet as ft
+from datetime import datetime
+from functools import lru_cache
+from jma_warnings import SPECIAL, WARNING
+
+
+@lru_cache(maxsize=256)
+def get_weather_emoji(weather):
+    """天気に応じた絵文字を返す"""
+    if "晴" in weather:
+        return "☀️"
+    elif "曇" in weather:
+        return "☁️"
+    elif "雨" in weather:
+        return "☔"
+    elif "雪" in weather:
+        return "❄️"
+    else:
+        return "🌤️"
+
+
+def temp_color(temp_val):
+    """気温によって色分け"""
+    if temp_val >= 30:
+        return "#d32f2f"  # 赤（暑い）
+    elif temp_val >= 25:
+        return "#f57c00"  # オレンジ（暖かい）
+    elif temp_val >= 15:
+        return "#388e3c"  # 緑（快適）
+    elif temp_val >= 5:
+        return "#1976d2"  # 青（涼しい）
+    else:
+        return "#0d47a1"  # 濃い青（寒い）
+
+
+class WeatherCard:
+    """1つの時間帯の天気カード
+
+    コントロールは一度だけ作って、地域を切り替えたときは値だけ書き換える。
+    Fletは変わったプロパティだけを送るので、同じ値なら通信量も増えない。
+    """
+
+    def __init__(self):
+        self.date_text = ft.Text(size=16, weight=ft.FontWeight.BOLD, color="#212121")
+        self.emoji_text = ft.Text(size=50)
+        self.weather_text = ft.Text(size=14, text_align=ft.TextAlign.CENTER, color="#424242")
+        self.temp_text = ft.Text(size=16, weight=ft.FontWeight.BOLD, visible=False)
+        self.wind_text = ft.Text(size=12, color="#616161", visible=False)
+        self.wave_text = ft.Text(size=12, color="#616161", visible=False)
+        self.control = ft.Container(
+            content=ft.Column(
+                [
+                    self.date_text,
+                    self.emoji_text,
+                    self.weather_text,
+                    self.temp_text,
+                    ft.Divider(height=1),
+                    self.wind_text,
+                    self.wave_text,
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=5
+            ),
+            width=200,
+            padding=15,
+            bgcolor="#ffffff",
+            border=ft.border.all(1, "#e0e0e0"),
+            border_radius=10,
+        )
+
+    def set(self, series, i):
+        """series（AreaSeries）の i 番目の時間帯を表示"""
+        weather = series.weathers[i]
+        self.control.visible = True
+        self.date_text.value = series.labels[i]
+        self.emoji_text.value = get_weather_emoji(weather)
+        self.weather_text.value = weather
+
+        # 気温表示
+        temp = series.temp(i)
+        text = series.temp_text(i)
+        self.temp_text.visible = temp is not None or bool(text)
+        if temp is not None:
+            self.temp_text.color = temp_color(temp)
+            self.temp_text.value = f"🌡️ {temp}℃"
+            self.temp_text.size = 16
+            self.temp_text.weight = ft.FontWeight.BOLD
+        elif text:
+            # 整数にできない気温はそのまま灰色で表示する（これまでと同じ）
+            self.temp_text.color = "#424242"
+            self.temp_text.value = f"🌡️ {text}"
+            self.temp_text.size = 14
+            self.temp_text.weight = None
+
+        wind = series.winds[i] if i < len(series.winds) else ""
+        wave = series.waves[i] if i < len(series.waves) else ""
+        self.wind_text.visible = bool(wind)
+        self.wind_text.value = f"💨 {wind}"
+        self.wave_text.visible = bool(wave)
+        self.wave_text.value = f"🌊 {wave}"
+
+
+class AreaSection:
+    """1つの地域の見出しとカードの列（カードは使い回す）"""
+
+    def __init__(self):
+        self.title = ft.Text(size=20, weight=ft.FontWeight.BOLD, color="#0d47a1")
+        self.cards = []
+        self.row = ft.Row(controls=[], scroll=ft.ScrollMode.AUTO, spacing=10)
+        self.control = ft.Column(
+            [self.title, self.row, ft.Divider(height=20)],
+            spacing=10,
+        )
+
+    def set(self, series):
+        self.control.visible = True
+        self.title.value = series.name
+        count = min(len(series.times), len(series.weathers))
+        # 足りない分だけカードを作る
+        while len(self.cards) < count:
+            card = WeatherCard()
+            self.cards.append(card)
+            self.row.controls.append(card.control)
+        for i in range(count):
+            self.cards[i].set(series, i)
+        # 余ったカードは消さずに隠す（次に使うときのため）
+        for card in self.cards[count:]:
+            card.control.visible = False
+
+
+class ForecastView:
+    """天気予報の表示エリア
+
+    - 見出し・警報・地域ごとのセクションは使い回し、値だけ差し替える
+    - 地域のセクションは最初に batch_size 個だけ表示し、
+      下までスクロールされたら続きを追加する
+    """
+
+    def __init__(self, page, batch_size=3):
+        self.page = page
+        self.batch_size = batch_size
+        self.sections = []  # 作成済みのセクション（使い回す）
+        self.pending = []  # まだ表示していないセクションのデータ
+        self.shown = 0  # 今表示しているセクションの数
+
+        self.message = ft.Text("地域を選択してください", size=20, weight=ft.FontWeight.BOLD)
+        self.progress = ft.ProgressRing(visible=False)
+
+        # ヘッダー
+        self.area_name_text = ft.Text(size=28, weight=ft.FontWeight.BOLD, color="#1976d2")
+        self.updated_text = ft.Text(size=14, color="#616161")
+        self.header = ft.Container(
+            content=ft.Column([self.area_name_text, self.updated_text]),
+            padding=20,
+            bgcolor="#e3f2fd",
+            border_radius=10,
+            margin=ft.margin.only(bottom=20),
+            visible=False,
+        )
+
+        # 警報・注意報
+        self.warning_chips = []
+        self.warning_row = ft.Row(controls=[], wrap=True, spacing=10)
+        self.warning_box = ft.Container(
+            content=ft.Column([
+                ft.Text(
+                    "⚠️ 警報・注意報",
+                    size=18,
+                    weight=ft.FontWeight.BOLD,
+                    color="#d32f2f"
+                ),
+                self.warning_row,
+            ]),
+            padding=15,
+            bgcolor="#ffebee",
+            border_radius=10,
+            border=ft.border.all(2, "#ef5350"),
+            margin=ft.margin.only(bottom=20),
+            visible=False,
+        )
+
+        # スクロールできない高さのときのための「続きを表示」ボタン
+        self.more_button = ft.TextButton("続きを表示", on_click=self.on_more_click, visible=False)
+
+        self.control = ft.Column(
+            controls=[self.message, self.progress, self.header, self.warning_box, self.more_button],
+            scroll=ft.ScrollMode.AUTO,
+            expand=True,
+            on_scroll=self.on_scroll,
+            on_scroll_interval=100,
+        )
+
+    def show_loading(self):
+        self.progress.visible = True
+        self.page.update()
+
+    def show_error(self, text):
+        self.progress.visible = False
+        self.message.value = text
+        self.message.color = "#f44336"
+        self.message.size = 16
+        self.message.visible = True
+        self.header.visible = False
+        self.warning_box.visible = False
+        for section in self.sections:
+            section.control.visible = False
+        self.more_button.visible = False
+        self.pending = []
+        self.shown = 0
+        self.page.update()
+
+    def show(self, area_name, warnings_to_show, forecast):
+        """天気予報を表示（前回のコントロールを使い回す）"""
+        self.progress.visible = False
+        self.message.visible = False
+
+        self.header.visible = True
+        self.area_name_text.value = f"📍 {area_name}"
+        self.updated_text.value = f"更新: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}"
+
+        self.set_warnings(warnings_to_show)
+
+        # 最初の分だけ表示して、残りはスクロールされたときに表示する
+        self.pending = forecast.weather_areas
+        self.shown = 0
+        self.show_more()
+        for section in self.sections[self.shown:]:
+            section.control.visible = False
+        self.page.update()
+
+    def set_warnings(self, warnings_to_show):
+        """警報・注意報のチップを表示（warnings_to_show は (名前, 重大度) のリスト）"""
+        self.warning_box.visible = bool(warnings_to_show)
+        while len(self.warning_chips) < len(warnings_to_show):
+            text = ft.Text(color="#ffffff", weight=ft.FontWeight.BOLD, size=14)
+            chip = ft.Container(content=text, padding=10, border_radius=20)
+            self.warning_chips.append(chip)
+            self.warning_row.controls.append(chip)
+        for chip, (name, severity) in zip(self.warning_chips, warnings_to_show):
+            chip.visible = True
+            # 特別警報は紫、警報は赤、注意報は黄色
+            if severity == SPECIAL:
+                chip.bgcolor = "#7b1fa2"
+                chip.content.value = f"🚨 {name}"
+            elif severity == WARNING:
+                chip.bgcolor = "#ef5350"
+                chip.content.value = f"⚠️ {name}"
+            else:
+                chip.bgcolor = "#ffa726"
+                chip.content.value = f"⚡ {name}"
+        for chip in self.warning_chips[len(warnings_to_show):]:
+            chip.visible = False
+
+    def show_more(self):
+        """まだ表示していないセクションを batch_size 個表示する"""
+        end = min(self.shown + self.batch_size, len(self.pending))
+        for i in range(self.shown, end):
+            if i == len(self.sections):
+                section = AreaSection()
+                self.sections.append(section)
+                # 「続きを表示」ボタンの前に追加する
+                self.control.controls.insert(len(self.control.controls) - 1, section.control)
+            self.sections[i].set(self.pending[i])
+        added = end > self.shown
+        self.shown = end
+        self.more_button.visible = self.shown < len(self.pending)
+        return added
+
+    def on_more_click(self, e):
+        if self.show_more():
+            self.page.update()
+
+    def on_scroll(self, e):
+        # 下端の近くまでスクロールされたら続きを表示
+        if e.max_scroll_extent - e.pixels < 300 and self.show_more():
+            self.page.update()
@@ -0,0 +1,181 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from cache import DEFAULT_CACHE_DIR
+from forecast_model import MISSING, parse_forecast
+
+# 気象庁の時刻は日本時間（time_define は "2025-01-01T05:00:00+09:00" の形で保存している）
+JST = timezone(timedelta(hours=9))
+
+
+class SnapshotStore:
+    """取得した天気予報・警報をSQLiteに保存して、オフライン表示と過去の検索に使う
+
+    - 発表ごと（気象台コード＋発表時刻）に元のJSONを1件保存する
+    - 天気・気温・降水確率は (気象台, 地域, 時刻, 取得時刻) の行に分解して保存する
+    - WALモードなので、書き込み中でも画面側の読み込みは待たされない
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_CACHE_DIR, "history.db")
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS forecast_snapshots (
+                office_code TEXT NOT NULL,
+                report_datetime TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (office_code, report_datetime)
+            );
+            CREATE TABLE IF NOT EXISTS forecast_points (
+                office_code TEXT NOT NULL,
+                area_code TEXT NOT NULL,
+                time_define TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                weather_code TEXT,
+                weather TEXT,
+                temp INTEGER,
+                pop INTEGER,
+                PRIMARY KEY (office_code, area_code, time_define, fetched_at)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS forecast_points_office_time
+                ON forecast_points (office_code, time_define);
+            CREATE TABLE IF NOT EXISTS warning_snapshots (
+                office_code TEXT NOT NULL,
+                report_datetime TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (office_code, report_datetime)
+            );
+            """
+        )
+        self._conn.commit()
+        # 気象台ごとに最後に保存した発表時刻（同じ発表を何度も保存しない）
+        self._last_report = {}
+
+    def record_forecast(self, office_code, payload, forecast=None, fetched_at=None):
+        """天気予報のJSONを保存する（保存済みの発表なら何もしない）
+
+        forecast に parse_forecast 済みの結果を渡すと、パースをやり直さない。
+        戻り値は保存した行の数
+        """
+        if forecast is None:
+            forecast = parse_forecast(payload)
+        report = forecast.report_datetime.isoformat() if forecast.report_datetime else ""
+        if self._last_report.get(("forecast", office_code)) == report:
+            return 0
+        if fetched_at is None:
+            fetched_at = time.time()
+
+        rows = []
+        for s in forecast.series:
+            for i, dt in enumerate(s.times):
+                if dt is None:
+                    continue
+                temp = s.temps[i] if i < len(s.temps) and s.temps[i] != MISSING else None
+                pop = s.pops[i] if i < len(s.pops) and s.pops[i] != MISSING else None
+                weather_code = s.weather_codes[i] if i < len(s.weather_codes) else None
+                weather = s.weathers[i] if i < len(s.weathers) else None
+                if temp is None and pop is None and weather_code is None and weather is None:
+                    continue
+                rows.append((
+                    office_code, s.code, dt.isoformat(), fetched_at,
+                    weather_code, weather, temp, pop,
+                ))
+
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO forecast_snapshots VALUES (?, ?, ?, ?)",
+                (office_code, report, fetched_at, json.dumps(payload, ensure_ascii=False)),
+            )
+            if cur.rowcount == 0:
+                # 別のプロセスなどで保存済み
+                self._conn.commit()
+                self._last_report[("forecast", office_code)] = report
+                return 0
+            # 同じ地域・時刻が複数の時系列に出てくる（天気と降水確率など）ので、
+            # 1行にまとめて、値がある列だけ上書きする
+            self._conn.executemany(
+                """
+                INSERT INTO forecast_points VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (office_code, area_code, time_define, fetched_at) DO UPDATE SET
+                    weather_code = COALESCE(excluded.weather_code, weather_code),
+                    weather = COALESCE(excluded.weather, weather),
+                    temp = COALESCE(excluded.temp, temp),
+                    pop = COALESCE(excluded.pop, pop)
+                """,
+                rows,
+            )
+            self._conn.commit()
+        self._last_report[("forecast", office_code)] = report
+        return len(rows)
+
+    def record_warnings(self, office_code, payload, fetched_at=None):
+        """警報・注意報のJSONを保存する（保存済みの発表なら何もしない）"""
+        report = payload.get("reportDatetime", "") if isinstance(payload, dict) else ""
+        if self._last_report.get(("warning", office_code)) == report:
+            return 0
+        if fetched_at is None:
+            fetched_at = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO warning_snapshots VALUES (?, ?, ?, ?)",
+                (office_code, report, fetched_at, json.dumps(payload, ensure_ascii=False)),
+            )
+            self._conn.commit()
+        self._last_report[("warning", office_code)] = report
+        return cur.rowcount
+
+    def latest_forecast(self, office_code):
+        """最後に保存した天気予報のJSON（無ければNone）"""
+        return self._latest("forecast_snapshots", office_code)
+
+    def latest_warnings(self, office_code):
+        """最後に保存した警報・注意報のJSON（無ければNone）"""
+        return self._latest("warning_snapshots", office_code)
+
+    def _latest(self, table, office_code):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT payload FROM {table} WHERE office_code = ? "
+                "ORDER BY report_datetime DESC LIMIT 1",
+                (office_code,),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def temperature_trend(self, office_code, area_code=None, days=30):
+        """過去 days 日間の気温の推移
+
+        同じ時刻の予報が何回も保存されている場合は、最後に取得したものを使う。
+        戻り値は [(時刻, 地域コード, 気温), ...]（時刻順）
+        """
+        # time_define と同じ形（+09:00 付き）にして文字列で比べる
+        since = (datetime.now(JST) - timedelta(days=days)).isoformat()
+        sql = (
+            "SELECT time_define, area_code, temp, MAX(fetched_at) FROM forecast_points "
+            "WHERE office_code = ? AND time_define >= ? AND temp IS NOT NULL"
+        )
+        params = [office_code, since]
+        if area_code is not None:
+            sql += " AND area_code = ?"
+            params.append(area_code)
+        # SQLiteでは MAX() と一緒に取った列は、最大の行の値になる
+        sql += " GROUP BY area_code, time_define ORDER BY time_define, area_code"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(t, code, temp) for t, code, temp, _ in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
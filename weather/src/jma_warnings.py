@@ -0,0 +1,215 @@
+"""気象庁の警報・注意報JSONを扱うモジュール
+
+標準ライブラリの warnings と名前がぶつからないように jma_warnings という名前にしている。
+"""
+
+# 重大度（大きいほど重い）
+ADVISORY, WARNING, SPECIAL = 1, 2, 3
+
+# 警報・注意報のコード -> (名前, 重大度)
+WARNING_CODES = {
+    "32": ("暴風雪特別警報", SPECIAL),
+    "33": ("大雨特別警報", SPECIAL),
+    "35": ("暴風特別警報", SPECIAL),
+    "36": ("大雪特別警報", SPECIAL),
+    "37": ("波浪特別警報", SPECIAL),
+    "38": ("高潮特別警報", SPECIAL),
+    "02": ("暴風雪警報", WARNING),
+    "03": ("大雨警報", WARNING),
+    "04": ("洪水警報", WARNING),
+    "05": ("暴風警報", WARNING),
+    "06": ("大雪警報", WARNING),
+    "07": ("波浪警報", WARNING),
+    "08": ("高潮警報", WARNING),
+    "10": ("大雨注意報", ADVISORY),
+    "12": ("大雪注意報", ADVISORY),
+    "13": ("風雪注意報", ADVISORY),
+    "14": ("雷注意報", ADVISORY),
+    "15": ("強風注意報", ADVISORY),
+    "16": ("波浪注意報", ADVISORY),
+    "17": ("融雪注意報", ADVISORY),
+    "18": ("洪水注意報", ADVISORY),
+    "19": ("高潮注意報", ADVISORY),
+    "20": ("濃霧注意報", ADVISORY),
+    "21": ("乾燥注意報", ADVISORY),
+    "22": ("なだれ注意報", ADVISORY),
+    "23": ("低温注意報", ADVISORY),
+    "24": ("霜注意報", ADVISORY),
+    "25": ("着氷注意報", ADVISORY),
+    "26": ("着雪注意報", ADVISORY),
+    "27": ("その他の注意報", ADVISORY),
+}
+
+# 今出ている（解除されていない）ことを表す状態（切り替えは、下の種類が出ている状態）
+ACTIVE_STATUSES = frozenset(("発表", "継続", "特別警報から警報", "特別警報から注意報", "警報から注意報"))
+
+
+def severity_of_name(name):
+    """コードが無いときに名前から重大度を決める"""
+    if "特別警報" in name:
+        return SPECIAL
+    if "警報" in name:
+        return WARNING
+    return ADVISORY
+
+
+class WarningItem:
+    """ある地域に出ている1つの警報・注意報"""
+
+    __slots__ = ("area_code", "code", "name", "severity", "status")
+
+    def __init__(self, area_code, code, name, severity, status):
+        self.area_code = area_code
+        self.code = code
+        self.name = name
+        self.severity = severity
+        self.status = status
+
+    def __repr__(self):
+        return f"WarningItem({self.area_code} {self.name} {self.status})"
+
+
+class WarningDiff:
+    """2回の取得の間に新しく出た・解除された警報・注意報"""
+
+    __slots__ = ("issued", "cleared")
+
+    def __init__(self, issued=(), cleared=()):
+        self.issued = list(issued)
+        self.cleared = list(cleared)
+
+    def __bool__(self):
+        return bool(self.issued or self.cleared)
+
+    def __repr__(self):
+        return f"WarningDiff(issued={self.issued}, cleared={self.cleared})"
+
+
+class WarningSet:
+    """今出ている警報・注意報（地域コード -> 警報コード -> WarningItem）
+
+    地域ごとに同じ警報は1つにまとめ、重大度順の一覧と地域ごとの署名を先に作っておく。
+    """
+
+    __slots__ = ("report_datetime", "by_area", "summary", "_signatures")
+
+    def __init__(self, report_datetime, by_area):
+        self.report_datetime = report_datetime
+        self.by_area = by_area
+
+        # 画面に出す一覧（地域をまたいで重複を除き、重いものから）
+        names = {}
+        for items in by_area.values():
+            for item in items.values():
+                names.setdefault(item.name, item.severity)
+        self.summary = sorted(names.items(), key=lambda x: (-x[1], x[0]))
+
+        # 地域ごとの署名（差分を取るとき、変わっていない地域を飛ばすため）
+        self._signatures = {
+            area: frozenset(items) for area, items in by_area.items()
+        }
+
+    def __len__(self):
+        return sum(len(items) for items in self.by_area.values())
+
+    def items(self):
+        for items in self.by_area.values():
+            yield from items.values()
+
+    def max_severity(self):
+        return self.summary[0][1] if self.summary else 0
+
+    def diff(self, previous):
+        """previous（前回の WarningSet）からの変化
+
+        発表時刻が同じならすぐに空の差分を返し、
+        それ以外も警報の組み合わせが変わった地域だけを比べる。
+        """
+        if previous is None:
+            return WarningDiff(issued=self.items())
+        if self.report_datetime and previous.report_datetime == self.report_datetime:
+            return WarningDiff()
+
+        issued, cleared = [], []
+        old_sigs = previous._signatures
+        for area, sig in self._signatures.items():
+            old = old_sigs.get(area)
+            if old == sig:
+                continue
+            items = self.by_area[area]
+            issued.extend(items[code] for code in sig - (old or frozenset()))
+            if old:
+                old_items = previous.by_area[area]
+                cleared.extend(old_items[code] for code in old - sig)
+        for area, old in old_sigs.items():
+            if area not in self._signatures:
+                cleared.extend(previous.by_area[area].values())
+        return WarningDiff(issued, cleared)
+
+
+def _add(by_area, area_code, warning):
+    status = warning.get("status", "")
+    if status not in ACTIVE_STATUSES:
+        return
+    code = warning.get("code")
+    if code in WARNING_CODES:
+        name, severity = WARNING_CODES[code]
+    else:
+        name = warning.get("name") or f"コード{code}"
+        severity = severity_of_name(name)
+        code = code or name
+    by_area.setdefault(area_code, {})[code] = WarningItem(area_code, code, name, severity, status)
+
+
+def parse_warnings(payload):
+    """警報・注意報のJSONを WarningSet に変換する
+
+    気象庁の形式（areaTypes[].areas[].warnings[]）と、
+    トップレベルに {"warnings": [...]} が並ぶ形式のどちらも読める。
+    """
+    by_area = {}
+    if not isinstance(payload, dict):
+        return WarningSet("", by_area)
+
+    for area_type in payload.get("areaTypes", []):
+        for area in area_type.get("areas", []):
+            area_code = area.get("code", "")
+            for warning in area.get("warnings", []):
+                if isinstance(warning, dict):
+                    _add(by_area, area_code, warning)
+
+    for area_key, area_warning in payload.items():
+        if isinstance(area_warning, dict):
+            for warning in area_warning.get("warnings", []):
+                if isinstance(warning, dict):
+                    _add(by_area, area_warning.get("code", area_key), warning)
+
+    return WarningSet(payload.get("reportDatetime", ""), by_area)
+
+
+class WarningTracker:
+    """気象台ごとに最新の WarningSet を覚えておき、取得するたびに差分を出す
+
+    発表時刻が前回と同じJSONはパースしないので、たくさんの気象台を
+    何度取得しても、変わったものの分しか時間がかからない。
+    """
+
+    def __init__(self):
+        self.current = {}  # 気象台コード -> WarningSet
+
+    def get(self, office_code):
+        return self.current.get(office_code)
+
+    def update(self, office_code, payload):
+        """新しいJSONを反映して、前回からの差分を返す"""
+        previous = self.current.get(office_code)
+        if (
+            previous is not None
+            and previous.report_datetime
+            and isinstance(payload, dict)
+            and payload.get("reportDatetime") == previous.report_datetime
+        ):
+            return WarningDiff()
+        warning_set = parse_warnings(payload)
+        self.current[office_code] = warning_set
+        return warning_set.diff(previous)
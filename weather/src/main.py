@@ -1,68 +1,21 @@
 import flet as ft
-import requests
-from datetime import datetime
+import os
+import time
+from weather_app import WeatherApp
+from prefetch import Prefetcher
+from forecast_view import ForecastView
+from request_manager import RequestManager
+from scheduler import RefreshScheduler
 
-class WeatherApp:
-    def __init__(self):
-        self.areas = {}
-        self.selected_area_code = None
-        self.weather_data = None
-        
-    def fetch_area_list(self):
-        """気象庁APIから地域リストを取得"""
-        try:
-            url = "http://www.jma.go.jp/bosai/common/const/area.json"
-            data_json = requests.get(url).json()
-            
-            # 地域データを階層構造で整理
-            centers = data_json.get("centers", {})
-            offices = data_json.get("offices", {})
-            
-            # 地方ごとに整理
-            for center_code, center_data in centers.items():
-                center_name = center_data.get("name", "")
-                children = center_data.get("children", [])
-                
-                self.areas[center_code] = {
-                    "name": center_name,
-                    "offices": []
-                }
-                
-                # 各地方配下の気象台を追加
-                for office_code in children:
-                    if office_code in offices:
-                        office_data = offices[office_code]
-                        self.areas[center_code]["offices"].append({
-                            "code": office_code,
-                            "name": office_data.get("name", "")
-                        })
-            
-            return True
-        except Exception as e:
-            print(f"地域リスト取得エラー: {e}")
-            return False
-    
-    def fetch_weather_data(self, area_code):
-        """指定地域の天気予報を取得"""
-        try:
-            url = f"https://www.jma.go.jp/bosai/forecast/data/forecast/{area_code}.json"
-            self.weather_data = requests.get(url).json()
-            return True
-        except Exception as e:
-            print(f"天気予報取得エラー: {e}")
-            return False
-    
-    def fetch_warnings(self, area_code):
-        """指定地域の警報・注意報を取得"""
-        try:
-            url = f"https://www.jma.go.jp/bosai/warning/data/warning/{area_code}.json"
-            warning_data = requests.get(url).json()
-            return warning_data
-        except Exception as e:
-            print(f"警報・注意報取得エラー: {e}")
-            return None
+# 画面を開いたときに全気象台を先読みするか（既定はしない。キャッシュを温めるのは prefetch.py を使う）
+# Webモードではクライアントごとに全気象台を取得することになるので、必要なときだけ WEATHER_PREFETCH=1 で有効にする
+PREFETCH_IN_APP = os.getenv("WEATHER_PREFETCH") == "1"
+
+# 起動時間を表示するか（既定はしない。app.startup_ms にはいつも入れる）
+SHOW_STARTUP_TIME = os.getenv("WEATHER_DEBUG") == "1"
 
 def main(page: ft.Page):
+    start = time.perf_counter()
     page.title = "気象庁天気予報アプリ"
     page.padding = 0
     page.window_width = 1200
@@ -70,288 +23,84 @@ def main(page: ft.Page):
     
     app = WeatherApp()
     
-    # 天気予報表示エリア
-    weather_display = ft.Column(
-        controls=[
-            ft.Text("地域を選択してください", size=20, weight=ft.FontWeight.BOLD)
-        ],
-        scroll=ft.ScrollMode.AUTO,
-        expand=True,
-    )
+    # 天気予報表示エリア（コントロールを使い回して差分だけ更新する）
+    forecast_view = ForecastView(page)
+    weather_display = forecast_view.control
     
-    def get_weather_emoji(weather):
-        """天気に応じた絵文字を返す"""
-        if "晴" in weather:
-            return "☀️"
-        elif "曇" in weather:
-            return "☁️"
-        elif "雨" in weather:
-            return "☔"
-        elif "雪" in weather:
-            return "❄️"
-        else:
-            return "🌤️"
+    # 表示中の気象台（自動更新で使う）
+    current_office = {"code": None, "name": None}
     
-    def display_weather(area_code, area_name):
-        """天気予報を表示"""
-        weather_display.controls.clear()
-        weather_display.controls.append(
-            ft.ProgressRing()
-        )
-        page.update()
-        
-        # 警報・注意報を取得
-        warning_data = app.fetch_warnings(area_code)
-        
-        if app.fetch_weather_data(area_code):
-            weather_display.controls.clear()
-            
-            # ヘッダー
-            weather_display.controls.append(
-                ft.Container(
-                    content=ft.Column([
-                        ft.Text(
-                            f"📍 {area_name}",
-                            size=28,
-                            weight=ft.FontWeight.BOLD,
-                            color="#1976d2"
-                        ),
-                        ft.Text(
-                            f"更新: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}",
-                            size=14,
-                            color="#616161"
-                        ),
-                    ]),
-                    padding=20,
-                    bgcolor="#e3f2fd",
-                    border_radius=10,
-                    margin=ft.margin.only(bottom=20)
-                )
-            )
-            
-            # 警報・注意報の表示
-            if warning_data:
-                warnings_to_show = []
-                for area_key, area_warning in warning_data.items():
-                    if isinstance(area_warning, dict):
-                        warnings = area_warning.get("warnings", [])
-                        for warning in warnings:
-                            if isinstance(warning, dict):
-                                status = warning.get("status", "")
-                                name = warning.get("name", "")
-                                if status == "発表" or status == "継続":
-                                    warnings_to_show.append(name)
-                
-                if warnings_to_show:
-                    warning_chips = []
-                    for w in warnings_to_show:
-                        # 警報は赤、注意報は黄色
-                        if "警報" in w:
-                            bg_color = "#ef5350"
-                            icon = "⚠️"
-                        else:
-                            bg_color = "#ffa726"
-                            icon = "⚡"
-                        
-                        warning_chips.append(
-                            ft.Container(
-                                content=ft.Text(
-                                    f"{icon} {w}",
-                                    color="#ffffff",
-                                    weight=ft.FontWeight.BOLD,
-                                    size=14
-                                ),
-                                bgcolor=bg_color,
-                                padding=10,
-                                border_radius=20,
-                            )
-                        )
-                    
-                    weather_display.controls.append(
-                        ft.Container(
-                            content=ft.Column([
-                                ft.Text(
-                                    "⚠️ 警報・注意報",
-                                    size=18,
-                                    weight=ft.FontWeight.BOLD,
-                                    color="#d32f2f"
-                                ),
-                                ft.Row(
-                                    controls=warning_chips,
-                                    wrap=True,
-                                    spacing=10,
-                                )
-                            ]),
-                            padding=15,
-                            bgcolor="#ffebee",
-                            border_radius=10,
-                            border=ft.border.all(2, "#ef5350"),
-                            margin=ft.margin.only(bottom=20)
-                        )
-                    )
+    def display_weather(area_code, area_name, show_loading=True):
+        """天気予報の表示を依頼（素早く何度もクリックされても、最後の1つだけ表示される）"""
+        current_office["code"] = area_code
+        current_office["name"] = area_name
+        scheduler.set_current(area_code)
+        if show_loading:
+            forecast_view.show_loading()
+        # 天気予報と警報・注意報の取得は裏で行い、終わったら show_result が呼ばれる
+        request_manager.request(area_code, area_name)
+    
+    def show_result(area_code, area_name, result):
+        """取得した天気予報を表示"""
+        if result.ok:
+            # 警報・注意報の表示（取得したときに重大度順にまとめてある）
+            warnings_to_show = result.warning_set.summary if result.warning_set is not None else []
             
             # 天気予報データを表示
-            for forecast in app.weather_data:
-                time_series = forecast.get("timeSeries", [])
-                
-                for series in time_series:
-                    time_defines = series.get("timeDefines", [])
-                    areas = series.get("areas", [])
-                    
-                    for area in areas:
-                        area_name_detail = area.get("area", {}).get("name", "")
-                        
-                        # 天気情報
-                        weathers = area.get("weathers", [])
-                        winds = area.get("winds", [])
-                        waves = area.get("waves", [])
-                        temps = area.get("temps", [])
-                        
-                        if weathers:
-                            cards = []
-                            for i, (time_def, weather) in enumerate(zip(time_defines, weathers)):
-                                # 日付をパース
-                                try:
-                                    dt = datetime.fromisoformat(time_def.replace('Z', '+00:00'))
-                                    date_str = dt.strftime('%m月%d日')
-                                    day_str = ['月', '火', '水', '木', '金', '土', '日'][dt.weekday()]
-                                except:
-                                    date_str = time_def[:10]
-                                    day_str = ""
-                                
-                                # 天気絵文字を取得
-                                emoji = get_weather_emoji(weather)
-                                
-                                wind_text = winds[i] if i < len(winds) else ""
-                                wave_text = waves[i] if i < len(waves) else ""
-                                temp_text = temps[i] if i < len(temps) else ""
-                                
-                                card_content = [
-                                    ft.Text(
-                                        f"{date_str}({day_str})",
-                                        size=16,
-                                        weight=ft.FontWeight.BOLD,
-                                        color="#212121"
-                                    ),
-                                    ft.Text(
-                                        emoji,
-                                        size=50,
-                                    ),
-                                    ft.Text(
-                                        weather,
-                                        size=14,
-                                        text_align=ft.TextAlign.CENTER,
-                                        color="#424242"
-                                    ),
-                                ]
-                                
-                                # 気温表示
-                                if temp_text:
-                                    try:
-                                        temp_val = int(temp_text)
-                                        # 気温によって色分け
-                                        if temp_val >= 30:
-                                            temp_color = "#d32f2f"  # 赤（暑い）
-                                        elif temp_val >= 25:
-                                            temp_color = "#f57c00"  # オレンジ（暖かい）
-                                        elif temp_val >= 15:
-                                            temp_color = "#388e3c"  # 緑（快適）
-                                        elif temp_val >= 5:
-                                            temp_color = "#1976d2"  # 青（涼しい）
-                                        else:
-                                            temp_color = "#0d47a1"  # 濃い青（寒い）
-                                        
-                                        card_content.append(
-                                            ft.Text(
-                                                f"🌡️ {temp_text}℃",
-                                                size=16,
-                                                weight=ft.FontWeight.BOLD,
-                                                color=temp_color
-                                            )
-                                        )
-                                    except:
-                                        card_content.append(
-                                            ft.Text(
-                                                f"🌡️ {temp_text}",
-                                                size=14,
-                                                color="#424242"
-                                            )
-                                        )
-                                
-                                card_content.append(ft.Divider(height=1))
-                                
-                                if wind_text:
-                                    card_content.append(
-                                        ft.Text(
-                                            f"💨 {wind_text}",
-                                            size=12,
-                                            color="#616161"
-                                        )
-                                    )
-                                
-                                if wave_text:
-                                    card_content.append(
-                                        ft.Text(
-                                            f"🌊 {wave_text}",
-                                            size=12,
-                                            color="#616161"
-                                        )
-                                    )
-                                
-                                card = ft.Container(
-                                    content=ft.Column(
-                                        card_content,
-                                        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                                        spacing=5
-                                    ),
-                                    width=200,
-                                    padding=15,
-                                    bgcolor="#ffffff",
-                                    border=ft.border.all(1, "#e0e0e0"),
-                                    border_radius=10,
-                                )
-                                cards.append(card)
-                            
-                            weather_display.controls.append(
-                                ft.Column([
-                                    ft.Text(
-                                        area_name_detail,
-                                        size=20,
-                                        weight=ft.FontWeight.BOLD,
-                                        color="#0d47a1"
-                                    ),
-                                    ft.Row(
-                                        controls=cards,
-                                        scroll=ft.ScrollMode.AUTO,
-                                        spacing=10,
-                                    ),
-                                ],
-                                spacing=10)
-                            )
-                            weather_display.controls.append(ft.Divider(height=20))
-            
-            page.update()
+            forecast_view.show(area_name, warnings_to_show, result.forecast)
         else:
-            weather_display.controls.clear()
-            weather_display.controls.append(
-                ft.Text("❌ 天気予報の取得に失敗しました", color="#f44336", size=16)
+            forecast_view.show_error("❌ 天気予報の取得に失敗しました")
+    
+    request_manager = RequestManager(app, on_result=show_result)
+    
+    def on_refresh(area_code, forecast_changed, warning_diff):
+        """自動更新で内容が変わったときだけ表示し直す"""
+        if area_code == current_office["code"]:
+            display_weather(area_code, current_office["name"], show_loading=False)
+    
+    # 表示中の気象台を10分ごとに確認する（変わっていなければ何もしない）
+    scheduler = RefreshScheduler(app, interval=600, on_change=on_refresh)
+    
+    # 全気象台の先読み（ページごとに1つだけ。実行中なら start() は何もしない）
+    prefetcher = Prefetcher(app)
+    session = {"closed": False}
+    
+    def start_prefetch():
+        # 切断の後に地域リストの取得が終わっても、先読みを始め直さない
+        if PREFETCH_IN_APP and not session["closed"]:
+            prefetcher.start()
+    
+    def on_disconnect(e):
+        session["closed"] = True
+        scheduler.stop()
+        request_manager.shutdown()
+        prefetcher.stop()
+    
+    page.on_disconnect = on_disconnect
+    
+    def build_office_tiles(center_code):
+        """地方に属する気象台のタイルを作成"""
+        office_tiles = []
+        for office in app.areas.get(center_code, {}).get("offices", []):
+            office_tile = ft.ListTile(
+                title=ft.Text(office["name"], color="#424242"),
+                on_click=lambda e, code=office["code"], name=office["name"]: display_weather(code, name),
             )
-            page.update()
+            office_tiles.append(office_tile)
+        return office_tiles
+    
+    def on_center_change(e):
+        """地方を初めて開いたときに気象台のタイルを作る"""
+        tile = e.control
+        if e.data == "true" and not tile.controls:
+            tile.controls = build_office_tiles(tile.data)
+            tile.update()
     
     def create_area_list():
-        """地域リストを作成"""
+        """地域リストを作成（気象台のタイルは開いたときに作る）"""
         area_tiles = []
         
         for center_code, center_data in app.areas.items():
-            office_tiles = []
-            
-            for office in center_data["offices"]:
-                office_tile = ft.ListTile(
-                    title=ft.Text(office["name"], color="#424242"),
-                    on_click=lambda e, code=office["code"], name=office["name"]: display_weather(code, name),
-                )
-                office_tiles.append(office_tile)
-            
             expansion_tile = ft.ExpansionTile(
                 title=ft.Text(
                     center_data["name"],
@@ -359,21 +108,68 @@ def main(page: ft.Page):
                     weight=ft.FontWeight.BOLD,
                     color="#212121"
                 ),
-                controls=office_tiles,
+                controls=[],
                 initially_expanded=False,
+                data=center_code,
+                on_change=on_center_change,
             )
             area_tiles.append(expansion_tile)
         
         return area_tiles
     
-    # 初期化: 地域リストを取得
-    loading_text = ft.Text("読み込み中...", size=16)
-    page.add(loading_text)
-    page.update()
+    # 地域リスト
+    area_list = ft.Column(
+        controls=[],
+        scroll=ft.ScrollMode.AUTO,
+        expand=True,
+    )
+    # 地方のタイル（検索をやめたときに一覧を元に戻すため取っておく）
+    center_tiles = []
     
-    if app.fetch_area_list():
+    def on_search_change(e):
+        """入力されるたびに地域を検索して一覧を入れ替える"""
+        query = (search_field.value or "").strip()
+        index = app.area_index
+        if not query:
+            area_list.controls = center_tiles
+        elif index is None:
+            area_list.controls = [
+                ft.Container(ft.Text("検索の準備中です...", color="#757575"), padding=10)
+            ]
+        else:
+            result_tiles = []
+            for i in index.search(query, limit=30):
+                # 天気予報は気象台ごとなので、見つかった地域の気象台を表示する
+                office = index.office_of(i)
+                if office is None:
+                    continue
+                result_tiles.append(
+                    ft.ListTile(
+                        title=ft.Text(index.names[i], color="#424242"),
+                        subtitle=ft.Text(" > ".join(index.path(i)[:-1]), size=12, color="#757575"),
+                        on_click=lambda e, code=index.codes[office], name=index.names[office]: display_weather(code, name),
+                    )
+                )
+            if not result_tiles:
+                result_tiles.append(
+                    ft.Container(ft.Text("見つかりませんでした", color="#757575"), padding=10)
+                )
+            area_list.controls = result_tiles
+        area_list.update()
+    
+    # 地域検索（市区町村名・読みでも探せる）
+    search_field = ft.TextField(
+        hint_text="地域名で検索",
+        prefix_icon=ft.Icons.SEARCH,
+        dense=True,
+        on_change=on_search_change,
+    )
+    
+    def show_main_layout():
+        """地域リストと天気予報のレイアウトを表示"""
         page.controls.clear()
-        area_list = create_area_list()
+        center_tiles[:] = create_area_list()
+        area_list.controls = center_tiles
         
         # 地域リスト表示エリア
         area_list_view = ft.Column(
@@ -388,11 +184,8 @@ def main(page: ft.Page):
                     padding=10,
                     bgcolor="#e3f2fd",
                 ),
-                ft.Column(
-                    controls=area_list,
-                    scroll=ft.ScrollMode.AUTO,
-                    expand=True,
-                )
+                ft.Container(content=search_field, padding=ft.padding.symmetric(horizontal=10)),
+                area_list,
             ],
             expand=True,
         )
@@ -416,12 +209,54 @@ def main(page: ft.Page):
                 expand=True,
             )
         )
+    
+    def refresh_area_list():
+        """裏で area.json を取り直し、変わっていれば地域リストを作り直す"""
+        old_areas = app.areas
+        if app.fetch_area_list():
+            app.save_area_snapshot()
+            if app.areas != old_areas:
+                center_tiles[:] = create_area_list()
+                if not search_field.value:
+                    area_list.controls = center_tiles
+                page.update()
+            # 裏で全気象台の天気予報を先読みしておく（どの地域もすぐ開けるように）
+            start_prefetch()
+    
+    def report_startup(source):
+        """起動から操作できるようになるまでの時間を記録（WEATHER_DEBUG=1 なら表示）"""
+        elapsed = (time.perf_counter() - start) * 1000
+        app.startup_ms = elapsed
+        if SHOW_STARTUP_TIME:
+            print(f"起動時間: {elapsed:.0f}ms（地域リスト: {source}）")
+    
+    scheduler.start()
+    
+    # 初期化: 保存してある地域リストがあればすぐに表示し、最新版は裏で取得する
+    if app.load_area_snapshot():
+        show_main_layout()
+        page.update()
+        report_startup("保存済み")
+        page.run_thread(refresh_area_list)
+        return
+    
+    # 初回起動: 地域リストを取得
+    loading_text = ft.Text("読み込み中...", size=16)
+    page.add(loading_text)
+    page.update()
+    
+    if app.fetch_area_list():
+        app.save_area_snapshot()
+        # 裏で全気象台の天気予報を先読みしておく（どの地域もすぐ開けるように）
+        start_prefetch()
+        show_main_layout()
+        page.update()
+        report_startup("ダウンロード")
     else:
         page.controls.clear()
         page.add(
             ft.Text("❌ 地域リストの取得に失敗しました", color="#f44336", size=16)
         )
-    
-    page.update()
+        page.update()
 
-ft.app(target=main)
\ No newline at end of file
+ft.app(target=main)
@@ -0,0 +1,153 @@
+"""全気象台の天気予報・警報をまとめて取得してキャッシュを温めるモジュール
+
+Fletを使わずに実行できるので、cronなどで定期的に動かせる:
+
+    python prefetch.py --workers 4 --rate 2
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from weather_app import WeatherApp
+
+
+class RateLimiter:
+    """トークンバケット方式のレート制限
+
+    rate 回/秒 のペースでトークンが貯まり、最大 burst 個まで貯められる。
+    acquire() はトークンが1つ取れるまで待つ。
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Prefetcher:
+    """WeatherApp.areas の全気象台について天気予報と警報を先読みする
+
+    - 同時に通信する数は max_workers まで
+    - リクエストのペースは rate 回/秒 まで（気象庁のサーバーに負荷をかけない）
+    - キャッシュが有効期限内のものは通信しない
+    """
+
+    def __init__(self, app, max_workers=4, rate=2.0, kinds=("forecast", "warning")):
+        self.app = app
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate, burst=max_workers)
+        self.kinds = kinds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def office_codes(self):
+        """地域リストから全気象台のコードを取り出す"""
+        codes = []
+        for center_data in self.app.areas.values():
+            for office in center_data["offices"]:
+                if office["code"] not in codes:
+                    codes.append(office["code"])
+        return codes
+
+    def _url(self, kind, code):
+        if kind == "forecast":
+            return self.app.forecast_url.format(code=code)
+        return self.app.warning_url.format(code=code)
+
+    def _fetch(self, kind, code):
+        """1件取得する。戻り値は "cached" / "fetched" / "failed" / "stopped" """
+        if self._stop.is_set():
+            return "stopped"
+        url = self._url(kind, code)
+        entry = self.app.cache.get(url)
+        if entry is not None and self.app.cache.is_fresh(entry):
+            return "cached"
+        self.limiter.acquire()
+        if self._stop.is_set():
+            return "stopped"
+        try:
+            self.app.get_json(url, kind)
+            return "fetched"
+        except Exception as e:
+            print(f"先読みエラー ({kind} {code}): {e}")
+            return "failed"
+
+    def run(self, codes=None, on_progress=None):
+        """先読みを実行して結果の件数を返す（終わるまで待つ）"""
+        if codes is None:
+            codes = self.office_codes()
+        jobs = [(kind, code) for code in codes for kind in self.kinds]
+        result = {"cached": 0, "fetched": 0, "failed": 0, "stopped": 0}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._fetch, kind, code) for kind, code in jobs]
+            for done, future in enumerate(as_completed(futures), 1):
+                result[future.result()] += 1
+                if on_progress is not None:
+                    on_progress(done, len(jobs))
+
+        result["elapsed"] = time.perf_counter() - start
+        return result
+
+    def start(self, codes=None):
+        """バックグラウンドのスレッドで先読みを始める"""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(codes,), daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """実行中の先読みを止める（取得中のリクエストは最後まで待つ）"""
+        self._stop.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="気象庁の天気予報・警報をキャッシュに先読みする")
+    parser.add_argument("--workers", type=int, default=4, help="同時に通信する数")
+    parser.add_argument("--rate", type=float, default=2.0, help="1秒あたりの最大リクエスト数")
+    parser.add_argument("--forecast-only", action="store_true", help="警報・注意報は取得しない")
+    parser.add_argument("--quiet", action="store_true", help="進み具合を表示しない")
+    args = parser.parse_args(argv)
+
+    app = WeatherApp()
+    if not app.fetch_area_list():
+        return 1
+
+    kinds = ("forecast",) if args.forecast_only else ("forecast", "warning")
+    prefetcher = Prefetcher(app, max_workers=args.workers, rate=args.rate, kinds=kinds)
+
+    def on_progress(done, total):
+        if not args.quiet:
+            print(f"\r{done}/{total}", end="", flush=True)
+
+    result = prefetcher.run(on_progress=on_progress)
+    if not args.quiet:
+        print()
+    print(
+        f"取得 {result['fetched']}件 / キャッシュ済み {result['cached']}件 / "
+        f"失敗 {result['failed']}件 ({result['elapsed']:.1f}秒)"
+    )
+    return 0 if result["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
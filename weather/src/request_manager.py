@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OfficeResult:
+    """1つの気象台の取得結果"""
+
+    __slots__ = ("area_code", "forecast", "warning_set")
+
+    def __init__(self, area_code, forecast, warning_set):
+        self.area_code = area_code
+        self.forecast = forecast  # Forecast（取得できなければNone）
+        self.warning_set = warning_set  # WarningSet（無ければNone）
+
+    @property
+    def ok(self):
+        return self.forecast is not None
+
+
+class RequestManager:
+    """気象台を素早く何度もクリックされたときの取得をまとめる
+
+    - 同じ気象台の取得がすでに動いていれば、新しく通信せずにそれを待つ
+    - 別の気象台が選ばれたら、まだ始まっていない取得はキャンセルする
+    - 結果は最後に選ばれた気象台のものだけを on_result(気象台コード, 名前, OfficeResult) に渡す
+      （古い結果が新しい表示を上書きしない）
+    """
+
+    def __init__(self, app, on_result, max_workers=2):
+        self.app = app
+        self.on_result = on_result
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._in_flight = {}  # 気象台コード -> Future
+        self._latest = None  # 最後に選ばれた (気象台コード, 名前)
+        self.coalesced = 0  # 動いている取得にまとめた回数
+        self.cancelled = 0  # キャンセルした回数
+
+    def request(self, area_code, area_name):
+        """気象台の表示を依頼する（すぐに戻る）"""
+        with self._lock:
+            self._latest = (area_code, area_name)
+            superseded = [f for code, f in self._in_flight.items() if code != area_code]
+
+            future = self._in_flight.get(area_code)
+            coalesced = future is not None and not future.cancelled()
+            if coalesced:
+                self.coalesced += 1
+            else:
+                future = self._executor.submit(self._load, area_code)
+                self._in_flight[area_code] = future
+
+        # 他の気象台の、まだ始まっていない取得はもう要らない
+        # （cancel() は _done をすぐに呼ぶので、ロックの外で行う）
+        for f in superseded:
+            if f.cancel():
+                self.cancelled += 1
+        if not coalesced:
+            future.add_done_callback(lambda f, code=area_code: self._done(code, f))
+        return future
+
+    def _load(self, area_code):
+        forecast, warning_set = self.app.fetch_forecast_and_warnings(area_code)
+        return OfficeResult(area_code, forecast, warning_set)
+
+    def _done(self, area_code, future):
+        with self._lock:
+            if self._in_flight.get(area_code) is future:
+                del self._in_flight[area_code]
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"取得エラー ({area_code}): {e}")
+            result = OfficeResult(area_code, None, None)
+
+        # 表示は1つずつ、最後に選ばれた気象台のときだけ行う
+        with self._render_lock:
+            latest = self._latest
+            if latest is None or latest[0] != area_code:
+                return
+            self.on_result(area_code, latest[1], result)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,130 @@
+import asyncio
+import random
+import threading
+
+
+class RefreshScheduler:
+    """表示中の気象台と、ピン留めした気象台の天気予報・警報を定期的に確認する
+
+    - 専用スレッドの asyncio ループで、気象台ごとにタスクを動かす
+    - 確認の間隔は interval 秒 ± jitter の割合でばらつかせる（一斉にアクセスしない）
+    - 確認は条件付きリクエスト（If-None-Match / If-Modified-Since）なので、
+      変わっていなければ本文はダウンロードしない
+    - 内容が変わったときだけ on_change(気象台コード, 天気予報が変わったか, 警報の差分) を呼ぶ
+    """
+
+    def __init__(self, app, interval=600, jitter=0.1, on_change=None):
+        self.app = app
+        self.interval = interval
+        self.jitter = jitter
+        self.on_change = on_change
+        self.current = None  # 表示中の気象台
+        self.watch_list = set()  # ピン留めした気象台
+        self._loop = None
+        self._thread = None
+        self._tasks = {}  # 気象台コード -> asyncio.Task
+
+    def start(self):
+        """スケジューラのスレッドを起動する"""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        for code in self._codes():
+            self._call(self._start_task, code)
+
+    def stop(self):
+        """全てのタスクを止めてスレッドを終了する"""
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+            for task in tasks:
+                task.cancel()
+            # キャンセルが終わるのを待ってからループを止める
+            await asyncio.gather(*tasks, return_exceptions=True)
+            asyncio.get_running_loop().stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def set_current(self, office_code):
+        """表示中の気象台を切り替える（前の気象台は、ピン留めされていなければ止める）"""
+        previous, self.current = self.current, office_code
+        if previous is not None and previous != office_code and previous not in self.watch_list:
+            self._call(self._stop_task, previous)
+        if office_code is not None:
+            self._call(self._start_task, office_code)
+
+    def watch(self, office_code):
+        """気象台をピン留めする"""
+        self.watch_list.add(office_code)
+        self._call(self._start_task, office_code)
+
+    def unwatch(self, office_code):
+        """ピン留めを外す"""
+        self.watch_list.discard(office_code)
+        if office_code != self.current:
+            self._call(self._stop_task, office_code)
+
+    def _codes(self):
+        codes = set(self.watch_list)
+        if self.current is not None:
+            codes.add(self.current)
+        return codes
+
+    def _call(self, func, *args):
+        # ループのスレッドで実行する（まだ起動していなければ何もしない）
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(func, *args)
+
+    def _start_task(self, code):
+        if code not in self._tasks:
+            self._tasks[code] = self._loop.create_task(self._poll(code))
+
+    def _stop_task(self, code):
+        task = self._tasks.pop(code, None)
+        if task is not None:
+            task.cancel()
+
+    def next_delay(self):
+        """次の確認までの秒数（ばらつきあり）"""
+        spread = self.interval * self.jitter
+        return max(1.0, self.interval + random.uniform(-spread, spread))
+
+    async def _poll(self, code):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.next_delay())
+            try:
+                # 通信は requests（同期）なので、スレッドプールで実行する
+                await loop.run_in_executor(self.app.executor, self.check, code)
+            except Exception as e:
+                print(f"自動更新エラー ({code}): {e}")
+
+    def check(self, code):
+        """1つの気象台を確認して、変わっていれば on_change を呼ぶ"""
+        app = self.app
+        forecast_data, forecast_changed = app.revalidate(
+            app.forecast_url.format(code=code), "forecast"
+        )
+        warning_data, warnings_changed = app.revalidate(
+            app.warning_url.format(code=code), "warning"
+        )
+
+        if forecast_changed:
+            app.history.record_forecast(code, forecast_data)
+        diff = None
+        if warnings_changed:
+            app.history.record_warnings(code, warning_data)
+            diff = app.warning_tracker.update(code, warning_data)
+
+        if (forecast_changed or diff) and self.on_change is not None:
+            self.on_change(code, forecast_changed, diff)
+        return forecast_changed, diff
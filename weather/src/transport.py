@@ -0,0 +1,104 @@
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class RequestTiming:
+    """1回のリクエストにかかった時間"""
+
+    __slots__ = ("url", "status", "ttfb", "total", "size", "retries")
+
+    def __init__(self, url, status, ttfb, total, size, retries):
+        self.url = url
+        self.status = status
+        self.ttfb = ttfb  # リクエスト送信からレスポンスヘッダー受信まで（秒）
+        self.total = total  # 本文の受信完了まで（秒）
+        self.size = size  # 受信した本文のバイト数（展開後）
+        self.retries = retries  # リトライした回数
+
+    def __repr__(self):
+        return (
+            f"{self.status} {self.url} ttfb={self.ttfb * 1000:.1f}ms "
+            f"total={self.total * 1000:.1f}ms size={self.size}B retries={self.retries}"
+        )
+
+
+class Transport:
+    """keep-alive・タイムアウト・リトライ付きのHTTPクライアント
+
+    - 接続はホストごとにプールして使い回す（毎回TCP/TLS接続をしない）
+    - 接続・読み込みそれぞれにタイムアウトを設定（応答が止まっても画面が固まらない）
+    - 429 と 5xx は指数バックオフでリトライ（Retry-After ヘッダーがあればそれに従う）
+    - gzip で受け取る
+    - リクエストごとの時間を timings に記録する
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        connect_timeout=3.05,
+        read_timeout=10,
+        retries=3,
+        backoff_factor=0.5,
+        pool_maxsize=10,
+        max_timings=200,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,  # 0.5, 1.0, 2.0 ... 秒待つ
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # リトライし尽くしたら最後のレスポンスを返す
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+        # 直近のリクエスト時間（古いものから捨てる）
+        self.timings = deque(maxlen=max_timings)
+
+    def get(self, url, headers=None):
+        """GETリクエストを送り、かかった時間を記録する"""
+        start = time.perf_counter()
+        res = self.session.get(url, headers=headers, timeout=self.timeout)
+        body = res.content  # 本文を読み終わるまでを計測に含める
+        total = time.perf_counter() - start
+
+        retries = 0
+        if res.raw is not None and getattr(res.raw, "retries", None) is not None:
+            retries = len(res.raw.retries.history)
+        self.timings.append(
+            RequestTiming(
+                url, res.status_code, res.elapsed.total_seconds(), total, len(body), retries
+            )
+        )
+        return res
+
+    def stats(self):
+        """記録したリクエスト時間の集計"""
+        if not self.timings:
+            return {"count": 0}
+        totals = sorted(t.total for t in self.timings)
+        return {
+            "count": len(totals),
+            "avg_ms": sum(totals) / len(totals) * 1000,
+            "p50_ms": totals[len(totals) // 2] * 1000,
+            "max_ms": totals[-1] * 1000,
+            "avg_ttfb_ms": sum(t.ttfb for t in self.timings) / len(totals) * 1000,
+            "retries": sum(t.retries for t in self.timings),
+        }
+
+    def close(self):
+        self.session.close()
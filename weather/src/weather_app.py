@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from area_search import AreaIndex
+from cache import DEFAULT_CACHE_DIR, HttpCache
+from forecast_model import parse_forecast
+from history import SnapshotStore
+from jma_warnings import WarningTracker
+from transport import Transport
+
+class WeatherApp:
+    # 気象庁APIのURL（テスト時はローカルのサーバーに差し替えられる）
+    area_url = "http://www.jma.go.jp/bosai/common/const/area.json"
+    forecast_url = "https://www.jma.go.jp/bosai/forecast/data/forecast/{code}.json"
+    warning_url = "https://www.jma.go.jp/bosai/warning/data/warning/{code}.json"
+
+    def __init__(self, cache=None, transport=None, history=None, area_snapshot_path=None):
+        self.areas = {}
+        self.area_index = None  # area.json 全階層の検索用インデックス（area_search.py）
+        self.selected_area_code = None
+        self.weather_data = None
+        self.forecast = None  # weather_data を変換した Forecast（forecast_model.py）
+        # 気象台ごとの警報・注意報（jma_warnings.py）。前回からの差分も分かる
+        self.warning_tracker = WarningTracker()
+        # 取得したJSONのキャッシュ（同じ地域を何度開いても通信しない）
+        self.cache = cache if cache is not None else HttpCache()
+        # 接続プール・タイムアウト・リトライ付きの通信（リクエストごとの時間も記録される）
+        self.transport = transport if transport is not None else Transport()
+        # 取得した天気予報・警報の履歴（ネットワークが無いときの表示にも使う）
+        self.history = history if history is not None else SnapshotStore()
+        # 天気予報と警報を同時に取得するためのスレッドプール
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        # 地域リストを小さくまとめて保存しておくファイル（次回の起動で使う）
+        if area_snapshot_path is None:
+            area_snapshot_path = os.path.join(DEFAULT_CACHE_DIR, "areas.json")
+        self.area_snapshot_path = area_snapshot_path
+        self.startup_ms = None  # 起動から操作できるようになるまでの時間
+    
+    def get_json(self, url, kind, revalidate=False):
+        """キャッシュを使ってJSONを取得
+        
+        revalidate=True のときは有効期限内でも条件付きリクエストで確認する。
+        """
+        entry = self.cache.get(url)
+        
+        # 有効期限内ならそのまま返す
+        if not revalidate and entry is not None and self.cache.is_fresh(entry):
+            self.cache.hits += 1
+            return json.loads(entry.body)
+        
+        # 期限切れなら ETag / Last-Modified で再検証する
+        self.cache.misses += 1
+        try:
+            res = self.transport.get(url, headers=self.cache.conditional_headers(entry))
+        except Exception:
+            # 通信できないときは期限切れでも保存してあるものを使う
+            if entry is not None:
+                return json.loads(entry.body)
+            raise
+        if res.status_code == 304:
+            if entry is not None:
+                self.cache.touch(url)
+                return json.loads(entry.body)
+            # 手元に本文が無いのに 304 が返った（途中のキャッシュなど）ので、条件なしで取り直す
+            res = self.transport.get(url, headers={"Cache-Control": "no-cache"})
+            if res.status_code == 304:
+                raise requests.HTTPError(f"304 が返ったが、キャッシュに本文が無い: {url}", response=res)
+        res.raise_for_status()
+        
+        data = res.json()
+        self.cache.put(
+            url,
+            kind,
+            res.content,
+            etag=res.headers.get("ETag"),
+            last_modified=res.headers.get("Last-Modified"),
+        )
+        return data
+        
+    def revalidate(self, url, kind):
+        """条件付きリクエストで最新か確認する
+        
+        戻り値は (JSON, 前回から内容が変わったか)。
+        変わっていなければサーバーは 304 を返すので、本文はダウンロードされない。
+        """
+        before = self.cache.get(url)
+        before_hash = hashlib.sha1(before.body).digest() if before is not None else None
+        data = self.get_json(url, kind, revalidate=True)
+        after = self.cache.get(url)
+        changed = after is None or hashlib.sha1(after.body).digest() != before_hash
+        return data, changed
+    
+    def fetch_area_list(self):
+        """気象庁APIから地域リストを取得"""
+        try:
+            data_json = self.get_json(self.area_url, "area")
+            
+            # 地域データを階層構造で整理
+            centers = data_json.get("centers", {})
+            offices = data_json.get("offices", {})
+            
+            # 地方ごとに整理（表示中の self.areas を途中の状態にしないよう、作ってから入れ替える）
+            areas = {}
+            for center_code, center_data in centers.items():
+                center_name = center_data.get("name", "")
+                children = center_data.get("children", [])
+                
+                areas[center_code] = {
+                    "name": center_name,
+                    "offices": []
+                }
+                
+                # 各地方配下の気象台を追加
+                for office_code in children:
+                    if office_code in offices:
+                        office_data = offices[office_code]
+                        areas[center_code]["offices"].append({
+                            "code": office_code,
+                            "name": office_data.get("name", "")
+                        })
+            
+            self.areas = areas
+            # 市区町村まで含めた全階層で検索できるようにする
+            self.area_index = AreaIndex.from_area_json(data_json)
+            return True
+        except Exception as e:
+            print(f"地域リスト取得エラー: {e}")
+            return False
+    
+    def save_area_snapshot(self):
+        """地域リストをファイルに保存
+        
+        area.json 全体ではなく [地方コード, 地方名, [[気象台コード, 気象台名], ...]] の
+        リストだけを保存するので、次回の起動時にすぐ読み込める。
+        """
+        compact = [
+            [center_code, center_data["name"], [[o["code"], o["name"]] for o in center_data["offices"]]]
+            for center_code, center_data in self.areas.items()
+        ]
+        try:
+            directory = os.path.dirname(self.area_snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.area_snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(compact, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.area_snapshot_path)
+            return True
+        except OSError as e:
+            print(f"地域リスト保存エラー: {e}")
+            return False
+    
+    def load_area_snapshot(self):
+        """保存してある地域リストを読み込む（無ければFalse）"""
+        try:
+            with open(self.area_snapshot_path, encoding="utf-8") as f:
+                compact = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.areas = {
+            center_code: {
+                "name": center_name,
+                "offices": [{"code": code, "name": name} for code, name in offices],
+            }
+            for center_code, center_name, offices in compact
+        }
+        return bool(self.areas)
+    
+    def load_forecast(self, area_code):
+        """指定地域の天気予報を取得して (JSON, Forecast) を返す（失敗したら (None, None)）
+        
+        self.weather_data などは書き換えないので、複数のスレッドから同時に呼べる。
+        """
+        try:
+            url = self.forecast_url.format(code=area_code)
+            data = self.get_json(url, "forecast")
+            forecast = parse_forecast(data)
+            self.history.record_forecast(area_code, data, forecast)
+            return data, forecast
+        except Exception as e:
+            print(f"天気予報取得エラー: {e}")
+            # 履歴に保存してあれば、それを表示する（オフライン）
+            saved = self.history.latest_forecast(area_code)
+            if saved is None:
+                return None, None
+            return saved, parse_forecast(saved)
+    
+    def fetch_weather_data(self, area_code):
+        """指定地域の天気予報を取得"""
+        data, forecast = self.load_forecast(area_code)
+        if data is None:
+            return False
+        self.weather_data = data
+        self.forecast = forecast
+        return True
+    
+    def fetch_warnings(self, area_code):
+        """指定地域の警報・注意報を取得"""
+        try:
+            url = self.warning_url.format(code=area_code)
+            warning_data = self.get_json(url, "warning")
+            self.history.record_warnings(area_code, warning_data)
+        except Exception as e:
+            print(f"警報・注意報取得エラー: {e}")
+            warning_data = self.history.latest_warnings(area_code)
+        if warning_data is not None:
+            self.warning_tracker.update(area_code, warning_data)
+        return warning_data
+    
+    def fetch_forecast_and_warnings(self, area_code):
+        """天気予報と警報・注意報を同時に取得
+        
+        天気予報は別スレッドで、警報・注意報はこのスレッドで取得するので、
+        待ち時間は2つの合計ではなく、遅い方の1回分になる。
+        self.weather_data などは書き換えないので、複数のスレッドから同時に呼べる。
+        戻り値は (Forecast（取得できなければNone）, WarningSet（無ければNone）)
+        """
+        forecast_future = self.executor.submit(self.load_forecast, area_code)
+        warning_data = self.fetch_warnings(area_code)
+        _, forecast = forecast_future.result()
+        warning_set = self.warning_tracker.get(area_code) if warning_data else None
+        return forecast, warning_set